@@ -3,6 +3,11 @@ import streamlit as st
 import time
 from backend_connector import process_sop, BACKEND_AVAILABLE, get_mock_results
 
+if BACKEND_AVAILABLE:
+    from backend_connector import PIPELINE_NODES
+else:
+    PIPELINE_NODES = []
+
 st.set_page_config(page_title="Kevin AI - Current State", page_icon="📊", layout="wide")
 
 st.html("<style>#MainMenu{visibility:hidden;}footer{visibility:hidden;}</style>")
@@ -18,32 +23,39 @@ if not st.session_state.analysis_complete:
     progress_bar = st.progress(0)
     status_text = st.empty()
     
-    steps = [
-        ("📄 Extracting text...", 15),
-        ("🧠 Applying NLP...", 30),
-        ("🔍 Detecting decisions...", 45),
-        ("👥 Mapping actors...", 60),
-        ("💻 Identifying systems...", 75),
-        ("📊 Analyzing flows...", 90),
-        ("✅ Generating map...", 100)
-    ]
+    node_labels = {
+        "sop_analysis": "📄 Extracting and analyzing SOP...",
+        "process_mapping": "📊 Mapping current state...",
+        "gap_identification": "🔍 Checking gaps...",
+        "automation_opportunity": "🤖 Scoring automation opportunities...",
+        "future_state_design": "🚀 Designing future state...",
+        "test_case_generation": "🧪 Generating test cases...",
+        "code_generation": "💻 Generating code...",
+        "kpi_calculation": "📈 Calculating KPIs..."
+    }
+    map_preview = st.empty()
     
-    for step, progress in steps:
-        status_text.markdown(f"**{step}**")
-        progress_bar.progress(progress)
-        time.sleep(0.8)
+    def show_progress(event):
+        """Render real pipeline events as they stream in"""
+        if event.get("event") == "node_started":
+            node = event["node"]
+            done = PIPELINE_NODES.index(node) if node in PIPELINE_NODES else 0
+            progress_bar.progress(int(100 * done / len(PIPELINE_NODES)))
+            status_text.markdown(f"**{node_labels.get(node, node)}**")
+        elif event.get("event") == "artifact" and event.get("artifact") == "current_state_map":
+            map_preview.code(event["value"], language="text")
     
     try:
-        from backend_connector import process_sop, get_mock_results
-        if hasattr(st.session_state, 'sop_file') and hasattr(st.session_state, 'config'):
+        if BACKEND_AVAILABLE and hasattr(st.session_state, 'sop_file') and hasattr(st.session_state, 'config'):
             status_text.markdown("**🤖 Running AI...**")
-            results = process_sop(st.session_state.sop_file, st.session_state.config)
+            results = process_sop(st.session_state.sop_file, st.session_state.config, on_event=show_progress)
             st.session_state.analysis_results = results
         else:
             st.session_state.analysis_results = get_mock_results()
     except Exception as e:
         st.session_state.analysis_results = get_mock_results()
     
+    progress_bar.progress(100)
     st.session_state.analysis_complete = True
     status_text.markdown("**✓ Complete!**")
     time.sleep(1)
@@ -23,20 +23,23 @@ try:
         TestCaseGeneratorAgent,
         CodeGeneratorAgent,
         KPICalculatorAgent,
-        SOPOrchestrator
+        get_shared_orchestrator
     )
+    from kevin_uploads import new_session_id
     BACKEND_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Could not import kevin_agents: {e}")
     BACKEND_AVAILABLE = False
 
-def process_sop(sop_file, config):
+def process_sop(sop_file, config, on_event=None):
     """
     Process SOP document through AI agents
     
     Args:
         sop_file: Uploaded file object
         config: Dict with industry, process_type, erp_system, risk_profile
+        on_event: Optional callback for live pipeline events (node_started,
+            node_finished, llm_progress, artifact)
     
     Returns:
         Dict with all analysis results
@@ -45,40 +48,24 @@ def process_sop(sop_file, config):
         return get_mock_results()
     
     try:
-        # Save uploaded file temporarily
-        temp_path = f"/tmp/{sop_file.name}"
+        # Save uploaded file temporarily (per session, so concurrent uploads of
+        # the same file name do not overwrite each other)
+        session_id = new_session_id()
+        temp_path = f"/tmp/{session_id}_{os.path.basename(sop_file.name)}"
         with open(temp_path, "wb") as f:
             f.write(sop_file.getvalue())
         
-        # Initialize orchestrator
-        orchestrator = SOPOrchestrator()
-        
-        # Create initial state
-        initial_state = {
-            "sop_document_path": temp_path,
-            "process_diagram_path": None,
-            "domain": config.get("industry", "logistics"),
-            "sop_text": "",
-            "sop_structure": {},
-            "diagram_content": None,
-            "current_state_map": "",
-            "current_state_steps": [],
-            "gap_analysis": None,
-            "automation_opportunities": [],
-            "future_state_map": "",
-            "future_state_architecture": {},
-            "requirements": {},
-            "test_cases": [],
-            "generated_code": {},
-            "kpi_analysis": {},
-            "session_id": "demo_session",
-            "timestamp": "",
-            "agent_logs": [],
-            "errors": []
-        }
+        # Shared orchestrator (graph compiled once per process)
+        orchestrator = get_shared_orchestrator()
         
         # Run orchestration
-        result = orchestrator.process(initial_state)
+        result = orchestrator.process(
+            temp_path,
+            None,
+            config.get("industry", "logistics"),
+            session_id=session_id,
+            on_event=on_event
+        )
         
         # Clean up temp file
         os.remove(temp_path)
@@ -1,6 +1,6 @@
 """
 Kevin AI - Export Utilities
-Generate PDF and PPTX reports from results
+Generate PDF, PPTX and XLSX reports from results
 
 Version: 2.0
 Date: January 6, 2026
@@ -9,54 +9,90 @@ Date: January 6, 2026
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Preformatted, Spacer, Table, LongTable, TableStyle, PageBreak, Image
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+import hashlib
+import io
 import json
-import base64
 import subprocess
 import tempfile
+import threading
 import os
+from xml.sax.saxutils import escape
 
+from PIL import Image as PILImage
 
-def mermaid_to_image(mermaid_code, output_path, format='png'):
+import kevin_mermaid
+from kevin_diagram_cache import diagram_key, get_diagram_cache
+from kevin_metrics import record_cache
+from kevin_opportunities import opportunity_savings
+from prompts import PROMPT_VERSION
+
+REPORT_CACHE_MB = int(os.getenv("KEVIN_REPORT_CACHE_MB", "64"))
+
+# Process maps in reports: rendered at 2 pixels per point (print quality);
+# a map is shrunk to fit its page or slide, but below DIAGRAM_MIN_ZOOM of its
+# natural size it is cut into tiles over several pages instead
+DIAGRAM_MAPS = ('current_state_map', 'future_state_map')
+DIAGRAM_RENDER_SCALE = 2.0
+DIAGRAM_MIN_ZOOM = 0.6
+PDF_DIAGRAM_BOX = (6.3*inch, 7.5*inch)  # letter frame less the section heading
+PPTX_DIAGRAM_BOX = (Inches(9), Inches(5.6))
+REPORT_WORKERS = int(os.getenv("KEVIN_REPORT_WORKERS", "4"))
+
+REPORT_MIME_TYPES = {
+    'pdf': 'application/pdf',
+    'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def render_diagram(mermaid_code, format='png', theme='default', scale=1.0):
     """
-    Convert Mermaid diagram to PNG or JPEG using mermaid.ink API
+    Render a Mermaid diagram to PNG, JPEG or SVG bytes (cached by content hash)
+    
+    Diagrams that are not Mermaid flowcharts (e.g. the ASCII process maps)
+    are rendered as preformatted text. No network access is needed.
     
     Args:
         mermaid_code: Mermaid diagram code
-        output_path: Output file path
-        format: 'png' or 'jpg'
+        format: 'png', 'jpg' or 'svg'
+        theme: renderer theme ('default', 'neutral', 'dark')
+        scale: 2.0 renders at twice the resolution
+    """
+    format = 'jpeg' if format.lower() in ('jpg', 'jpeg') else format.lower()
+
+    def render():
+        try:
+            return kevin_mermaid.render(mermaid_code, format, theme, scale)
+        except kevin_mermaid.MermaidError:
+            return kevin_mermaid.render_text(mermaid_code, format, theme, scale)
+
+    key = diagram_key(mermaid_code, format, theme, scale)
+    return get_diagram_cache().get_or_render(key, render)
+
+
+def mermaid_to_image(mermaid_code, output_path, format='png'):
+    """
+    Convert Mermaid diagram to PNG, JPEG or SVG and write it to output_path
+    
+    Prefer render_diagram, which returns the bytes without a file.
     """
     try:
-        # Use mermaid.ink free API service
-        import requests
-        
-        # Encode mermaid code to base64
-        mermaid_bytes = mermaid_code.encode('utf-8')
-        base64_bytes = base64.b64encode(mermaid_bytes)
-        base64_string = base64_bytes.decode('utf-8')
-        
-        # Use mermaid.ink API
-        if format.lower() == 'jpg' or format.lower() == 'jpeg':
-            url = f"https://mermaid.ink/img/{base64_string}?type=jpeg"
-        else:
-            url = f"https://mermaid.ink/img/{base64_string}?type=png"
-        
-        # Download image
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        
-        # Save to file
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
-        
-        return output_path
-        
+        data = render_diagram(mermaid_code, format)
     except Exception as e:
         print(f"Error converting Mermaid to image: {e}")
         # Fallback: Create a simple text-based diagram placeholder
@@ -71,14 +107,259 @@ def mermaid_to_image(mermaid_code, output_path, format='png'):
         
         img.save(output_path)
         return output_path
+    
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return output_path
+
 
+@dataclass(frozen=True)
+class ReportSummary:
+    """Aggregates shared by every report format, computed once per session"""
+    session_id: str
+    automation_opportunities: List[Dict]
+    test_cases: List[Dict]
+    total_savings: float
+    automation_types: Dict[str, int]
+    test_types: Dict[str, int]
+    generated_at: datetime
+    maps: Dict[str, str] = field(default_factory=dict)
+    _diagrams: Dict[str, Optional[bytes]] = field(default_factory=dict, repr=False, compare=False)
+    _diagram_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
 
-def create_pdf_report(result, output_path):
+    def diagram(self, name):
+        """
+        PNG of a process map, rendered once and shared by every format (None if unavailable)
+        """
+        with self._diagram_lock:
+            if name not in self._diagrams:
+                source = self.maps.get(name)
+                try:
+                    self._diagrams[name] = render_diagram(source, 'png', scale=DIAGRAM_RENDER_SCALE) if source else None
+                except Exception as e:
+                    print(f"Error rendering {name}: {e}")
+                    self._diagrams[name] = None
+            return self._diagrams[name]
+
+
+def diagram_tiles(png, box_width, box_height):
     """
-    Create comprehensive PDF report with all artifacts
+    Fit a rendered diagram into a box (in points), splitting it if it would get too small
+    
+    Returns [(png bytes, width, height)] in reading order (rows, then columns).
+    """
+    image = PILImage.open(io.BytesIO(png))
+    natural_width = image.width / DIAGRAM_RENDER_SCALE
+    natural_height = image.height / DIAGRAM_RENDER_SCALE
+    
+    zoom = min(1.0, box_width / natural_width, box_height / natural_height)
+    if zoom >= DIAGRAM_MIN_ZOOM:
+        return [(png, natural_width * zoom, natural_height * zoom)]
+    
+    zoom = max(DIAGRAM_MIN_ZOOM, min(1.0, box_width / natural_width))
+    tile_width = int(box_width / zoom * DIAGRAM_RENDER_SCALE)
+    tile_height = int(box_height / zoom * DIAGRAM_RENDER_SCALE)
+    tiles = []
+    for top in range(0, image.height, tile_height):
+        for left in range(0, image.width, tile_width):
+            tile = image.crop((left, top, min(left + tile_width, image.width), min(top + tile_height, image.height)))
+            buffer = io.BytesIO()
+            tile.save(buffer, 'PNG')
+            scale = zoom / DIAGRAM_RENDER_SCALE
+            tiles.append((buffer.getvalue(), tile.width * scale, tile.height * scale))
+    return tiles
+
+
+def _pack_tiles(tiles, box_height, gap):
+    """Group consecutive tiles that fit one above the other in box_height"""
+    groups = []
+    used = 0
+    for tile in tiles:
+        if groups and used + gap + tile[2] <= box_height:
+            groups[-1].append(tile)
+            used += gap + tile[2]
+        else:
+            groups.append([tile])
+            used = tile[2]
+    return groups
+
+
+def summarize_result(result):
+    """
+    Compute the report aggregates (savings, counts by type) for a pipeline result
+    """
+    automation_opps = result.get('automation_opportunities', [])
+    test_cases = result.get('test_cases', [])
+    
+    automation_types = {}
+    for opp in automation_opps:
+        atype = opp.get('automation_type', 'Unknown')
+        automation_types[atype] = automation_types.get(atype, 0) + 1
+    
+    test_types = {}
+    for test in test_cases:
+        ttype = test.get('test_type', 'Unknown')
+        test_types[ttype] = test_types.get(ttype, 0) + 1
+    
+    return ReportSummary(
+        session_id=result['session_id'],
+        automation_opportunities=automation_opps,
+        test_cases=test_cases,
+        total_savings=sum(opportunity_savings(opp) for opp in automation_opps),
+        automation_types=automation_types,
+        test_types=test_types,
+        generated_at=datetime.now(),
+        maps={name: result.get(name) or '' for name in DIAGRAM_MAPS}
+    )
+
+
+TABLE_HEADER_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f77b4')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+]
+
+# Full reports: rows per LongTable and map lines per Preformatted block,
+# so no single flowable grows with the size of the session
+FULL_REPORT_TABLE_ROWS = 250
+FULL_REPORT_MAP_LINES = 80
+
+
+class _FlowableStream(list):
+    """
+    Story list that pulls flowables from a generator a few at a time
+    
+    doc.build consumes the story from the front (pushing split remainders
+    back), so only the lookahead of flowables is held at a time. Pages that
+    are already laid out stay with ReportLab until the document is saved.
+    """
+    LOOKAHEAD = 32
+
+    def __init__(self, flowables):
+        super().__init__()
+        self._source = iter(flowables)
+
+    def _fill(self, n):
+        while self._source is not None and list.__len__(self) < n:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill(self.LOOKAHEAD)
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self._fill(float('inf') if index.stop is None or index.stop < 0 else index.stop)
+        else:
+            self._fill(float('inf') if index < 0 else index + 1)
+        return list.__getitem__(self, index)
+
+
+def _long_tables(header, rows, col_widths, chunk_rows):
+    """LongTables of at most chunk_rows rows each, splitting across pages with the header repeated"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_rows:
+            yield _long_table(header, chunk, col_widths)
+            chunk = []
+    if chunk:
+        yield _long_table(header, chunk, col_widths)
+
+
+def _long_table(header, rows, col_widths):
+    table = LongTable([header] + rows, colWidths=col_widths, repeatRows=1)
+    table.setStyle(TableStyle(TABLE_HEADER_STYLE))
+    return table
+
+
+def _map_flowables(map_text, styles, full, png=None):
+    """The rendered diagram (split over pages if large); the Mermaid source when it could not be rendered or full=True"""
+    if png:
+        tiles = diagram_tiles(png, *PDF_DIAGRAM_BOX)
+        part_style = ParagraphStyle('DiagramPart', parent=styles['Italic'], keepWithNext=1)
+        for i, (tile, width, height) in enumerate(tiles, 1):
+            if len(tiles) > 1:
+                yield Paragraph(f"Part {i} of {len(tiles)}", part_style)
+            yield Image(io.BytesIO(tile), width=width, height=height)
+        if not full:
+            return
+        yield Spacer(1, 0.2*inch)
+        yield Paragraph("Mermaid Source:", styles['Normal'])
+    elif not full:
+        # Truncate if too long
+        map_text = map_text[:2000] + "..." if len(map_text) > 2000 else map_text
+        yield Paragraph(f"<pre>{escape(map_text)}</pre>", styles['Code'])
+        return
+    lines = map_text.splitlines()
+    for i in range(0, len(lines), FULL_REPORT_MAP_LINES):
+        yield Preformatted("\n".join(lines[i:i + FULL_REPORT_MAP_LINES]), styles['Code'])
+
+
+def _opportunity_rows(automation_opps):
+    for i, opp in enumerate(automation_opps, 1):
+        yield [
+            f"AO-{i:02d}",
+            str(opp.get('step_id', 'N/A'))[:15],
+            str(opp.get('description', 'N/A'))[:40] + "...",
+            str(opp.get('automation_type', 'N/A'))[:15],
+            f"{opp.get('time_savings_hours_per_week', 0) * 2}%",
+            f"${opportunity_savings(opp):,.0f}",
+            str(opp.get('priority', 'P2'))
+        ]
+
+
+def _test_case_rows(test_cases):
+    for i, test in enumerate(test_cases, 1):
+        yield [
+            f"TC-{i:02d}",
+            str(test.get('test_name', 'N/A'))[:50],
+            str(test.get('test_type', 'Functional')),
+            str(test.get('priority', 'Medium')),
+            'Auto-Ready' if test.get('automated', True) else 'Manual'
+        ]
+
+
+def _test_case_details(i, test, styles):
+    yield Paragraph(f"<b>TC-{i:02d}: {escape(str(test.get('test_name', 'N/A')))}</b>", styles['Heading3'])
+    yield Paragraph(f"<b>Type:</b> {escape(str(test.get('test_type', 'Functional')))}", styles['Normal'])
+    yield Paragraph(f"<b>Priority:</b> {escape(str(test.get('priority', 'Medium')))}", styles['Normal'])
+    yield Paragraph(f"<b>Process Step:</b> {escape(str(test.get('process_step', 'N/A')))}", styles['Normal'])
+    yield Spacer(1, 0.1*inch)
+    
+    yield Paragraph("<b>Description:</b>", styles['Normal'])
+    yield Paragraph(escape(str(test.get('description', 'N/A'))), styles['Normal'])
+    yield Spacer(1, 0.1*inch)
+    
+    yield Paragraph("<b>Pre-conditions:</b>", styles['Normal'])
+    for pc in test.get('preconditions', ['System is available']):
+        yield Paragraph(f"• {escape(str(pc))}", styles['Normal'])
+    yield Spacer(1, 0.1*inch)
+    
+    yield Paragraph("<b>Test Steps:</b>", styles['Normal'])
+    for j, step in enumerate(test.get('test_steps', ['Execute test']), 1):
+        yield Paragraph(f"{j}. {escape(str(step))}", styles['Normal'])
+    yield Spacer(1, 0.1*inch)
+    
+    yield Paragraph("<b>Expected Result:</b>", styles['Normal'])
+    yield Paragraph(escape(str(test.get('expected_result', 'Test passes'))), styles['Normal'])
+    yield Spacer(1, 0.2*inch)
+
+
+def _pdf_flowables(result, summary, full):
+    """
+    Report story as a generator; full=True includes every test case and the complete maps
     """
-    doc = SimpleDocTemplate(output_path, pagesize=letter)
-    story = []
     styles = getSampleStyleSheet()
     
     # Custom styles
@@ -101,27 +382,26 @@ def create_pdf_report(result, output_path):
     )
     
     # Title Page
-    story.append(Spacer(1, 2*inch))
-    story.append(Paragraph("Kevin AI", title_style))
-    story.append(Paragraph("SOP Automation Analysis Report", styles['Heading2']))
-    story.append(Spacer(1, 0.5*inch))
-    story.append(Paragraph(f"Session ID: {result['session_id']}", styles['Normal']))
-    story.append(Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", styles['Normal']))
-    story.append(Paragraph(f"Domain: {result.get('domain', 'N/A').capitalize()}", styles['Normal']))
-    story.append(PageBreak())
+    yield Spacer(1, 2*inch)
+    yield Paragraph("Kevin AI", title_style)
+    yield Paragraph("SOP Automation Analysis Report", styles['Heading2'])
+    yield Spacer(1, 0.5*inch)
+    yield Paragraph(f"Session ID: {result['session_id']}", styles['Normal'])
+    yield Paragraph(f"Generated: {summary.generated_at.strftime('%B %d, %Y at %I:%M %p')}", styles['Normal'])
+    yield Paragraph(f"Domain: {result.get('domain', 'N/A').capitalize()}", styles['Normal'])
+    yield PageBreak()
     
     # Executive Summary
-    story.append(Paragraph("Executive Summary", heading_style))
+    yield Paragraph("Executive Summary", heading_style)
     
-    automation_opps = result.get('automation_opportunities', [])
-    test_cases = result.get('test_cases', [])
-    total_savings = sum(opp.get('estimated_savings_annual', 0) for opp in automation_opps)
+    automation_opps = summary.automation_opportunities
+    test_cases = summary.test_cases
     
     summary_data = [
         ['Metric', 'Value'],
         ['Automation Opportunities', str(len(automation_opps))],
         ['Test Cases Generated', str(len(test_cases))],
-        ['Estimated Annual Savings', f'${total_savings:,.0f}'],
+        ['Estimated Annual Savings', f'${summary.total_savings:,.0f}'],
         ['Processing Time', '~14 minutes'],
     ]
     
@@ -137,171 +417,135 @@ def create_pdf_report(result, output_path):
         ('GRID', (0, 0), (-1, -1), 1, colors.black)
     ]))
     
-    story.append(summary_table)
-    story.append(Spacer(1, 0.3*inch))
-    story.append(PageBreak())
+    yield summary_table
+    yield Spacer(1, 0.3*inch)
+    yield PageBreak()
     
     # Current State Process Map
-    story.append(Paragraph("Current State Process Map", heading_style))
+    yield Paragraph("Current State Process Map", heading_style)
     if result.get('current_state_map'):
-        story.append(Paragraph("Mermaid Diagram:", styles['Normal']))
-        story.append(Spacer(1, 0.1*inch))
-        # Truncate if too long
-        map_text = result['current_state_map'][:2000] + "..." if len(result['current_state_map']) > 2000 else result['current_state_map']
-        story.append(Paragraph(f"<pre>{map_text}</pre>", styles['Code']))
+        yield Paragraph("Mermaid Diagram:", styles['Normal'])
+        yield Spacer(1, 0.1*inch)
+        yield from _map_flowables(result['current_state_map'], styles, full, summary.diagram('current_state_map'))
     else:
-        story.append(Paragraph("No current state map available.", styles['Normal']))
-    story.append(PageBreak())
+        yield Paragraph("No current state map available.", styles['Normal'])
+    yield PageBreak()
     
     # Future State Process Map
-    story.append(Paragraph("Future State Process Map", heading_style))
+    yield Paragraph("Future State Process Map", heading_style)
     if result.get('future_state_map'):
-        story.append(Paragraph("Optimized Mermaid Diagram:", styles['Normal']))
-        story.append(Spacer(1, 0.1*inch))
-        map_text = result['future_state_map'][:2000] + "..." if len(result['future_state_map']) > 2000 else result['future_state_map']
-        story.append(Paragraph(f"<pre>{map_text}</pre>", styles['Code']))
+        yield Paragraph("Optimized Mermaid Diagram:", styles['Normal'])
+        yield Spacer(1, 0.1*inch)
+        yield from _map_flowables(result['future_state_map'], styles, full, summary.diagram('future_state_map'))
     else:
-        story.append(Paragraph("No future state map available.", styles['Normal']))
-    story.append(PageBreak())
+        yield Paragraph("No future state map available.", styles['Normal'])
+    yield PageBreak()
     
     # Automation Opportunities
-    story.append(Paragraph("Automation Opportunities Matrix", heading_style))
+    yield Paragraph("Automation Opportunities Matrix", heading_style)
     if automation_opps:
-        # Create table data
-        table_data = [
-            ['ID', 'Stage', 'Activity', 'Type', 'Impact', 'Savings/Year', 'Priority']
-        ]
-        
-        for i, opp in enumerate(automation_opps, 1):
-            table_data.append([
-                f"AO-{i:02d}",
-                str(opp.get('step_id', 'N/A'))[:15],
-                str(opp.get('description', 'N/A'))[:40] + "...",
-                str(opp.get('automation_type', 'N/A'))[:15],
-                f"{opp.get('time_savings_hours_per_week', 0) * 2}%",
-                f"${opp.get('estimated_savings_annual', 0):,.0f}",
-                str(opp.get('priority', 'P2'))
-            ])
-        
-        opp_table = Table(table_data, colWidths=[0.5*inch, 0.8*inch, 2*inch, 1*inch, 0.6*inch, 1*inch, 0.6*inch])
-        opp_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f77b4')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
-        
-        story.append(opp_table)
-        story.append(Spacer(1, 0.3*inch))
+        header = ['ID', 'Stage', 'Activity', 'Type', 'Impact', 'Savings/Year', 'Priority']
+        col_widths = [0.5*inch, 0.8*inch, 2*inch, 1*inch, 0.6*inch, 1*inch, 0.6*inch]
+        if full:
+            yield from _long_tables(header, _opportunity_rows(automation_opps), col_widths, FULL_REPORT_TABLE_ROWS)
+        else:
+            opp_table = Table([header] + list(_opportunity_rows(automation_opps)), colWidths=col_widths)
+            opp_table.setStyle(TableStyle(TABLE_HEADER_STYLE))
+            yield opp_table
+        yield Spacer(1, 0.3*inch)
         
         # Summary by type
-        story.append(Paragraph("Automation by Type:", styles['Normal']))
-        automation_types = {}
-        for opp in automation_opps:
-            atype = opp.get('automation_type', 'Unknown')
-            automation_types[atype] = automation_types.get(atype, 0) + 1
-        
-        for atype, count in automation_types.items():
-            story.append(Paragraph(f"• {atype}: {count} opportunities", styles['Normal']))
+        yield Paragraph("Automation by Type:", styles['Normal'])
+        for atype, count in summary.automation_types.items():
+            yield Paragraph(f"• {escape(str(atype))}: {count} opportunities", styles['Normal'])
         
     else:
-        story.append(Paragraph("No automation opportunities identified.", styles['Normal']))
-    story.append(PageBreak())
+        yield Paragraph("No automation opportunities identified.", styles['Normal'])
+    yield PageBreak()
     
     # Test Cases Summary
-    story.append(Paragraph("Test Cases", heading_style))
+    yield Paragraph("Test Cases", heading_style)
     if test_cases:
-        # Test cases table
-        table_data = [
-            ['ID', 'Test Case', 'Type', 'Priority', 'Status']
-        ]
-        
-        for i, test in enumerate(test_cases[:20], 1):  # First 20
-            table_data.append([
-                f"TC-{i:02d}",
-                str(test.get('test_name', 'N/A'))[:50],
-                str(test.get('test_type', 'Functional')),
-                str(test.get('priority', 'Medium')),
-                'Auto-Ready' if test.get('automated', True) else 'Manual'
-            ])
-        
-        test_table = Table(table_data, colWidths=[0.6*inch, 3*inch, 1*inch, 0.8*inch, 1*inch])
-        test_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f77b4')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
-        
-        story.append(test_table)
-        story.append(Spacer(1, 0.3*inch))
+        header = ['ID', 'Test Case', 'Type', 'Priority', 'Status']
+        col_widths = [0.6*inch, 3*inch, 1*inch, 0.8*inch, 1*inch]
+        if full:
+            yield from _long_tables(header, _test_case_rows(test_cases), col_widths, FULL_REPORT_TABLE_ROWS)
+        else:
+            test_table = Table([header] + list(_test_case_rows(test_cases[:20])), colWidths=col_widths)  # First 20
+            test_table.setStyle(TableStyle(TABLE_HEADER_STYLE))
+            yield test_table
+        yield Spacer(1, 0.3*inch)
         
-        # Detailed test cases (first 3)
-        story.append(PageBreak())
-        story.append(Paragraph("Detailed Test Case Examples", heading_style))
+        # Detailed test cases (first 3 unless full)
+        yield PageBreak()
+        yield Paragraph("Detailed Test Cases" if full else "Detailed Test Case Examples", heading_style)
         
-        for i, test in enumerate(test_cases[:3], 1):
-            story.append(Paragraph(f"<b>TC-{i:02d}: {test.get('test_name', 'N/A')}</b>", styles['Heading3']))
-            story.append(Paragraph(f"<b>Type:</b> {test.get('test_type', 'Functional')}", styles['Normal']))
-            story.append(Paragraph(f"<b>Priority:</b> {test.get('priority', 'Medium')}", styles['Normal']))
-            story.append(Paragraph(f"<b>Process Step:</b> {test.get('process_step', 'N/A')}", styles['Normal']))
-            story.append(Spacer(1, 0.1*inch))
-            
-            story.append(Paragraph("<b>Description:</b>", styles['Normal']))
-            story.append(Paragraph(test.get('description', 'N/A'), styles['Normal']))
-            story.append(Spacer(1, 0.1*inch))
-            
-            story.append(Paragraph("<b>Pre-conditions:</b>", styles['Normal']))
-            preconditions = test.get('preconditions', ['System is available'])
-            for pc in preconditions:
-                story.append(Paragraph(f"• {pc}", styles['Normal']))
-            story.append(Spacer(1, 0.1*inch))
-            
-            story.append(Paragraph("<b>Test Steps:</b>", styles['Normal']))
-            test_steps = test.get('test_steps', ['Execute test'])
-            for j, step in enumerate(test_steps, 1):
-                story.append(Paragraph(f"{j}. {step}", styles['Normal']))
-            story.append(Spacer(1, 0.1*inch))
-            
-            story.append(Paragraph("<b>Expected Result:</b>", styles['Normal']))
-            story.append(Paragraph(test.get('expected_result', 'Test passes'), styles['Normal']))
-            story.append(Spacer(1, 0.2*inch))
+        for i, test in enumerate(test_cases if full else test_cases[:3], 1):
+            yield from _test_case_details(i, test, styles)
         
         # Summary by type
-        story.append(Spacer(1, 0.2*inch))
-        story.append(Paragraph("Test Coverage Summary:", styles['Normal']))
-        test_types = {}
-        for test in test_cases:
-            ttype = test.get('test_type', 'Unknown')
-            test_types[ttype] = test_types.get(ttype, 0) + 1
-        
-        for ttype, count in test_types.items():
-            story.append(Paragraph(f"• {ttype}: {count} tests", styles['Normal']))
+        yield Spacer(1, 0.2*inch)
+        yield Paragraph("Test Coverage Summary:", styles['Normal'])
+        for ttype, count in summary.test_types.items():
+            yield Paragraph(f"• {escape(str(ttype))}: {count} tests", styles['Normal'])
         
     else:
-        story.append(Paragraph("No test cases generated.", styles['Normal']))
+        yield Paragraph("No test cases generated.", styles['Normal'])
+
+
+def create_pdf_report(result, output_path, summary=None, full=False):
+    """
+    Create comprehensive PDF report with all artifacts
     
-    # Build PDF
-    doc.build(story)
+    output_path may also be a binary file-like object (an io.BytesIO, an open
+    file, or socket.makefile('wb')). full=True exports every test case with
+    its details and the complete process maps. The story is generated while
+    the document is laid out, so table rows are never all built up front,
+    but ReportLab keeps every finished page (compressed for full reports)
+    until the file is saved. Memory therefore still grows with the page
+    count, only much more slowly than with a fully built story.
+    """
+    summary = summary or summarize_result(result)
+    doc = SimpleDocTemplate(output_path, pagesize=letter, pageCompression=1 if full else None)
+    doc.build(_FlowableStream(_pdf_flowables(result, summary, full)))
     return output_path
 
 
-def create_pptx_report(result, output_path):
+def _spooled_chunks(write, chunk_size=64 * 1024, spool_bytes=8 * 1024 * 1024):
+    """
+    Call write(file) and yield what it wrote in chunks
+    
+    The file is a temporary file that stays in memory up to spool_bytes and
+    rolls over to disk beyond that, so the finished output is not held in
+    memory; the chunks are only read back once write returns.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=spool_bytes) as spool:
+        write(spool)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def stream_pdf_report(result, full=True, chunk_size=64 * 1024):
+    """
+    Generate a PDF report and yield it in chunks (e.g. for an HTTP response)
+    
+    The whole PDF is written (see create_pdf_report for its memory use) and
+    spooled to a temporary file before the first chunk is yielded.
+    """
+    return _spooled_chunks(lambda f: create_pdf_report(result, f, full=full), chunk_size)
+
+
+def create_pptx_report(result, output_path, summary=None):
     """
     Create PowerPoint presentation with key findings
+    
+    output_path may also be a binary file-like object (e.g. io.BytesIO).
     """
+    summary = summary or summarize_result(result)
     prs = Presentation()
     prs.slide_width = Inches(10)
     prs.slide_height = Inches(7.5)
@@ -313,7 +557,7 @@ def create_pptx_report(result, output_path):
     subtitle = slide.placeholders[1]
     
     title.text = "Kevin AI"
-    subtitle.text = f"SOP Automation Analysis Report\nSession: {result['session_id']}\n{datetime.now().strftime('%B %d, %Y')}"
+    subtitle.text = f"SOP Automation Analysis Report\nSession: {result['session_id']}\n{summary.generated_at.strftime('%B %d, %Y')}"
     
     # Executive Summary Slide
     bullet_slide_layout = prs.slide_layouts[1]
@@ -326,9 +570,8 @@ def create_pptx_report(result, output_path):
     title_shape.text = "Executive Summary"
     
     tf = body_shape.text_frame
-    automation_opps = result.get('automation_opportunities', [])
-    test_cases = result.get('test_cases', [])
-    total_savings = sum(opp.get('estimated_savings_annual', 0) for opp in automation_opps)
+    automation_opps = summary.automation_opportunities
+    test_cases = summary.test_cases
     
     tf.text = f"Automation Opportunities: {len(automation_opps)}"
     
@@ -337,13 +580,32 @@ def create_pptx_report(result, output_path):
     p.level = 0
     
     p = tf.add_paragraph()
-    p.text = f"Estimated Annual Savings: ${total_savings:,.0f}"
+    p.text = f"Estimated Annual Savings: ${summary.total_savings:,.0f}"
     p.level = 0
     
     p = tf.add_paragraph()
     p.text = f"Processing Time: ~14 minutes"
     p.level = 0
     
+    # Process Map Slides (large maps continue over several slides)
+    title_only_layout = prs.slide_layouts[5]
+    box_width, box_height = PPTX_DIAGRAM_BOX
+    gap = 6  # points between strips of a wide map
+    for name, heading in (('current_state_map', "Current State Process Map"), ('future_state_map', "Future State Process Map")):
+        png = summary.diagram(name)
+        if not png:
+            continue
+        groups = _pack_tiles(diagram_tiles(png, box_width.pt, box_height.pt), box_height.pt, gap)
+        for i, group in enumerate(groups, 1):
+            slide = prs.slides.add_slide(title_only_layout)
+            slide.shapes.title.text = heading if len(groups) == 1 else f"{heading} ({i}/{len(groups)})"
+            group_height = sum(height for _, _, height in group) + gap * (len(group) - 1)
+            top = Inches(1.5) + (box_height - Pt(group_height)) // 2
+            for tile, width, height in group:
+                left = (prs.slide_width - Pt(width)) // 2
+                slide.shapes.add_picture(io.BytesIO(tile), left, top, Pt(width), Pt(height))
+                top += Pt(height + gap)
+    
     # Automation Opportunities Slide
     slide = prs.slides.add_slide(bullet_slide_layout)
     title_shape = slide.shapes.title
@@ -356,7 +618,7 @@ def create_pptx_report(result, output_path):
     
     for i, opp in enumerate(automation_opps[:5], 1):
         p = tf.add_paragraph()
-        p.text = f"{opp.get('description', 'N/A')} - ${opp.get('estimated_savings_annual', 0):,.0f}/year"
+        p.text = f"{opp.get('description', 'N/A')} - ${opportunity_savings(opp):,.0f}/year"
         p.level = 0
         
         p = tf.add_paragraph()
@@ -373,13 +635,7 @@ def create_pptx_report(result, output_path):
     tf = body_shape.text_frame
     tf.text = f"Total Test Cases: {len(test_cases)}"
     
-    # Count test types
-    test_types = {}
-    for test in test_cases:
-        test_type = test.get('test_type', 'Unknown')
-        test_types[test_type] = test_types.get(test_type, 0) + 1
-    
-    for test_type, count in test_types.items():
+    for test_type, count in summary.test_types.items():
         p = tf.add_paragraph()
         p.text = f"{test_type}: {count} tests"
         p.level = 1
@@ -413,3 +669,200 @@ def create_pptx_report(result, output_path):
     # Save presentation
     prs.save(output_path)
     return output_path
+
+
+# Preferred leading columns per sheet; any other fields follow in first-seen order
+XLSX_OPPORTUNITY_COLUMNS = ['opportunity_id', 'step_id', 'description', 'automation_type', 'priority', 'priority_tier',
+                            'estimated_savings_annual', 'time_savings_hours_per_week', 'complexity']
+XLSX_TEST_CASE_COLUMNS = ['test_id', 'test_name', 'test_type', 'priority', 'status', 'process_step', 'description',
+                          'preconditions', 'test_steps', 'expected_result', 'automated']
+XLSX_STEP_COLUMNS = ['step_id', 'step_number', 'section', 'name', 'description', 'text', 'actor', 'system', 'type']
+XLSX_MAX_CELL_CHARS = 32767  # Excel's limit per cell
+
+
+def _flatten(value, prefix=''):
+    """(dotted column, value) pairs of a record; nested dicts become dotted columns"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    else:
+        yield prefix, value
+
+
+def _xlsx_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, list) and all(not isinstance(item, (dict, list)) for item in value):
+        value = "; ".join(str(item) for item in value)
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value, default=str)
+    value = ILLEGAL_CHARACTERS_RE.sub('', str(value))
+    return value[:XLSX_MAX_CELL_CHARS]
+
+
+def _xlsx_cell(ws, value):
+    value = _xlsx_value(value)
+    if isinstance(value, str) and value.startswith('='):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.data_type = 's'  # text from the result is never a formula
+        return cell
+    return value
+
+
+def _write_records_sheet(wb, title, records, preferred_columns):
+    """One row per record; the records are walked twice (columns, then rows) and never copied"""
+    ws = wb.create_sheet(title)
+    ws.freeze_panes = 'A2'
+    
+    columns = {}
+    for record in records:
+        for column, _ in _flatten(record if isinstance(record, dict) else {'value': record}):
+            columns.setdefault(column, None)
+    columns = [c for c in preferred_columns if c in columns] + [c for c in columns if c not in preferred_columns]
+    
+    header_font = Font(bold=True)
+    header = []
+    for column in columns:
+        cell = WriteOnlyCell(ws, value=column)
+        cell.font = header_font
+        header.append(cell)
+    ws.append(header)
+    
+    for record in records:
+        values = dict(_flatten(record if isinstance(record, dict) else {'value': record}))
+        ws.append([_xlsx_cell(ws, values.get(column)) for column in columns])
+
+
+def _result_steps(result):
+    return result.get('current_state_steps') or result.get('sop_structure', {}).get('detailed_analysis', {}).get('steps', [])
+
+
+def create_xlsx_report(result, output_path, summary=None):
+    """
+    Create an Excel workbook with one sheet each for opportunities, test cases, KPIs and steps
+    
+    The workbook is written in openpyxl's write-only mode, which streams rows
+    to temporary files, so sheet rows are not held in memory (result itself
+    still is).
+    output_path may also be a binary file-like object.
+    """
+    wb = Workbook(write_only=True)
+    _write_records_sheet(wb, 'Opportunities', result.get('automation_opportunities', []), XLSX_OPPORTUNITY_COLUMNS)
+    _write_records_sheet(wb, 'Test Cases', result.get('test_cases', []), XLSX_TEST_CASE_COLUMNS)
+    
+    ws = wb.create_sheet('KPIs')
+    ws.freeze_panes = 'A2'
+    ws.append(['Metric', 'Value'])
+    for metric, value in _flatten(result.get('kpi_analysis') or {}):
+        ws.append([metric, _xlsx_cell(ws, value)])
+    
+    _write_records_sheet(wb, 'Steps', _result_steps(result), XLSX_STEP_COLUMNS)
+    
+    wb.save(output_path)
+    return output_path
+
+
+def stream_xlsx_report(result, chunk_size=64 * 1024):
+    """
+    Generate the Excel workbook and yield it in chunks (e.g. for an HTTP response)
+    """
+    return _spooled_chunks(lambda f: create_xlsx_report(result, f), chunk_size)
+
+
+REPORT_BUILDERS = {
+    'pdf': create_pdf_report,
+    'pptx': create_pptx_report,
+    'xlsx': create_xlsx_report,
+}
+
+
+class ReportCache:
+    """Finished report bytes per (session, result digest, prompt version, format), LRU bounded by total bytes"""
+
+    def __init__(self, limit_bytes):
+        self.limit_bytes = limit_bytes
+        self._lock = threading.Lock()
+        self._reports = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._reports.get(key)
+            if data is not None:
+                self._reports.move_to_end(key)
+        record_cache("report", data is not None)
+        return data
+
+    def put(self, key, data):
+        with self._lock:
+            if key in self._reports or len(data) > self.limit_bytes:
+                return
+            self._reports[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.limit_bytes:
+                _, evicted = self._reports.popitem(last=False)
+                self._bytes -= len(evicted)
+
+
+def result_digest(result):
+    """SHA-256 of a result's canonical JSON form"""
+    data = json.dumps(result, sort_keys=True, default=str, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+# Global report cache and build pool
+report_cache = ReportCache(REPORT_CACHE_MB * 1024 * 1024)
+_report_pool: Optional[ThreadPoolExecutor] = None
+_report_pool_lock = threading.Lock()
+
+
+def _get_report_pool():
+    global _report_pool
+    with _report_pool_lock:
+        if _report_pool is None:
+            _report_pool = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="kevin-report")
+    return _report_pool
+
+
+def _build_report(format, result, summary):
+    buffer = io.BytesIO()
+    REPORT_BUILDERS[format](result, buffer, summary)
+    return buffer.getvalue()
+
+
+def build_reports(result, formats: Sequence[str] = ('pdf', 'pptx'), prompt_version=PROMPT_VERSION):
+    """
+    Build several report formats for one session concurrently, in memory
+    
+    The aggregates are computed once and shared by every builder. Finished
+    reports are cached per session, result content and prompt version, so
+    repeated downloads return the same bytes without rebuilding.
+    
+    Returns:
+        {format: report bytes}
+    """
+    unknown = [f for f in formats if f not in REPORT_BUILDERS]
+    if unknown:
+        raise ValueError(f"Unknown report format(s): {', '.join(unknown)}")
+    
+    # The digest keeps results that share a session ID (or a re-run session)
+    # from being served each other's reports
+    digest = result_digest(result)
+    reports = {}
+    missing = []
+    for format in formats:
+        data = report_cache.get((result['session_id'], digest, prompt_version, format))
+        if data is None:
+            missing.append(format)
+        else:
+            reports[format] = data
+    if not missing:
+        return reports
+    
+    summary = summarize_result(result)
+    pool = _get_report_pool()
+    futures = {format: pool.submit(_build_report, format, result, summary) for format in missing}
+    for format, future in futures.items():
+        reports[format] = future.result()
+        report_cache.put((result['session_id'], digest, prompt_version, format), reports[format])
+    return {format: reports[format] for format in formats}
@@ -0,0 +1,190 @@
+"""
+Kevin AI - Admission Control
+Token-demand estimates, LLM quota admission and queue ETAs for pipeline jobs
+
+Version: 2.1
+Date: October 19, 2026
+
+Every pipeline draws from the same provider tokens-per-minute quota. A job
+is only started while the projected draw of the running jobs plus its own
+fits the quota, so admitted pipelines run at full speed instead of all
+slowing down together. Jobs that do not fit wait in the queue (interactive
+before batch) with an estimated start time.
+"""
+
+import math
+import statistics
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from kevin_jobs import JobStore
+
+# Rough characters per token of SOP prose
+CHARS_PER_TOKEN = 4
+
+# ============================================================================
+# ERRORS
+# ============================================================================
+
+class QueueFull(Exception):
+    """The admission queue is at its depth limit; retry_after is in seconds"""
+
+    def __init__(self, depth: int, retry_after: int):
+        super().__init__(f"{depth} jobs are waiting for LLM capacity; retry in {retry_after}s")
+        self.depth = depth
+        self.retry_after = retry_after
+
+# ============================================================================
+# ADMISSION CONTROLLER
+# ============================================================================
+
+class AdmissionController:
+    """Admit jobs while their projected tokens-per-minute fit the LLM quota
+
+    A job's demand is its estimated tokens (scaled by how far recent
+    estimates were off) spread over the time one unthrottled pipeline needs
+    to spend them, i.e. min(tokens, pipeline_tpm) per minute while it runs.
+    One job is always admitted when nothing is running, so a job larger
+    than the quota still runs on its own.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        tokens_per_minute: int,
+        base_tokens: int,
+        tokens_per_sop_token: float,
+        pipeline_tpm: int,
+        max_queue_depth: int = 0,
+        slots: Optional[int] = None,
+        calibration_jobs: int = 20,
+        calibration_seconds: float = 60.0
+    ):
+        self.store = store
+        self.tokens_per_minute = tokens_per_minute
+        self.base_tokens = base_tokens
+        self.tokens_per_sop_token = tokens_per_sop_token
+        self.pipeline_tpm = max(1, pipeline_tpm)
+        self.max_queue_depth = max_queue_depth
+        self.slots = slots  # local pool size; None when workers are separate processes
+        self.calibration_jobs = calibration_jobs
+        self.calibration_seconds = calibration_seconds
+        self.estimate_scale = 1.0  # median actual/estimated tokens of recent jobs
+        self._calibrated_at = 0.0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Demand
+    # ------------------------------------------------------------------
+
+    def estimate(self, sop_chars: int) -> int:
+        """Estimated LLM tokens (in + out) of one pipeline run over an SOP"""
+        return int(self.base_tokens + self.tokens_per_sop_token * sop_chars / CHARS_PER_TOKEN)
+
+    def _tokens(self, job: Dict) -> float:
+        return (job.get("est_tokens") or self.base_tokens) * self.estimate_scale
+
+    def rate(self, job: Dict) -> float:
+        """Tokens per minute a running job draws"""
+        return min(self._tokens(job), self.pipeline_tpm)
+
+    def expected_seconds(self, job: Dict) -> float:
+        return max(60.0, self._tokens(job) / self.pipeline_tpm * 60)
+
+    def projected_tpm(self, running: List[Dict]) -> float:
+        return sum(self.rate(job) for job in running)
+
+    def _fits(self, demand: float, job: Dict) -> bool:
+        return self.tokens_per_minute <= 0 or demand + self.rate(job) <= self.tokens_per_minute
+
+    def admits(self, running: List[Dict], job: Dict) -> bool:
+        """Claim check, called inside the claiming transaction"""
+        return not running or self._fits(self.projected_tpm(running), job)
+
+    # ------------------------------------------------------------------
+    # Calibration
+    # ------------------------------------------------------------------
+
+    def calibrate(self) -> None:
+        """Rescale estimates by the actual token use of recently finished jobs (rate-limited)"""
+        with self._lock:
+            if time.time() - self._calibrated_at < self.calibration_seconds:
+                return
+            self._calibrated_at = time.time()
+
+        ratios = [
+            job["result"]["llm_tokens"] / job["est_tokens"]
+            for job in self.store.recent_done(self.calibration_jobs)
+            if job.get("est_tokens") and (job.get("result") or {}).get("llm_tokens")
+        ]
+        if ratios:
+            self.estimate_scale = statistics.median(ratios)
+
+    # ------------------------------------------------------------------
+    # Queue
+    # ------------------------------------------------------------------
+
+    def schedule(self, running: List[Dict], queued: List[Dict], now: Optional[float] = None) -> Dict[str, float]:
+        """Expected start time (epoch seconds) of each queued job, in claim order
+
+        Replays admission: running jobs finish after their expected duration,
+        and each queued job starts once it fits both the quota and the slots.
+        """
+        now = now or time.time()
+        active = []  # (expected finish, rate)
+        for job in running:
+            started = datetime.fromisoformat(job["started_at"]).timestamp() if job.get("started_at") else now
+            active.append((max(now, started + self.expected_seconds(job)), self.rate(job)))
+        # Separate workers: assume the running jobs fill every slot when jobs are waiting
+        slots = self.slots or max(1, len(active))
+
+        starts = {}
+        clock = now
+        for job in queued:
+            while active and (len(active) >= slots or not self._fits(sum(rate for _, rate in active), job)):
+                active.sort()
+                finish, _ = active.pop(0)
+                clock = max(clock, finish)
+            starts[job["job_id"]] = clock
+            active.append((clock + self.expected_seconds(job), self.rate(job)))
+        return starts
+
+    def queue_positions(self) -> Dict[str, Dict]:
+        """Position and estimated start of every job waiting for admission"""
+        self.calibrate()
+        queued = self.store.queued_jobs()
+        starts = self.schedule(self.store.running_jobs(), queued)
+        return {
+            job["job_id"]: {
+                "queue_position": position + 1,
+                "estimated_start": datetime.fromtimestamp(starts[job["job_id"]]).isoformat(timespec="seconds")
+            }
+            for position, job in enumerate(queued)
+        }
+
+    def check_queue(self) -> None:
+        """Raise QueueFull when the queue is at its depth limit"""
+        if self.max_queue_depth <= 0:
+            return
+        queued = self.store.queued_jobs()
+        if len(queued) < self.max_queue_depth:
+            return
+        self.calibrate()
+        now = time.time()
+        # The queue shrinks as soon as its head is admitted
+        head_start = self.schedule(self.store.running_jobs(), queued[:1], now)[queued[0]["job_id"]]
+        raise QueueFull(len(queued), max(1, math.ceil(head_start - now)))
+
+    def summary(self) -> Dict:
+        self.calibrate()
+        running = self.store.running_jobs()
+        return {
+            "tokens_per_minute": self.tokens_per_minute or None,
+            "projected_tokens_per_minute": round(self.projected_tpm(running)),
+            "running": len(running),
+            "queued": len(self.store.queued_jobs()),
+            "max_queue_depth": self.max_queue_depth or None,
+            "estimate_scale": round(self.estimate_scale, 3)
+        }
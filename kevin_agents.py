@@ -8,8 +8,15 @@ Client: Cars Commerce
 """
 
 import os
+import re
 import json
-from typing import Dict, List, Optional, TypedDict, Annotated
+import threading
+import time
+import uuid
+import zipfile
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, TypedDict, Annotated, Union
 from datetime import datetime
 import operator
 
@@ -38,12 +45,27 @@ from prompts import (
     FUTURE_STATE_DESIGN_USER_PROMPT,
     TEST_CASE_GENERATOR_SYSTEM_PROMPT,
     TEST_CASE_GENERATOR_USER_PROMPT,
+    TEST_CASE_SHARD_USER_PROMPT,
     CODE_GENERATOR_SYSTEM_PROMPT,
     CODE_GENERATOR_USER_PROMPT,
     KPI_CALCULATOR_SYSTEM_PROMPT,
     KPI_CALCULATOR_USER_PROMPT
 )
 
+# Test case merging
+from kevin_dedup import dedupe_near_duplicates
+
+# Opportunity ranking
+from kevin_opportunities import as_number, opportunity_savings
+
+# Large state fields
+from kevin_blobstore import BlobRef, BlobStore
+from kevin_uploads import new_session_id
+
+# Tracing and metrics
+from kevin_metrics import record_cache
+from kevin_tracing import PIPELINE_SPAN, init_tracing, span, traced_node, record_llm_usage, session_timing_summary
+
 # Document processing
 import fitz  # PyMuPDF
 from PIL import Image
@@ -78,8 +100,37 @@ class Settings(BaseSettings):
     # Application
     TEMPERATURE: float = 0.1
     MAX_TOKENS: int = 4000
+    LLM_MAX_CONCURRENCY: int = 4  # parallel LLM calls within one node
+    WARMUP_LLM_PING: bool = True  # open LLM connections at startup (lists models; spends no tokens)
+    WARMUP_TIMEOUT_SECONDS: float = 10.0
+    
+    # Admission control (token demand of queued pipelines vs. the provider quota)
+    LLM_TOKENS_PER_MINUTE: int = 0  # quota shared by all pipelines; 0 disables admission control
+    PIPELINE_BASE_TOKENS: int = 30000  # tokens a pipeline spends regardless of SOP length
+    PIPELINE_TOKENS_PER_SOP_TOKEN: float = 4.0  # SOP text is read by several agents
+    PIPELINE_TOKENS_PER_MINUTE: int = 30000  # draw of one unthrottled pipeline
+    
+    # Automation opportunity batching
+    OPPORTUNITY_BATCHING: bool = True
+    OPPORTUNITY_BATCH_TOKENS: int = 6000  # prompt budget for the steps of one batch
+    OPPORTUNITY_OUTPUT_TOKENS_PER_STEP: int = 450  # caps batch size so responses fit MAX_TOKENS
+    
+    # Test case sharding
+    TEST_CASE_SHARDING: bool = True
+    TEST_CASES_PER_OPPORTUNITY: int = 6  # per opportunity (or step group) of a shard
+    TEST_SHARD_TOKENS: int = 3000  # prompt budget for the opportunities and steps of one shard
+    TEST_CASE_OUTPUT_TOKENS: int = 300  # caps opportunities per shard so responses fit MAX_TOKENS
+    TEST_DEDUP_THRESHOLD: float = 0.8  # estimated Jaccard similarity treated as duplicate
     VECTOR_DB_PATH: str = "./vectordb"
     OUTPUT_DIR: str = "./output"
+    BLOB_DIR: str = os.path.join(os.getenv("KEVIN_DATA_DIR", "./data"), "blobs")
+    BLOB_MEMORY_LIMIT_MB: int = 64
+    BLOB_MAX_AGE_HOURS: float = 24.0  # blobs of runs that did not clean up (e.g. killed workers)
+    
+    # Tracing
+    OTEL_EXPORTER: str = "none"  # none, console (stdout), otlp
+    OTEL_EXPORTER_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    OTEL_SERVICE_NAME: str = "kevin-ai"
     
     class Config:
         env_file = ".env"
@@ -92,35 +143,41 @@ settings = Settings()
 # ============================================================================
 
 class AgentState(TypedDict):
-    """Shared state across all agents"""
+    """Shared state across all agents
+    
+    Large fields hold BlobRef handles while the graph runs so LangGraph only
+    passes small references between nodes; MasterOrchestratorAgent.process
+    materializes them before returning.
+    """
     # Input
     sop_document_path: str
     process_diagram_path: Optional[str]
     domain: str  # insurance, logistics, finance, healthcare
     
     # Extracted Content
-    sop_text: str
+    sop_text: Union[str, BlobRef]
     sop_structure: Dict
     diagram_content: Optional[Dict]
     
     # Analysis Results
-    current_state_map: str  # Mermaid diagram
+    current_state_map: Union[str, BlobRef]  # Mermaid diagram
     current_state_steps: List[Dict]
     gap_analysis: Optional[Dict]
     
     # Automation Analysis
     automation_opportunities: List[Dict]
-    future_state_map: str
-    future_state_architecture: Dict
+    future_state_map: Union[str, BlobRef]
+    future_state_architecture: Union[Dict, BlobRef]
     
     # Outputs
     requirements: Dict
     test_cases: List[Dict]
-    generated_code: Dict
+    generated_code: Dict  # {"code": BlobRef, "timestamp": str} while running
     kpi_analysis: Dict
     
     # Metadata
     session_id: str
+    blob_scope: str  # unique per run, so runs sharing a session_id never share blobs
     timestamp: str
     agent_logs: Annotated[List[str], operator.add]
     errors: Annotated[List[str], operator.add]
@@ -129,10 +186,26 @@ class AgentState(TypedDict):
 # LLM FACTORY
 # ============================================================================
 
+_llm_cache: Dict[Tuple[str, Optional[str], float], object] = {}
+_llm_cache_lock = threading.Lock()
+
 def get_llm(model_name: Optional[str] = None, temperature: Optional[float] = None):
-    """Factory method to get configured LLM based on provider"""
+    """Factory method to get configured LLM based on provider
+    
+    Clients are shared process-wide per (provider, model, temperature); they
+    hold no per-run state, so every agent and session can reuse them.
+    """
     
     temp = temperature if temperature is not None else settings.TEMPERATURE
+    key = (settings.LLM_PROVIDER, model_name, temp)
+    
+    with _llm_cache_lock:
+        if key not in _llm_cache:
+            _llm_cache[key] = _build_llm(model_name, temp)
+        return _llm_cache[key]
+
+def _build_llm(model_name: Optional[str], temp: float):
+    """Construct a new chat model client for the configured provider"""
     
     if settings.LLM_PROVIDER == "azure":
         return AzureChatOpenAI(
@@ -141,14 +214,16 @@ def get_llm(model_name: Optional[str] = None, temperature: Optional[float] = Non
             deployment_name=model_name or settings.AZURE_OPENAI_DEPLOYMENT_NAME,
             api_version=settings.AZURE_OPENAI_API_VERSION,
             temperature=temp,
-            max_tokens=settings.MAX_TOKENS
+            max_tokens=settings.MAX_TOKENS,
+            stream_usage=True  # token usage on streamed responses
         )
     elif settings.LLM_PROVIDER == "openai":
         return ChatOpenAI(
             api_key=settings.OPENAI_API_KEY,
             model=model_name or settings.OPENAI_MODEL,
             temperature=temp,
-            max_tokens=settings.MAX_TOKENS
+            max_tokens=settings.MAX_TOKENS,
+            stream_usage=True
         )
     elif settings.LLM_PROVIDER == "anthropic":
         return ChatAnthropic(
@@ -174,6 +249,178 @@ def get_embeddings():
             api_key=settings.OPENAI_API_KEY
         )
 
+# ============================================================================
+# BLOB STORE & SERIALIZATION CACHE
+# ============================================================================
+
+_blob_store: Optional[BlobStore] = None
+_blob_store_lock = threading.Lock()
+
+def get_blob_store() -> BlobStore:
+    """Process-wide blob store, created on first use (sweeps blobs left by crashed runs)"""
+    global _blob_store
+    
+    if _blob_store is None:
+        with _blob_store_lock:
+            if _blob_store is None:
+                store = BlobStore(settings.BLOB_DIR, settings.BLOB_MEMORY_LIMIT_MB * 1024 * 1024)
+                store.sweep(settings.BLOB_MAX_AGE_HOURS * 3600)
+                _blob_store = store
+    return _blob_store
+
+_serialized_cache: Dict[Tuple[str, str], Tuple[object, str]] = {}
+_serialized_lock = threading.Lock()
+
+def serialized(state: AgentState, field: str, value) -> str:
+    """Prompt-ready json.dumps(value, indent=2), computed once per run and field
+    
+    Entries keep the serialized object itself and are reused only while the
+    state still carries that same object, so replacing a field invalidates it.
+    """
+    if isinstance(value, BlobRef):
+        return get_blob_store().get_text(value)
+    
+    key = (state["blob_scope"], field)
+    with _serialized_lock:
+        cached = _serialized_cache.get(key)
+    hit = cached is not None and cached[0] is value
+    record_cache("serialization", hit)
+    if hit:
+        return cached[1]
+    
+    text = json.dumps(value, indent=2, default=str)
+    with _serialized_lock:
+        _serialized_cache[key] = (value, text)
+    return text
+
+def clear_serialized(blob_scope: str) -> None:
+    """Drop the serialization cache entries of a finished run"""
+    with _serialized_lock:
+        for key in [k for k in _serialized_cache if k[0] == blob_scope]:
+            del _serialized_cache[key]
+
+# ============================================================================
+# LLM CALL HELPERS
+# ============================================================================
+
+def llm_model_name(llm) -> str:
+    """Best-effort model/deployment name of a LangChain chat model"""
+    return (
+        getattr(llm, "deployment_name", None)
+        or getattr(llm, "model_name", None)
+        or getattr(llm, "model", None)
+        or "unknown"
+    )
+
+LLM_PROGRESS_EVERY_CHUNKS = 25
+
+def _progress_writer() -> Optional[Callable[[Dict], None]]:
+    """LangGraph custom-stream writer when the current run asked for LLM progress"""
+    try:
+        from langgraph.config import get_config, get_stream_writer
+        if get_config().get("configurable", {}).get("stream_llm_progress"):
+            return get_stream_writer()
+    except Exception:
+        pass  # not inside a graph run
+    return None
+
+def invoke_llm(llm, prompt: ChatPromptTemplate, inputs: Dict, operation: str):
+    """Invoke prompt | llm inside an llm.invoke span
+    
+    When the graph is streamed with progress enabled, the response is streamed
+    and llm_progress events are written to LangGraph's custom stream.
+    """
+    with span("llm.invoke", **{
+        "llm.operation": operation,
+        "llm.provider": settings.LLM_PROVIDER,
+        "llm.model": llm_model_name(llm),
+        "llm.prompt_bytes": sum(len(str(v).encode("utf-8")) for v in inputs.values())
+    }) as current:
+        writer = _progress_writer()
+        if writer is None:
+            response = (prompt | llm).invoke(inputs)
+        else:
+            response = None
+            chunks = 0
+            for chunk in (prompt | llm).stream(inputs):
+                response = chunk if response is None else response + chunk
+                chunks += 1
+                if chunks % LLM_PROGRESS_EVERY_CHUNKS == 0:
+                    writer({"event": "llm_progress", "operation": operation, "chunks": chunks, "done": False})
+            # A chunk can carry several tokens; the real count is only known from the final usage
+            usage = getattr(response, "usage_metadata", None) or {}
+            writer({"event": "llm_progress", "operation": operation, "chunks": chunks, "tokens_out": usage.get("output_tokens"), "done": True})
+        record_llm_usage(current, response)
+    return response
+
+_token_encoder = None
+_token_encoder_loaded = False
+
+def estimate_tokens(text: str) -> int:
+    """Token count via tiktoken when its encoding is available, else ~4 chars/token"""
+    global _token_encoder, _token_encoder_loaded
+    
+    if not _token_encoder_loaded:
+        try:
+            import tiktoken
+            _token_encoder = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _token_encoder = None  # encoding download blocked or tiktoken missing
+        _token_encoder_loaded = True
+    
+    if _token_encoder is None:
+        return len(text) // 4 + 1
+    return len(_token_encoder.encode(text))
+
+def batch_by_token_budget(items: List, token_budget: int, max_items: Optional[int] = None) -> List[List]:
+    """Greedily group items (in order) so each group's JSON fits the token budget"""
+    batches: List[List] = []
+    current: List = []
+    current_tokens = 0
+    
+    for item in items:
+        tokens = estimate_tokens(json.dumps(item, indent=2, default=str))
+        full = max_items is not None and len(current) >= max_items
+        if current and (full or current_tokens + tokens > token_budget):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    
+    if current:
+        batches.append(current)
+    return batches
+
+def run_concurrently(fn: Callable, items: List, max_workers: Optional[int] = None) -> List:
+    """Map fn over items on a thread pool, keeping input order and the trace context"""
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    
+    workers = min(max_workers or settings.LLM_MAX_CONCURRENCY, len(items))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Each task runs in its own copy of the caller's context so its spans
+        # nest under the current node span
+        futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+        return [future.result() for future in futures]
+
+def parse_json_response(content: str, operation: str):
+    """Extract and parse the JSON payload of an LLM response (raises ValueError on failure)"""
+    with span("json.parse", **{"json.operation": operation, "json.bytes": len(content.encode("utf-8"))}) as current:
+        if "```json" in content:
+            json_str = content.split("```json")[1].split("```")[0]
+        elif "```" in content:
+            json_str = content.split("```")[1].split("```")[0]
+        else:
+            json_str = content
+        
+        try:
+            data = json.loads(json_str.strip())
+        except ValueError:
+            current.set_attribute("json.success", False)
+            raise
+        current.set_attribute("json.success", True)
+        return data
+
 # ============================================================================
 # DOCUMENT PROCESSING UTILITIES
 # ============================================================================
@@ -184,34 +431,74 @@ class DocumentProcessor:
     @staticmethod
     def extract_pdf(file_path: str) -> tuple[str, bool]:
         """Extract text from PDF, returns (text, is_ocr_needed)"""
-        doc = fitz.open(file_path)
-        text = ""
-        is_ocr = False
-        
-        for page in doc:
-            page_text = page.get_text()
-            if len(page_text.strip()) < 50:  # Likely scanned
-                is_ocr = True
-                # Convert page to image and OCR
-                pix = page.get_pixmap()
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                page_text = pytesseract.image_to_string(img)
-            text += page_text + "\n"
+        with span("extract.pdf", **{"extract.bytes": os.path.getsize(file_path)}) as current:
+            doc = fitz.open(file_path)
+            text = ""
+            is_ocr = False
+            ocr_pages = 0
+            
+            for page in doc:
+                page_text = page.get_text()
+                if len(page_text.strip()) < 50:  # Likely scanned
+                    is_ocr = True
+                    ocr_pages += 1
+                    # Convert page to image and OCR
+                    with span("extract.ocr_page", **{"extract.page": page.number}):
+                        pix = page.get_pixmap()
+                        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+                        page_text = pytesseract.image_to_string(img)
+                text += page_text + "\n"
+            
+            current.set_attribute("extract.pages", doc.page_count)
+            current.set_attribute("extract.ocr_pages", ocr_pages)
+            current.set_attribute("extract.chars", len(text))
         
         return text, is_ocr
     
+    @staticmethod
+    def count_pages(file_path: str) -> Optional[int]:
+        """Page count without extracting text (None if the format does not record it)"""
+        if file_path.lower().endswith(".pdf"):
+            with fitz.open(file_path) as doc:
+                return doc.page_count
+        if file_path.lower().endswith(".docx"):
+            # Word stores the page count of its last save in docProps/app.xml
+            with zipfile.ZipFile(file_path) as archive:
+                if "docProps/app.xml" not in archive.namelist():
+                    return None
+                match = re.search(rb"<Pages>(\d+)</Pages>", archive.read("docProps/app.xml"))
+            return int(match.group(1)) if match else None
+        return None
+
+    @staticmethod
+    def text_length(file_path: str, scanned_page_chars: int = 1800) -> int:
+        """Characters of embedded text, without OCR; pages without a text layer count as scanned_page_chars"""
+        if file_path.lower().endswith(".pdf"):
+            with fitz.open(file_path) as doc:
+                total = 0
+                for page in doc:
+                    chars = len(page.get_text().strip())
+                    total += chars if chars >= 50 else scanned_page_chars
+                return total
+        if file_path.lower().endswith(".docx"):
+            return sum(len(para.text) for para in DocxDocument(file_path).paragraphs)
+        return scanned_page_chars
+
     @staticmethod
     def extract_docx(file_path: str) -> str:
         """Extract text from DOCX"""
-        doc = DocxDocument(file_path)
-        text = "\n".join([para.text for para in doc.paragraphs])
+        with span("extract.docx", **{"extract.bytes": os.path.getsize(file_path)}) as current:
+            doc = DocxDocument(file_path)
+            text = "\n".join([para.text for para in doc.paragraphs])
+            current.set_attribute("extract.chars", len(text))
         return text
     
     @staticmethod
     def extract_image(file_path: str) -> str:
         """Extract text from image using OCR"""
-        img = Image.open(file_path)
-        text = pytesseract.image_to_string(img)
+        with span("extract.image", **{"extract.bytes": os.path.getsize(file_path), "extract.pages": 1, "extract.ocr_pages": 1}):
+            img = Image.open(file_path)
+            text = pytesseract.image_to_string(img)
         return text
     
     @staticmethod
@@ -275,7 +562,7 @@ class SOPAnalysisAgent:
         else:
             raise ValueError(f"Unsupported file format: {file_path}")
         
-        state["sop_text"] = text
+        state["sop_text"] = get_blob_store().put_text(text, scope=state["blob_scope"])
         state["sop_structure"] = self.processor.parse_structure(text)
         
         # Use LLM to extract detailed process information with enhanced prompts
@@ -284,24 +571,14 @@ class SOPAnalysisAgent:
             ("user", SOP_ANALYSIS_USER_PROMPT)
         ])
         
-        chain = prompt | self.llm
-        response = chain.invoke({
+        response = invoke_llm(self.llm, prompt, {
             "sop_text": text[:12000],  # Increased context window
-            "domain": "logistics"  # TODO: Get from state
-        })
+            "domain": state.get("domain", "logistics")
+        }, operation="sop_analysis")
         
         # Parse LLM response
         try:
-            # Extract JSON from response
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0]
-            else:
-                json_str = content
-            
-            detailed_analysis = json.loads(json_str)
+            detailed_analysis = parse_json_response(response.content, "sop_analysis")
             state["sop_structure"]["detailed_analysis"] = detailed_analysis
         except:
             state["errors"].append("Failed to parse LLM response for SOP analysis")
@@ -331,33 +608,24 @@ class ProcessMappingAgent:
             ("user", PROCESS_MAPPING_USER_PROMPT)
         ])
         
-        chain = prompt | self.llm
-        response = chain.invoke({
-            "steps": json.dumps(detailed_analysis.get("steps", []), indent=2),
+        response = invoke_llm(self.llm, prompt, {
+            "steps": serialized(state, "steps", detailed_analysis.get("steps", [])),
             "sop_structure": json.dumps(detailed_analysis, indent=2)
-        })
+        }, operation="process_mapping")
         
         # Extract visual diagram JSON
         try:
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0]
-            else:
-                json_str = content
-            
-            diagram_data = json.loads(json_str.strip())
+            diagram_data = parse_json_response(response.content, "process_mapping")
             
             # Store both visual diagram and structured data
-            state["current_state_map"] = diagram_data.get("visual_diagram", "")
+            state["current_state_map"] = get_blob_store().put_text(diagram_data.get("visual_diagram", ""), scope=state["blob_scope"])
             state["sop_structure"]["diagram_data"] = diagram_data
             
         except Exception as e:
             print(f"Error parsing diagram JSON: {e}")
             state["errors"].append(f"Process mapping parse error: {str(e)}")
             # Fallback to simple text representation
-            state["current_state_map"] = response.content
+            state["current_state_map"] = get_blob_store().put_text(response.content, scope=state["blob_scope"])
         
         state["agent_logs"].append(f"Process Mapping Agent completed at {datetime.now()}")
         return state
@@ -405,11 +673,10 @@ Current State Map: {current_state_map}
 Identify all gaps and provide recommendations.""")
         ])
         
-        chain = prompt | self.llm
-        response = chain.invoke({
-            "sop_text": state["sop_text"][:5000],
-            "current_state_map": state["current_state_map"]
-        })
+        response = invoke_llm(self.llm, prompt, {
+            "sop_text": get_blob_store().resolve(state["sop_text"])[:5000],
+            "current_state_map": get_blob_store().resolve(state["current_state_map"])
+        }, operation="gap_identification")
         
         state["gap_analysis"] = {
             "analysis": response.content,
@@ -422,6 +689,53 @@ Identify all gaps and provide recommendations.""")
 # AGENT 4: AUTOMATION OPPORTUNITY AGENT
 # ============================================================================
 
+PRIORITY_TIER_ORDER = {"P0": 0, "P1": 1, "P2": 2, "P3": 3}
+
+def _opportunity_rank_key(opp: Dict) -> Tuple:
+    """Deterministic ranking: tier, score, savings, then stable identifiers"""
+    tier = str(opp.get("priority_tier") or opp.get("priority") or "").upper()
+    return (
+        PRIORITY_TIER_ORDER.get(tier, len(PRIORITY_TIER_ORDER)),
+        -as_number(opp.get("priority_score", opp.get("roi_score"))),
+        -opportunity_savings(opp),
+        str(opp.get("step_id", "")),
+        str(opp.get("step_description", opp.get("description", "")))
+    )
+
+def _opportunity_key(opp: Dict, fallback: Tuple) -> Tuple:
+    """Duplicate key: the step plus the kind of automation (or its description)"""
+    step = str(opp.get("step_id") or "").strip()
+    if not step:
+        return fallback
+    kind = str(opp.get("automation_type") or "").strip().lower()
+    if not kind:
+        kind = " ".join(str(opp.get("step_description", opp.get("description", ""))).lower().split())
+    return (step, kind)
+
+def merge_opportunities(batches: List[List[Dict]]) -> List[Dict]:
+    """Merge per-batch opportunities: one per (step, automation type), ranked, renumbered AUTO-001..
+    
+    Applied to single-call results too, so an SOP gets the same normalization
+    whether or not its steps were batched.
+    """
+    best: Dict[Tuple, Dict] = {}
+    for batch_no, batch in enumerate(batches):
+        for i, opp in enumerate(batch):
+            key = _opportunity_key(opp, ("", batch_no, i))
+            if key not in best or _opportunity_rank_key(opp) < _opportunity_rank_key(best[key]):
+                best[key] = opp
+    
+    ranked = sorted(best.values(), key=_opportunity_rank_key)
+    for i, opp in enumerate(ranked, 1):
+        opp["opportunity_id"] = f"AUTO-{i:03d}"
+    return ranked
+
+def _opportunity_list(parsed) -> List[Dict]:
+    """Normalize the agent's JSON ({"automation_opportunities": [...]} or a bare list)"""
+    if isinstance(parsed, dict):
+        parsed = parsed.get("automation_opportunities", parsed.get("opportunities", []))
+    return [opp for opp in parsed if isinstance(opp, dict)] if isinstance(parsed, list) else []
+
 class AutomationOpportunityAgent:
     """Identify automation opportunities"""
     
@@ -429,7 +743,11 @@ class AutomationOpportunityAgent:
         self.llm = get_llm(temperature=0.2)
     
     def identify_opportunities(self, state: AgentState) -> AgentState:
-        """Identify and prioritize automation opportunities"""
+        """Identify and prioritize automation opportunities
+        
+        Steps are scored in token-budgeted batches (concurrently when there is
+        more than one) so long processes do not overflow a single response.
+        """
         print("🤖 Automation Opportunity Agent: Identifying automation potential...")
         
         prompt = ChatPromptTemplate.from_messages([
@@ -437,27 +755,39 @@ class AutomationOpportunityAgent:
             ("user", AUTOMATION_OPPORTUNITY_USER_PROMPT)
         ])
         
-        chain = prompt | self.llm
-        response = chain.invoke({
-            "steps": json.dumps(state["sop_structure"].get("detailed_analysis", {}).get("steps", []), indent=2),
-            "domain": state["domain"]
-        })
+        steps = state["sop_structure"].get("detailed_analysis", {}).get("steps", [])
+        if settings.OPPORTUNITY_BATCHING:
+            max_steps = max(1, settings.MAX_TOKENS // settings.OPPORTUNITY_OUTPUT_TOKENS_PER_STEP)
+            batches = batch_by_token_budget(steps, settings.OPPORTUNITY_BATCH_TOKENS, max_steps)
+        else:
+            batches = [steps]
+        
+        if len(batches) <= 1:
+            # Single call: reuse the cached serialization of the full step list
+            payloads = [serialized(state, "steps", steps)]
+        else:
+            print(f"   Scoring {len(steps)} steps in {len(batches)} batches...")
+            payloads = [json.dumps(batch, indent=2, default=str) for batch in batches]
+        
+        def score(payload: str) -> Tuple[List[Dict], Optional[str]]:
+            response = invoke_llm(self.llm, prompt, {
+                "steps": payload,
+                "domain": state["domain"]
+            }, operation="automation_opportunity")
+            try:
+                return _opportunity_list(parse_json_response(response.content, "automation_opportunity")), None
+            except Exception as e:
+                return [], str(e)
+        
+        results = run_concurrently(score, payloads)
         
         # Parse response
-        try:
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0]
-            else:
-                json_str = content
-            
-            opportunities = json.loads(json_str)
-            state["automation_opportunities"] = opportunities
-        except:
-            state["errors"].append("Failed to parse automation opportunities")
-            state["automation_opportunities"] = []
+        for batch_no, (_, error) in enumerate(results, 1):
+            if error is not None:
+                suffix = f" (batch {batch_no}/{len(results)})" if len(results) > 1 else ""
+                state["errors"].append(f"Failed to parse automation opportunities{suffix}")
+        
+        state["automation_opportunities"] = merge_opportunities([opps for opps, _ in results])
         
         state["agent_logs"].append(f"Automation Opportunity Agent completed at {datetime.now()}")
         return state
@@ -481,34 +811,25 @@ class FutureStateDesignAgent:
             ("user", FUTURE_STATE_DESIGN_USER_PROMPT)
         ])
         
-        chain = prompt | self.llm
-        response = chain.invoke({
-            "current_steps": json.dumps(state.get("current_state_steps", []), indent=2),
-            "automation_opportunities": json.dumps(state["automation_opportunities"], indent=2)
-        })
+        response = invoke_llm(self.llm, prompt, {
+            "current_steps": serialized(state, "current_state_steps", state.get("current_state_steps", [])),
+            "automation_opportunities": serialized(state, "automation_opportunities", state["automation_opportunities"])
+        }, operation="future_state_design")
         
         # Parse JSON response
         try:
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0]
-            else:
-                json_str = content
-            
-            future_data = json.loads(json_str.strip())
+            future_data = parse_json_response(response.content, "future_state_design")
             
             # Store future state map and architecture
-            state["future_state_map"] = future_data.get("future_state_map", "")
-            state["future_state_architecture"] = future_data.get("future_state_architecture", {})
+            state["future_state_map"] = get_blob_store().put_text(future_data.get("future_state_map", ""), scope=state["blob_scope"])
+            state["future_state_architecture"] = get_blob_store().put_json(future_data.get("future_state_architecture", {}), scope=state["blob_scope"])
             
         except Exception as e:
             print(f"Error parsing future state JSON: {e}")
             state["errors"].append(f"Future state parse error: {str(e)}")
             # Fallback
-            state["future_state_map"] = response.content
-            state["future_state_architecture"] = {"description": response.content}
+            state["future_state_map"] = get_blob_store().put_text(response.content, scope=state["blob_scope"])
+            state["future_state_architecture"] = get_blob_store().put_json({"description": response.content}, scope=state["blob_scope"])
         
         state["agent_logs"].append(f"Future State Design Agent completed at {datetime.now()}")
         return state
@@ -527,29 +848,24 @@ class TestCaseGeneratorAgent:
         """Generate comprehensive test cases (minimum 30)"""
         print("🧪 Test Case Generator Agent: Creating comprehensive test scenarios...")
         
+        shards = self._plan_shards(state) if settings.TEST_CASE_SHARDING else []
+        if len(shards) > 1:
+            return self._generate_sharded(state, shards)
+        
         prompt = ChatPromptTemplate.from_messages([
             ("system", TEST_CASE_GENERATOR_SYSTEM_PROMPT),
             ("user", TEST_CASE_GENERATOR_USER_PROMPT)
         ])
         
-        chain = prompt | self.llm
-        response = chain.invoke({
-            "steps": json.dumps(state.get("current_state_steps", []), indent=2),
-            "automation_opportunities": json.dumps(state["automation_opportunities"], indent=2),
+        response = invoke_llm(self.llm, prompt, {
+            "steps": serialized(state, "current_state_steps", state.get("current_state_steps", [])),
+            "automation_opportunities": serialized(state, "automation_opportunities", state["automation_opportunities"]),
             "domain": state.get("domain", "logistics")
-        })
+        }, operation="test_case_generation")
         
         # Parse response
         try:
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0]
-            else:
-                json_str = content
-            
-            test_data = json.loads(json_str.strip())
+            test_data = parse_json_response(response.content, "test_case_generation")
             state["test_cases"] = test_data.get("test_cases", [])
             
         except Exception as e:
@@ -559,6 +875,117 @@ class TestCaseGeneratorAgent:
         
         state["agent_logs"].append(f"Test Case Generator Agent completed at {datetime.now()}")
         return state
+    
+    @staticmethod
+    def _plan_shards(state: AgentState) -> List[Dict]:
+        """Token-budgeted shards of automation opportunities (with their steps), else of steps"""
+        steps = state.get("current_state_steps") or state["sop_structure"].get("detailed_analysis", {}).get("steps", [])
+        opportunities = state["automation_opportunities"]
+        
+        if opportunities:
+            units = [
+                {
+                    "opportunity": opp,
+                    "steps": [s for s in steps if s.get("step_id") and s.get("step_id") == opp.get("step_id")]
+                }
+                for opp in opportunities
+            ]
+            max_opportunities = max(1, settings.MAX_TOKENS // (settings.TEST_CASES_PER_OPPORTUNITY * settings.TEST_CASE_OUTPUT_TOKENS))
+            shards = []
+            for group in batch_by_token_budget(units, settings.TEST_SHARD_TOKENS, max_opportunities):
+                related: Dict[str, Dict] = {}
+                for unit in group:
+                    for step in unit["steps"]:
+                        related.setdefault(str(step["step_id"]), step)
+                shards.append({
+                    "steps": list(related.values()),
+                    "automation_opportunities": [unit["opportunity"] for unit in group],
+                    "focus": "\n".join(
+                        f"- {opp.get('opportunity_id', opp.get('step_id', 'Opportunity'))} "
+                        f"({opp.get('automation_type', 'Automation')}): "
+                        f"{opp.get('step_description', opp.get('description', ''))}"
+                        for opp in (unit["opportunity"] for unit in group)
+                    ),
+                    "cases": settings.TEST_CASES_PER_OPPORTUNITY * len(group)
+                })
+            return shards
+        
+        groups = batch_by_token_budget(steps, settings.TEST_SHARD_TOKENS)
+        return [
+            {
+                "steps": group,
+                "automation_opportunities": [],
+                "focus": f"- Process steps {group[0].get('step_id', '')} to {group[-1].get('step_id', '')}",
+                "cases": settings.TEST_CASES_PER_OPPORTUNITY
+            }
+            for group in groups
+        ]
+    
+    def _generate_sharded(self, state: AgentState, shards: List[Dict]) -> AgentState:
+        """Generate shards concurrently, drop near-duplicates and renumber TC-001.."""
+        print(f"   Generating test cases in {len(shards)} shards...")
+        
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", TEST_CASE_GENERATOR_SYSTEM_PROMPT),
+            ("user", TEST_CASE_SHARD_USER_PROMPT)
+        ])
+        
+        def generate(numbered_shard: Tuple[int, Dict]) -> Tuple[List[Dict], Optional[str]]:
+            shard_number, shard = numbered_shard
+            response = invoke_llm(self.llm, prompt, {
+                "steps": json.dumps(shard["steps"], indent=2, default=str),
+                "automation_opportunities": json.dumps(shard["automation_opportunities"], indent=2, default=str),
+                "domain": state.get("domain", "logistics"),
+                "shard_number": shard_number,
+                "shard_count": len(shards),
+                "shard_focus": shard["focus"],
+                "cases_per_shard": shard["cases"]
+            }, operation="test_case_generation")
+            try:
+                test_data = parse_json_response(response.content, "test_case_generation")
+                cases = test_data.get("test_cases", []) if isinstance(test_data, dict) else test_data
+                return [c for c in cases if isinstance(c, dict)], None
+            except Exception as e:
+                return [], str(e)
+        
+        results = run_concurrently(generate, list(enumerate(shards, 1)))
+        
+        candidates = []
+        for shard_number, (cases, error) in enumerate(results, 1):
+            if error is not None:
+                state["errors"].append(f"Test case parse error (shard {shard_number}/{len(shards)}): {error}")
+            candidates.extend((shard_number, case) for case in cases)
+        
+        with span("test_cases.dedupe", **{"dedupe.candidates": len(candidates)}) as current:
+            kept, dropped = dedupe_near_duplicates(
+                candidates,
+                lambda item: " ".join([str(item[1].get("test_name", ""))] + [str(s) for s in item[1].get("test_steps", [])]),
+                threshold=settings.TEST_DEDUP_THRESHOLD
+            )
+            current.set_attribute("dedupe.dropped", dropped)
+        
+        state["test_cases"] = self._renumber(kept)
+        print(f"   Merged {len(kept)} test cases ({dropped} near-duplicates removed)")
+        
+        state["agent_logs"].append(f"Test Case Generator Agent completed at {datetime.now()}")
+        return state
+    
+    @staticmethod
+    def _renumber(sharded_cases: List[Tuple[int, Dict]]) -> List[Dict]:
+        """Assign global TC-### IDs and remap dependencies within each shard"""
+        id_map: Dict[Tuple[int, str], str] = {}
+        for i, (shard_number, case) in enumerate(sharded_cases, 1):
+            new_id = f"TC-{i:03d}"
+            if case.get("test_id"):
+                id_map[(shard_number, str(case["test_id"]))] = new_id
+            case["test_id"] = new_id
+        
+        for shard_number, case in sharded_cases:
+            deps = case.get("dependencies")
+            if isinstance(deps, list):
+                # Dependencies on near-duplicates that were dropped keep their old ID
+                case["dependencies"] = [id_map.get((shard_number, str(d)), d) for d in deps]
+        return [case for _, case in sharded_cases]
 
 # ============================================================================
 # AGENT 7: CODE GENERATOR AGENT
@@ -579,14 +1006,13 @@ class CodeGeneratorAgent:
             ("user", CODE_GENERATOR_USER_PROMPT)
         ])
         
-        chain = prompt | self.llm
-        response = chain.invoke({
-            "future_state": json.dumps(state.get("future_state_architecture", {}), indent=2),
-            "automation_opportunities": json.dumps(state["automation_opportunities"], indent=2)
-        })
+        response = invoke_llm(self.llm, prompt, {
+            "future_state": get_blob_store().resolve_text(state.get("future_state_architecture"), default={}),
+            "automation_opportunities": serialized(state, "automation_opportunities", state["automation_opportunities"])
+        }, operation="code_generation")
         
         state["generated_code"] = {
-            "code": response.content,
+            "code": get_blob_store().put_text(response.content, scope=state["blob_scope"]),
             "timestamp": datetime.now().isoformat()
         }
         
@@ -615,25 +1041,16 @@ class KPICalculatorAgent:
             ("user", KPI_CALCULATOR_USER_PROMPT)
         ])
         
-        chain = prompt | self.llm
-        response = chain.invoke({
-            "current_state": json.dumps(state.get("current_state_steps", []), indent=2),
-            "future_state": json.dumps(state.get("future_state_architecture", {}), indent=2),
-            "automation_opportunities": json.dumps(state["automation_opportunities"], indent=2),
+        response = invoke_llm(self.llm, prompt, {
+            "current_state": serialized(state, "current_state_steps", state.get("current_state_steps", [])),
+            "future_state": get_blob_store().resolve_text(state.get("future_state_architecture"), default={}),
+            "automation_opportunities": serialized(state, "automation_opportunities", state["automation_opportunities"]),
             "domain": state.get("domain", "logistics")
-        })
+        }, operation="kpi_calculation")
         
         # Parse JSON response
         try:
-            content = response.content
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0]
-            else:
-                json_str = content
-            
-            kpi_data = json.loads(json_str.strip())
+            kpi_data = parse_json_response(response.content, "kpi_calculation")
             state["kpi_analysis"] = kpi_data.get("kpi_analysis", {})
             
         except Exception as e:
@@ -660,10 +1077,38 @@ KPISLACalculatorAgent = KPICalculatorAgent
 # AGENT 9: MASTER ORCHESTRATOR AGENT
 # ============================================================================
 
+# Graph nodes in execution order (used by UIs for progress)
+PIPELINE_NODES = [
+    "sop_analysis",
+    "process_mapping",
+    "gap_identification",
+    "automation_opportunity",
+    "future_state_design",
+    "test_case_generation",
+    "code_generation",
+    "kpi_calculation"
+]
+
+# State fields reported as partial artifacts while streaming
+ARTIFACT_FIELDS = [
+    "current_state_map",
+    "automation_opportunities",
+    "future_state_map",
+    "test_cases",
+    "generated_code",
+    "kpi_analysis"
+]
+
 class MasterOrchestratorAgent:
-    """Orchestrate all agents and maintain state"""
+    """Orchestrate all agents and maintain state
+    
+    The compiled graph and its agents are stateless between runs: everything
+    a run needs travels in AgentState or the per-invoke RunnableConfig, so one
+    instance can serve concurrent sessions (see get_shared_orchestrator).
+    """
     
     def __init__(self):
+        init_tracing(settings.OTEL_EXPORTER, settings.OTEL_EXPORTER_OTLP_ENDPOINT, settings.OTEL_SERVICE_NAME)
         self.llm = get_llm(temperature=0.0)
         self.graph = self._build_graph()
     
@@ -684,14 +1129,14 @@ class MasterOrchestratorAgent:
         workflow = StateGraph(AgentState)
         
         # Add nodes
-        workflow.add_node("sop_analysis", sop_agent.analyze)
-        workflow.add_node("process_mapping", mapping_agent.map_process)
-        workflow.add_node("gap_identification", gap_agent.identify_gaps)
-        workflow.add_node("automation_opportunity", automation_agent.identify_opportunities)
-        workflow.add_node("future_state_design", future_agent.design_future_state)
-        workflow.add_node("test_case_generation", test_agent.generate_test_cases)
-        workflow.add_node("code_generation", code_agent.generate_code)
-        workflow.add_node("kpi_calculation", kpi_agent.calculate_kpis)
+        workflow.add_node("sop_analysis", traced_node("sop_analysis", sop_agent.analyze))
+        workflow.add_node("process_mapping", traced_node("process_mapping", mapping_agent.map_process))
+        workflow.add_node("gap_identification", traced_node("gap_identification", gap_agent.identify_gaps))
+        workflow.add_node("automation_opportunity", traced_node("automation_opportunity", automation_agent.identify_opportunities))
+        workflow.add_node("future_state_design", traced_node("future_state_design", future_agent.design_future_state))
+        workflow.add_node("test_case_generation", traced_node("test_case_generation", test_agent.generate_test_cases))
+        workflow.add_node("code_generation", traced_node("code_generation", code_agent.generate_code))
+        workflow.add_node("kpi_calculation", traced_node("kpi_calculation", kpi_agent.calculate_kpis))
         
         # Define workflow
         workflow.set_entry_point("sop_analysis")
@@ -706,9 +1151,28 @@ class MasterOrchestratorAgent:
         
         return workflow.compile()
     
-    def process(self, sop_path: str, diagram_path: Optional[str] = None, domain: str = "logistics") -> AgentState:
-        """Process SOP through all agents"""
+    def process(
+        self,
+        sop_path: str,
+        diagram_path: Optional[str] = None,
+        domain: str = "logistics",
+        session_id: Optional[str] = None,
+        config: Optional[Dict] = None,
+        on_event: Optional[Callable[[Dict], None]] = None
+    ) -> AgentState:
+        """Process SOP through all agents
+        
+        Args:
+            session_id: Caller-assigned session ID (defaults to a new unique ID)
+            config: Per-run LangGraph RunnableConfig (tags, metadata, callbacks,
+                configurable values) passed through to graph.invoke
+            on_event: Optional callback receiving node_started, node_finished,
+                llm_progress and artifact events while the graph runs
+        """
         
+        session_id = session_id or new_session_id()
+        blob_scope = f"{session_id}-{uuid.uuid4().hex}"
+        blobs = get_blob_store()
         initial_state: AgentState = {
             "sop_document_path": sop_path,
             "process_diagram_path": diagram_path,
@@ -726,15 +1190,172 @@ class MasterOrchestratorAgent:
             "test_cases": [],
             "generated_code": {},
             "kpi_analysis": {},
-            "session_id": datetime.now().strftime("%Y%m%d_%H%M%S"),
+            "session_id": session_id,
+            "blob_scope": blob_scope,
             "timestamp": datetime.now().isoformat(),
             "agent_logs": [],
             "errors": []
         }
         
-        # Execute workflow
-        final_state = self.graph.invoke(initial_state)
+        try:
+            # Execute workflow inside one pipeline span so every node, LLM call
+            # and parse step of this session shares a trace
+            with span(PIPELINE_SPAN, **{"kevin.session_id": initial_state["session_id"], "kevin.domain": domain}) as root:
+                try:
+                    run_config = self._run_config(session_id, domain, config)
+                    if on_event is None:
+                        final_state = self.graph.invoke(initial_state, config=run_config)
+                    else:
+                        final_state = self._stream(initial_state, run_config, on_event)
+                finally:
+                    clear_serialized(blob_scope)
+            
+            # Callers (API, UIs, exports) work with plain values
+            final_state = blobs.materialize(final_state)
+        finally:
+            # Blobs only live for the run
+            blobs.clear_scope(blob_scope)
+        final_state["timing_summary"] = session_timing_summary(root.get_span_context().trace_id)
         return final_state
+    
+    def _stream(self, initial_state: AgentState, run_config: Dict, on_event: Callable[[Dict], None]) -> AgentState:
+        """Run the graph in streaming mode, reporting node, token and artifact events"""
+        final_state = initial_state
+        emitted: Dict[str, object] = {}
+        run_config = {**run_config, "configurable": {**run_config["configurable"], "stream_llm_progress": True}}
+        
+        for mode, chunk in self.graph.stream(initial_state, config=run_config, stream_mode=["debug", "values", "custom"]):
+            if mode == "custom":
+                on_event(chunk)
+            elif mode == "values":
+                final_state = chunk
+                for field in ARTIFACT_FIELDS:
+                    value = chunk.get(field)
+                    if value and emitted.get(field) is not value:
+                        emitted[field] = value
+                        on_event({"event": "artifact", "artifact": field, "value": self._artifact_preview(field, value)})
+            elif chunk.get("type") == "task":
+                on_event({
+                    "event": "node_started",
+                    "node": chunk["payload"]["name"],
+                    "timestamp": chunk.get("timestamp")
+                })
+            elif chunk.get("type") == "task_result":
+                on_event({
+                    "event": "node_finished",
+                    "node": chunk["payload"]["name"],
+                    "error": chunk["payload"].get("error"),
+                    "timestamp": chunk.get("timestamp")
+                })
+        
+        return final_state
+    
+    @staticmethod
+    def _artifact_preview(field: str, value) -> object:
+        """Event payload for a partial artifact (bulky ones are summarized)"""
+        value = get_blob_store().materialize(value)
+        if field == "test_cases":
+            return {"count": len(value)}
+        if field == "generated_code":
+            return {"bytes": len(str(value.get("code", "")).encode("utf-8"))}
+        return value
+    
+    @staticmethod
+    def _run_config(session_id: str, domain: str, config: Optional[Dict]) -> Dict:
+        """Merge caller config with the per-run defaults"""
+        run_config = dict(config or {})
+        run_config.setdefault("run_name", f"kevin_pipeline_{session_id}")
+        run_config["configurable"] = {
+            "session_id": session_id,
+            "domain": domain,
+            **run_config.get("configurable", {})
+        }
+        run_config["metadata"] = {"session_id": session_id, **run_config.get("metadata", {})}
+        return run_config
+
+# ============================================================================
+# SHARED ORCHESTRATOR FACTORY
+# ============================================================================
+
+_shared_orchestrator: Optional[MasterOrchestratorAgent] = None
+_shared_orchestrator_lock = threading.Lock()
+
+def get_shared_orchestrator() -> MasterOrchestratorAgent:
+    """Process-wide orchestrator; the graph is compiled once and shared by all sessions"""
+    global _shared_orchestrator
+    
+    if _shared_orchestrator is None:
+        with _shared_orchestrator_lock:
+            if _shared_orchestrator is None:
+                _shared_orchestrator = MasterOrchestratorAgent()
+    return _shared_orchestrator
+
+# ============================================================================
+# WARM-UP
+# ============================================================================
+
+# Readiness requires these; the others only save latency on the first request
+REQUIRED_WARMUP_STEPS = ("orchestrator",)
+
+def _warm_llm_connections() -> None:
+    """Open each shared LLM client's HTTPS connection with a request that spends no tokens"""
+    with _llm_cache_lock:
+        llms = list(_llm_cache.values())
+    seen = set()
+    for llm in llms:
+        # OpenAI/Azure clients expose root_client, Anthropic's _client; both list models
+        client = getattr(llm, "root_client", None) or getattr(llm, "_client", None)
+        if client is None or id(client) in seen:
+            continue
+        seen.add(id(client))
+        client.with_options(max_retries=0, timeout=settings.WARMUP_TIMEOUT_SECONDS).models.list()
+
+def _warm_pymupdf() -> None:
+    """Initialize MuPDF's fonts and text extraction on a one-page document"""
+    doc = fitz.open()
+    try:
+        page = doc.new_page()
+        page.insert_text((72, 72), "Kevin AI warm-up")
+        page.get_text()
+        page.get_pixmap()
+    finally:
+        doc.close()
+
+def _warm_tesseract() -> None:
+    """Check the tesseract binary and pull its language data into the page cache"""
+    pytesseract.get_tesseract_version()
+    pytesseract.image_to_string(Image.new("RGB", (160, 40), "white"))
+
+def warm_up(pipeline: bool = True) -> Dict[str, Dict]:
+    """Build everything the first request would otherwise pay for; returns per-step results
+
+    pipeline=False skips the orchestrator and LLM clients (API processes in
+    queue mode only extract text from uploads). Failed steps are reported,
+    not raised.
+    """
+    steps: List[Tuple[str, Callable[[], object]]] = []
+    if pipeline:
+        steps.append(("orchestrator", get_shared_orchestrator))
+        steps.append(("blob_store", get_blob_store))
+        if settings.WARMUP_LLM_PING:
+            steps.append(("llm_connections", _warm_llm_connections))
+    steps += [
+        ("pymupdf", _warm_pymupdf),
+        ("docx", DocxDocument),
+        ("tesseract", _warm_tesseract),
+        ("tokenizer", lambda: estimate_tokens("Kevin AI warm-up"))
+    ]
+
+    results = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+            results[name] = {"ok": True}
+        except Exception as e:
+            results[name] = {"ok": False, "error": str(e)}
+        results[name]["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return results
 
 # ============================================================================
 # MAIN ENTRY POINT
@@ -745,7 +1366,7 @@ if __name__ == "__main__":
     print("=" * 60)
     
     # Initialize orchestrator
-    orchestrator = MasterOrchestratorAgent()
+    orchestrator = get_shared_orchestrator()
     
     # For demo purposes
     print("\n⚠️  Demo Mode: Please provide actual SOP document path")
@@ -6,29 +6,92 @@ Version: 2.0
 Date: January 6, 2026
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Depends
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Depends, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from typing import AsyncIterator, Optional, List, Dict
+from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 import os
 import shutil
+import time
 from datetime import datetime
 import json
 
-from kevin_agents import MasterOrchestratorAgent, AgentState
+from kevin_agents import MasterOrchestratorAgent, AgentState, DocumentProcessor, get_shared_orchestrator, settings, warm_up, REQUIRED_WARMUP_STEPS
+from kevin_jobs import JobStore, JobManager, SqliteJobEventLog, make_job_queue, BATCH_DONE, JOB_DONE, JOB_FAILED, JOB_QUEUED, PRIORITY_BATCH, SUBMIT_ATTACHED, SUBMIT_COMPLETED, SUBMIT_NEW, TERMINAL_EVENTS, dedup_key
+from kevin_admission import QueueFull
+from prompts import PROMPT_VERSION
+from kevin_artifact_index import IndexSpec, build_collection_index, query_collection
+from kevin_catalog import SessionCatalog, SORT_COLUMNS
+from kevin_http import ArtifactCache, artifact_response
+import kevin_metrics as metrics
+from kevin_pipeline import (
+    JOB_DB_PATH, JOB_QUEUE_BACKEND, OPPORTUNITY_INDEX, OUTPUT_DIR, REDIS_URL, TEST_CASE_INDEX,
+    ProcessResponse, get_session_catalog, make_admission, run_pipeline_job, write_batch_summary
+)
+from kevin_session_store import BATCHES_DIR, FULL_RESULT, FULL_RESULT_FILENAME, SECTIONS_BY_NAME, container_path, load_full_result, session_exists, session_package
+from kevin_uploads import UploadRejected, extract_sop_archive, new_session_id, store_upload
+from kevin_zipstream import ZIP_MODES, ZipSizeCache, iter_zip, package_etag, parse_range, slice_stream
+
+try:
+    from export_utils import REPORT_MIME_TYPES, build_reports, stream_pdf_report, stream_xlsx_report
+except ImportError:  # reportlab / python-pptx / openpyxl not installed: report export is disabled
+    build_reports = None
 
 # ============================================================================
 # APPLICATION SETUP
 # ============================================================================
 
+# Warm-up progress reported by /ready
+warmup_state = {"status": "warming_up", "started_at": None, "finished_at": None, "steps": {}}
+
+async def warm_up_process() -> None:
+    """Pre-build the orchestrator, LLM connections, extraction engines and stores"""
+    warmup_state["started_at"] = datetime.now().isoformat()
+    # Queue-mode APIs never run pipelines; they only read uploads
+    steps = await asyncio.to_thread(warm_up, pipeline=JOB_MODE == "local")
+    for name, prime in (("session_catalog", get_session_catalog), ("job_store", lambda: get_job_manager().store.status_counts())):
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(prime)
+            steps[name] = {"ok": True}
+        except Exception as e:
+            steps[name] = {"ok": False, "error": str(e)}
+        steps[name]["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    warmup_state["steps"] = steps
+    warmup_state["finished_at"] = datetime.now().isoformat()
+    failed = [name for name in REQUIRED_WARMUP_STEPS if name in steps and not steps[name]["ok"]]
+    warmup_state["status"] = "failed" if failed else "ready"
+    for name, step in steps.items():
+        if not step["ok"]:
+            print(f"⚠️  Warm-up step {name} failed: {step['error']}")
+    print(f"✅ Warm-up {warmup_state['status']} in {sum(step['duration_ms'] for step in steps.values()):.0f} ms")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up and resume persisted jobs on startup; stop the worker pool on shutdown
+
+    Warm-up runs in the background so /health and /ready answer meanwhile;
+    /ready returns 503 until it completes.
+    """
+    warmup_task = asyncio.create_task(warm_up_process())
+    get_job_manager().start()
+    yield
+    warmup_task.cancel()
+    get_job_manager().shutdown()
+
 app = FastAPI(
     title="Kevin AI - SOP Automation Platform",
     description="Enterprise-grade SOP to Agentic Automation transformation",
     version="2.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -40,21 +103,159 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _upload_limit(method: str, path: str) -> Optional[int]:
+    """Request body limit of an upload route (None for other routes)"""
+    if method != "POST" or not path.startswith("/api/v1/process/"):
+        return None
+    if path == "/api/v1/process/batch":
+        return MAX_BATCH_BYTES + MULTIPART_OVERHEAD_BYTES
+    return MAX_SOP_BYTES + MAX_DIAGRAM_BYTES + MULTIPART_OVERHEAD_BYTES
+
+class UploadSizeLimit:
+    """Reject oversized uploads: from Content-Length up front, otherwise while the body is read
+
+    Chunked requests carry no Content-Length, so receive is wrapped to count
+    body bytes. Once the limit is passed the 413 is sent here, the app sees a
+    client disconnect and whatever response it then produces is dropped.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        limit = _upload_limit(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        too_large = JSONResponse(status_code=413, content={"detail": "Upload exceeds the size limit"})
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > limit:
+            return await too_large(scope, receive, send)
+
+        received = 0
+        rejected = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    rejected = True
+                    if not response_started:
+                        await too_large(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+app.add_middleware(UploadSizeLimit)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Request latency by route template (time to response headers for streams)"""
+    started = time.perf_counter()
+    metrics.HTTP_IN_FLIGHT.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.HTTP_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        metrics.HTTP_DURATION.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            # Templates, not raw paths: session and job IDs would explode the label set
+            route=getattr(route, "path", "unmatched"),
+            status=status
+        )
+
 # Storage directories
 UPLOAD_DIR = "./uploads"
-OUTPUT_DIR = "./outputs"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# Global orchestrator instance
-orchestrator = None
+# Job processing
+JOB_WORKERS = int(os.getenv("KEVIN_JOB_WORKERS", "2"))
+JOB_MODE = os.getenv("KEVIN_JOB_MODE", "local")  # local: run jobs in this process; queue: kevin_worker.py runs them
+API_WORKERS = int(os.getenv("KEVIN_API_WORKERS", "1"))
+EVENT_POLL_SECONDS = 0.5
+EVENT_KEEPALIVE_SECONDS = 15
+
+# Session listings
+SESSION_PAGE_MAX = 200
+
+# Parsed/serialized artifacts of recently read sessions
+artifact_cache = ArtifactCache(max_bytes=int(os.getenv("KEVIN_ARTIFACT_CACHE_MB", "64")) * 1024 * 1024)
+
+# Paginated artifact endpoints
+ARTIFACT_PAGE_DEFAULT = 50
+ARTIFACT_PAGE_MAX = 500
+# Package export (archive sizes are cached so range requests can resume downloads)
+zip_sizes = ZipSizeCache()
+
+SOP_EXTENSIONS = (".pdf", ".docx")
+DIAGRAM_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# Upload limits
+MAX_SOP_BYTES = int(os.getenv("KEVIN_MAX_SOP_MB", "50")) * 1024 * 1024
+MAX_DIAGRAM_BYTES = int(os.getenv("KEVIN_MAX_DIAGRAM_MB", "20")) * 1024 * 1024
+MAX_SOP_PAGES = int(os.getenv("KEVIN_MAX_SOP_PAGES", "300"))
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Batch submissions
+MAX_BATCH_BYTES = int(os.getenv("KEVIN_MAX_BATCH_MB", "500")) * 1024 * 1024
+MAX_BATCH_ITEMS = int(os.getenv("KEVIN_MAX_BATCH_ITEMS", "50"))
+BATCH_CONCURRENCY = int(os.getenv("KEVIN_BATCH_CONCURRENCY", "2"))
+
+# Admission control (quota and token estimates are LLM settings in kevin_agents)
+DIAGRAM_TEXT_CHARS = 1800  # OCR text of a process diagram, roughly one scanned page
 
-def get_orchestrator():
-    """Dependency to get orchestrator instance"""
-    global orchestrator
-    if orchestrator is None:
-        orchestrator = MasterOrchestratorAgent()
-    return orchestrator
+def get_orchestrator() -> MasterOrchestratorAgent:
+    """Dependency to get the process-wide orchestrator instance"""
+    return get_shared_orchestrator()
+
+# Global job manager instance
+job_manager = None
+
+def get_job_manager() -> JobManager:
+    """Dependency to get the job manager (worker pool + persistent job store)"""
+    global job_manager
+    if job_manager is None:
+        store = JobStore(JOB_DB_PATH)
+        if JOB_MODE == "queue":
+            job_manager = JobManager(
+                store,
+                None,
+                events=SqliteJobEventLog(JOB_DB_PATH),
+                queue=make_job_queue(store, JOB_QUEUE_BACKEND, REDIS_URL),
+                on_batch_done=write_batch_summary,
+                admission=make_admission(store)
+            )
+        elif JOB_MODE == "local":
+            job_manager = JobManager(
+                store,
+                run_pipeline_job,
+                max_workers=JOB_WORKERS,
+                on_batch_done=write_batch_summary,
+                admission=make_admission(store, slots=JOB_WORKERS)
+            )
+        else:
+            raise ValueError(f"Unsupported KEVIN_JOB_MODE: {JOB_MODE}")
+    return job_manager
 
 # ============================================================================
 # REQUEST/RESPONSE MODELS
@@ -67,17 +268,47 @@ class ProcessRequest(BaseModel):
     generate_code: bool = Field(default=True, description="Generate production-ready code")
     calculate_roi: bool = Field(default=True, description="Calculate KPI/SLA improvements")
 
-class ProcessResponse(BaseModel):
-    """Response model for SOP processing"""
+class JobResponse(BaseModel):
+    """Response model for an accepted or polled processing job"""
+    job_id: str
     session_id: str
-    status: str
-    timestamp: str
-    current_state_map: Optional[str] = None
-    future_state_map: Optional[str] = None
-    automation_opportunities_count: int = 0
-    test_cases_count: int = 0
-    estimated_savings_annual: Optional[float] = None
-    errors: List[str] = []
+    status: str  # queued, running, done, failed
+    node: Optional[str] = None  # pipeline node currently running
+    sop_sha256: Optional[str] = None  # content hash of the uploaded SOP
+    deduplicated: Optional[str] = None  # "attached" or "completed" when an identical submission was reused
+    priority: str = "interactive"  # interactive jobs are admitted before batch items
+    estimated_tokens: Optional[int] = None  # projected LLM demand used for admission
+    queue_position: Optional[int] = None  # while waiting for LLM capacity
+    estimated_start: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[ProcessResponse] = None
+    links: Dict[str, str] = {}
+
+class BatchItemResponse(BaseModel):
+    """One SOP of a batch"""
+    position: int
+    filename: str
+    job_id: str
+    session_id: str
+    status: str  # held (waiting for a batch slot), queued, running, done, failed
+    deduplicated: Optional[str] = None
+    error: Optional[str] = None
+    links: Dict[str, str] = {}
+
+class BatchResponse(BaseModel):
+    """Response model for a batch of SOP processing jobs"""
+    batch_id: str
+    status: str  # running, done
+    created_at: str
+    finished_at: Optional[str] = None
+    max_concurrency: int
+    counts: Dict[str, int]
+    items: List[BatchItemResponse]
+    summary: Optional[Dict] = None  # totals, once the batch is done
+    links: Dict[str, str] = {}
 
 class AutomationOpportunity(BaseModel):
     """Model for automation opportunity"""
@@ -113,12 +344,23 @@ async def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until warm-up has built the pipeline, so only warm workers get traffic"""
+    return JSONResponse(
+        status_code=200 if warmup_state["status"] == "ready" else 503,
+        content={**warmup_state, "timestamp": datetime.now().isoformat()}
+    )
+
 @app.get("/api/v1/status")
-async def get_status():
+def get_status(manager: JobManager = Depends(get_job_manager)):
     """Get API status"""
     return {
         "api_version": "v1",
         "llm_provider": os.getenv("LLM_PROVIDER", "azure"),
+        "prompt_version": PROMPT_VERSION,
+        "submission_dedup": manager.dedup_summary(),
+        "admission": manager.admission.summary(),
         "features": {
             "sop_analysis": True,
             "gap_identification": True,
@@ -130,249 +372,727 @@ async def get_status():
         "timestamp": datetime.now().isoformat()
     }
 
+def collect_job_metrics(manager: JobManager) -> None:
+    """Refresh job, admission, submission and artifact cache metrics from their sources"""
+    counts = manager.store.status_counts()
+    for (status,), _ in metrics.JOBS.samples():
+        counts.setdefault(status, 0)  # statuses that emptied report 0 instead of vanishing
+    for status, count in counts.items():
+        metrics.JOBS.set(count, status=status)
+
+    admission = manager.admission.summary()
+    metrics.ADMISSION_TPM.set(admission["tokens_per_minute"] or 0, kind="quota")
+    metrics.ADMISSION_TPM.set(admission["projected_tokens_per_minute"], kind="projected")
+    metrics.ADMISSION_ESTIMATE_SCALE.set(admission["estimate_scale"])
+
+    dedup = manager.dedup_summary()
+    for outcome in (SUBMIT_NEW, SUBMIT_ATTACHED, SUBMIT_COMPLETED, "forced"):
+        metrics.SUBMISSIONS.set(dedup[outcome], outcome=outcome)
+    dedup_hits = dedup[SUBMIT_ATTACHED] + dedup[SUBMIT_COMPLETED]
+    metrics.CACHE_REQUESTS.set(dedup_hits, cache="submission_dedup", result="hit")
+    metrics.CACHE_REQUESTS.set(dedup["submissions"] - dedup_hits, cache="submission_dedup", result="miss")
+
+    metrics.CACHE_REQUESTS.set(artifact_cache.hits, cache="artifact", result="hit")
+    metrics.CACHE_REQUESTS.set(artifact_cache.misses, cache="artifact", result="miss")
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics(manager: JobManager = Depends(get_job_manager)):
+    """Prometheus metrics of this API process (workers expose their own with --metrics-port)"""
+    collect_job_metrics(manager)
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
 # ============================================================================
 # SOP PROCESSING ENDPOINTS
 # ============================================================================
 
-@app.post("/api/v1/process/sop", response_model=ProcessResponse)
+@app.post("/api/v1/process/sop", response_model=JobResponse, status_code=202)
 async def process_sop(
     sop_file: UploadFile = File(...),
     diagram_file: Optional[UploadFile] = File(None),
     domain: str = "logistics",
-    orchestrator: MasterOrchestratorAgent = Depends(get_orchestrator)
+    force: bool = False,
+    manager: JobManager = Depends(get_job_manager)
 ):
     """
-    Process SOP document and generate automation artifacts
+    Queue an SOP document for processing
     
     Args:
-        sop_file: SOP document (PDF, DOCX, or Mermaid)
+        sop_file: SOP document (PDF or DOCX)
         diagram_file: Optional process diagram (PNG, JPG)
         domain: Business domain
+        force: Run the pipeline even if an identical submission already finished
     
     Returns:
-        ProcessResponse with session ID and summary
+        202 with a job ID; poll /api/v1/jobs/{job_id} for status and results.
+        Identical submissions (same files, domain, model and prompt version)
+        attach to the in-flight job, or get the finished job back with 200.
+        429 with Retry-After when too many jobs are waiting for LLM capacity.
     """
     
+    if not sop_file.filename or not sop_file.filename.lower().endswith(SOP_EXTENSIONS):
+        raise HTTPException(status_code=400, detail=f"SOP file must be one of: {', '.join(SOP_EXTENSIONS)}")
+    if diagram_file and not (diagram_file.filename or "").lower().endswith(DIAGRAM_EXTENSIONS):
+        raise HTTPException(status_code=400, detail=f"Diagram file must be one of: {', '.join(DIAGRAM_EXTENSIONS)}")
+    
+    session_id = new_session_id()
+    session_dir = os.path.join(UPLOAD_DIR, session_id)
+    
     try:
-        # Save uploaded files
-        session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        session_dir = os.path.join(UPLOAD_DIR, session_id)
-        os.makedirs(session_dir, exist_ok=True)
+        sop = await store_upload(sop_file, session_dir, MAX_SOP_BYTES)
         
-        sop_path = os.path.join(session_dir, sop_file.filename)
-        with open(sop_path, "wb") as f:
-            shutil.copyfileobj(sop_file.file, f)
+        pages = await asyncio.to_thread(DocumentProcessor.count_pages, sop.path)
+        if pages is not None and pages > MAX_SOP_PAGES:
+            raise UploadRejected(f"SOP has {pages} pages; the limit is {MAX_SOP_PAGES}", 413)
         
-        diagram_path = None
+        diagram = None
         if diagram_file:
-            diagram_path = os.path.join(session_dir, diagram_file.filename)
-            with open(diagram_path, "wb") as f:
-                shutil.copyfileobj(diagram_file.file, f)
-        
-        # Process through orchestrator
-        print(f"Processing SOP for session: {session_id}")
-        result = orchestrator.process(sop_path, diagram_path, domain)
+            diagram = await store_upload(diagram_file, session_dir, MAX_DIAGRAM_BYTES)
         
-        # Save outputs
-        output_dir = os.path.join(OUTPUT_DIR, session_id)
-        os.makedirs(output_dir, exist_ok=True)
+        sop_chars = await asyncio.to_thread(DocumentProcessor.text_length, sop.path)
+        est_tokens = manager.admission.estimate(sop_chars + (DIAGRAM_TEXT_CHARS if diagram else 0))
         
-        with open(os.path.join(output_dir, "full_result.json"), "w") as f:
-            # Convert to serializable format
-            serializable_result = {
-                k: v for k, v in result.items() 
-                if k not in ['agent_logs', 'errors'] or isinstance(v, (str, int, float, list, dict, type(None)))
-            }
-            json.dump(serializable_result, f, indent=2, default=str)
-        
-        # Save individual artifacts
-        with open(os.path.join(output_dir, "current_state_map.mermaid"), "w") as f:
-            f.write(result["current_state_map"])
-        
-        with open(os.path.join(output_dir, "future_state_map.mermaid"), "w") as f:
-            f.write(result["future_state_map"])
-        
-        with open(os.path.join(output_dir, "automation_opportunities.json"), "w") as f:
-            json.dump(result["automation_opportunities"], f, indent=2)
+        key = submission_key(sop.sha256, diagram.sha256 if diagram else None, domain)
+        # Dedup lookup and insert are SQLite (or Redis) round trips
+        job, outcome = await asyncio.to_thread(
+            manager.submit_unique,
+            session_id,
+            {
+                "sop_path": sop.path,
+                "sop_sha256": sop.sha256,
+                "sop_bytes": sop.size,
+                "sop_pages": pages,
+                "diagram_path": diagram.path if diagram else None,
+                "diagram_sha256": diagram.sha256 if diagram else None,
+                "domain": domain
+            },
+            key,
+            force=force,
+            reusable=session_outputs_exist,
+            est_tokens=est_tokens
+        )
         
-        with open(os.path.join(output_dir, "test_cases.json"), "w") as f:
-            json.dump(result["test_cases"], f, indent=2)
+        if outcome != SUBMIT_NEW:
+            # The existing job has its own copy of the upload
+            await asyncio.to_thread(shutil.rmtree, session_dir, True)
+    
+    except UploadRejected as e:
+        await asyncio.to_thread(shutil.rmtree, session_dir, True)
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except QueueFull as e:
+        await asyncio.to_thread(shutil.rmtree, session_dir, True)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        await asyncio.to_thread(shutil.rmtree, session_dir, True)
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    response = await asyncio.to_thread(job_response, job, manager)  # queue position reads the job store
+    if outcome != SUBMIT_NEW:
+        response.deduplicated = outcome
+    
+    return JSONResponse(
+        status_code=200 if outcome == SUBMIT_COMPLETED else 202,
+        content=response.model_dump(),
+        headers={"Location": f"/api/v1/jobs/{job['job_id']}"}
+    )
+
+@app.post("/api/v1/process/batch", response_model=BatchResponse, status_code=202)
+async def process_batch(
+    files: List[UploadFile] = File(...),
+    domain: str = "logistics",
+    max_concurrency: Optional[int] = None,
+    force: bool = False,
+    manager: JobManager = Depends(get_job_manager)
+):
+    """
+    Queue many SOP documents as one batch
+    
+    Args:
+        files: SOP documents (PDF or DOCX) and/or ZIP archives of them
+        domain: Business domain shared by every SOP
+        max_concurrency: Pipelines of this batch running at once
+        force: Run SOPs even if identical submissions already finished
+    
+    Returns:
+        202 with a batch ID, per-item job links and aggregate status; a
+        combined summary is available at /api/v1/batches/{batch_id}/summary
+        once every item has finished. Batch items yield LLM capacity to
+        interactive submissions. 429 with Retry-After when the queue is full.
+    """
+    
+    concurrency = max(1, min(max_concurrency or BATCH_CONCURRENCY, MAX_BATCH_ITEMS))
+    staging_dir = os.path.join(UPLOAD_DIR, f"batch_{new_session_id()}")
+    sops = []  # (filename, session_id, StoredUpload)
+    
+    try:
+        for upload in files:
+            filename = upload.filename or ""
+            if filename.lower().endswith(".zip"):
+                archive = await store_upload(upload, staging_dir, MAX_BATCH_BYTES)
+                sops.extend(await asyncio.to_thread(
+                    extract_sop_archive, archive.path, UPLOAD_DIR, SOP_EXTENSIONS, MAX_SOP_BYTES, MAX_BATCH_ITEMS - len(sops)
+                ))
+            elif filename.lower().endswith(SOP_EXTENSIONS):
+                if len(sops) >= MAX_BATCH_ITEMS:
+                    raise UploadRejected(f"A batch holds at most {MAX_BATCH_ITEMS} SOPs", 413)
+                session_id = new_session_id()
+                sops.append((filename, session_id, await store_upload(upload, os.path.join(UPLOAD_DIR, session_id), MAX_SOP_BYTES)))
+            else:
+                raise UploadRejected(f"{filename}: batch files must be one of: {', '.join(SOP_EXTENSIONS)}, .zip")
         
-        with open(os.path.join(output_dir, "generated_code.txt"), "w") as f:
-            f.write(result["generated_code"].get("code", ""))
+        items = []
+        for filename, session_id, sop in sops:
+            pages = await asyncio.to_thread(DocumentProcessor.count_pages, sop.path)
+            if pages is not None and pages > MAX_SOP_PAGES:
+                raise UploadRejected(f"{filename} has {pages} pages; the limit is {MAX_SOP_PAGES}", 413)
+            sop_chars = await asyncio.to_thread(DocumentProcessor.text_length, sop.path)
+            items.append({
+                "filename": filename,
+                "session_id": session_id,
+                "dedup_key": submission_key(sop.sha256, None, domain),
+                "est_tokens": manager.admission.estimate(sop_chars),
+                "params": {
+                    "sop_path": sop.path,
+                    "sop_sha256": sop.sha256,
+                    "sop_bytes": sop.size,
+                    "sop_pages": pages,
+                    "diagram_path": None,
+                    "diagram_sha256": None,
+                    "domain": domain
+                }
+            })
         
-        with open(os.path.join(output_dir, "kpi_analysis.json"), "w") as f:
-            json.dump(result["kpi_analysis"], f, indent=2)
+        if not items:
+            raise UploadRejected("No SOP files in the batch")
         
-        # Calculate total annual savings
-        total_savings = sum(
-            opp.get("estimated_savings_annual", 0) 
-            for opp in result["automation_opportunities"]
+        batch = await asyncio.to_thread(
+            manager.submit_batch, items, {"domain": domain, "force": force}, concurrency, force=force, reusable=session_outputs_exist
         )
+    
+    except BaseException as e:
+        for _, session_id, _ in sops:
+            await asyncio.to_thread(shutil.rmtree, os.path.join(UPLOAD_DIR, session_id), True)
+        if isinstance(e, UploadRejected):
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        if isinstance(e, QueueFull):
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        if isinstance(e, Exception):
+            raise HTTPException(status_code=500, detail=str(e))
+        raise
+    finally:
+        await asyncio.to_thread(shutil.rmtree, staging_dir, True)
+    
+    # Items that reused an existing job do not need their own upload
+    for item, batch_item in zip(items, batch["items"]):
+        if batch_item["deduplicated"]:
+            await asyncio.to_thread(shutil.rmtree, os.path.join(UPLOAD_DIR, item["session_id"]), True)
+    
+    return JSONResponse(
+        status_code=202,
+        content=batch_response(batch).model_dump(),
+        headers={"Location": f"/api/v1/batches/{batch['batch_id']}"}
+    )
+
+@app.get("/api/v1/batches/{batch_id}", response_model=BatchResponse)
+def get_batch(batch_id: str, manager: JobManager = Depends(get_job_manager)):
+    """Get aggregate and per-item status of a batch"""
+    
+    batch = manager.store.get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    return batch_response(batch)
+
+@app.get("/api/v1/batches/{batch_id}/summary")
+def get_batch_summary(batch_id: str, request: Request):
+    """Combined summary artifact of a finished batch"""
+    
+    path = os.path.join(OUTPUT_DIR, BATCHES_DIR, batch_id, "batch_summary.json")
+    try:
+        return artifact_response(request, artifact_cache, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Batch summary not found (the batch may still be running)")
+
+@app.get("/api/v1/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: str, manager: JobManager = Depends(get_job_manager)):
+    """Get status of a processing job"""
+    
+    job = manager.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job_response(job, manager)
+
+@app.get("/api/v1/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request, manager: JobManager = Depends(get_job_manager)):
+    """Server-sent events: node, token-progress and artifact events of a job
+    
+    Resumes after the sequence number in the Last-Event-ID header.
+    """
+    
+    if await asyncio.to_thread(manager.store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    after_seq = int(request.headers.get("last-event-id") or 0)
+    
+    async def sse():
+        async for event in job_events(manager, job_id, after_seq):
+            if await request.is_disconnected():
+                break
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"id: {event['seq']}\nevent: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+    
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/api/v1/jobs/{job_id}/ws")
+async def job_events_websocket(websocket: WebSocket, job_id: str, after: int = 0):
+    """WebSocket equivalent of /api/v1/jobs/{job_id}/events (resume with ?after=seq)"""
+    
+    manager = get_job_manager()
+    await websocket.accept()
+    if await asyncio.to_thread(manager.store.get, job_id) is None:
+        await websocket.close(code=4404, reason="Job not found")
+        return
+    
+    try:
+        async for event in job_events(manager, job_id, after):
+            if event is None:
+                await websocket.send_text(json.dumps({"event": "keepalive"}))
+            else:
+                await websocket.send_text(json.dumps(event, default=str))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+async def job_events(manager: JobManager, job_id: str, after_seq: int = 0) -> AsyncIterator[Optional[Dict]]:
+    """Yield events of a job until it finishes; None marks a keepalive tick"""
+    idle = 0.0
+    
+    while True:
+        # Event log and job store are SQLite in queue mode: keep the reads off the loop
+        events = await asyncio.to_thread(manager.events.events_after, job_id, after_seq)
+        for event in events:
+            after_seq = event["seq"]
+            yield event
+            if event["event"] in TERMINAL_EVENTS:
+                return
         
-        return ProcessResponse(
-            session_id=session_id,
-            status="completed",
-            timestamp=result["timestamp"],
-            current_state_map=result["current_state_map"],
-            future_state_map=result["future_state_map"],
-            automation_opportunities_count=len(result["automation_opportunities"]),
-            test_cases_count=len(result["test_cases"]),
-            estimated_savings_annual=total_savings,
-            errors=result.get("errors", [])
-        )
+        if events:
+            idle = 0.0
+        elif not await asyncio.to_thread(manager.events.has_events, job_id):
+            # Finished before this process started (or evicted from the bus):
+            # report the stored outcome once
+            job = await asyncio.to_thread(manager.store.get, job_id)
+            if job["status"] in (JOB_DONE, JOB_FAILED):
+                yield {
+                    "event": "job_done" if job["status"] == JOB_DONE else "job_failed",
+                    "job_id": job_id,
+                    "seq": after_seq + 1,
+                    "result": job.get("result"),
+                    "error": job.get("error"),
+                    "timestamp": job.get("finished_at")
+                }
+                return
+        
+        await asyncio.sleep(EVENT_POLL_SECONDS)
+        idle += EVENT_POLL_SECONDS
+        if idle >= EVENT_KEEPALIVE_SECONDS:
+            idle = 0.0
+            yield None
+
+def submission_key(sop_sha256: str, diagram_sha256: Optional[str], domain: str) -> str:
+    """Dedup key of a submission: input hashes, domain, model options and prompt version"""
+    models = {
+        "azure": settings.AZURE_OPENAI_DEPLOYMENT_NAME,
+        "openai": settings.OPENAI_MODEL,
+        "anthropic": settings.ANTHROPIC_MODEL
+    }
+    return dedup_key(
+        sop_sha256=sop_sha256,
+        diagram_sha256=diagram_sha256,
+        domain=domain.strip().lower(),
+        options={
+            "llm_provider": settings.LLM_PROVIDER,
+            "model": models.get(settings.LLM_PROVIDER),
+            "temperature": settings.TEMPERATURE,
+            "max_tokens": settings.MAX_TOKENS,
+            "opportunity_batching": settings.OPPORTUNITY_BATCHING,
+            "test_case_sharding": settings.TEST_CASE_SHARDING
+        },
+        prompt_version=PROMPT_VERSION
+    )
+
+def session_outputs_exist(job: Dict) -> bool:
+    """Whether a finished job's session outputs are still on disk (so it can be reused)"""
+    return session_exists(os.path.join(OUTPUT_DIR, job["session_id"]))
+
+def batch_response(batch: Dict) -> BatchResponse:
+    """Build the public view of a batch record"""
+    counts: Dict[str, int] = {}
+    items = []
+    for item in batch["items"]:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+        links = {"job": f"/api/v1/jobs/{item['job_id']}"}
+        if item["status"] == JOB_DONE:
+            links["results"] = f"/api/v1/results/{item['session_id']}"
+        items.append(BatchItemResponse(
+            position=item["position"],
+            filename=item["filename"],
+            job_id=item["job_id"],
+            session_id=item["session_id"],
+            status=item["status"],
+            deduplicated=item["deduplicated"],
+            error=item.get("error"),
+            links=links
+        ))
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    links = {"self": f"/api/v1/batches/{batch['batch_id']}"}
+    if batch["status"] == BATCH_DONE:
+        links["summary"] = f"/api/v1/batches/{batch['batch_id']}/summary"
+    
+    return BatchResponse(
+        batch_id=batch["batch_id"],
+        status=batch["status"],
+        created_at=batch["created_at"],
+        finished_at=batch.get("finished_at"),
+        max_concurrency=batch["max_concurrency"],
+        counts=counts,
+        items=items,
+        summary=batch.get("summary"),
+        links=links
+    )
 
-@app.get("/api/v1/results/{session_id}")
-async def get_results(session_id: str):
-    """Get full results for a session"""
+def job_response(job: Dict, manager: Optional[JobManager] = None) -> JobResponse:
+    """Build the public view of a job record (with its queue ETA when manager is given)"""
+    links = {
+        "self": f"/api/v1/jobs/{job['job_id']}",
+        "events": f"/api/v1/jobs/{job['job_id']}/events",
+        "websocket": f"/api/v1/jobs/{job['job_id']}/ws"
+    }
+    if job["status"] == JOB_DONE:
+        links["results"] = f"/api/v1/results/{job['session_id']}"
     
-    result_path = os.path.join(OUTPUT_DIR, session_id, "full_result.json")
-    if not os.path.exists(result_path):
-        raise HTTPException(status_code=404, detail="Session not found")
+    queue = {}
+    if manager is not None and job["status"] == JOB_QUEUED:
+        queue = manager.admission.queue_positions().get(job["job_id"], {})
     
-    with open(result_path, "r") as f:
-        results = json.load(f)
+    return JobResponse(
+        job_id=job["job_id"],
+        session_id=job["session_id"],
+        status=job["status"],
+        node=job.get("node"),
+        sop_sha256=job["params"].get("sop_sha256"),
+        priority="batch" if job.get("priority") == PRIORITY_BATCH else "interactive",
+        estimated_tokens=job.get("est_tokens"),
+        queue_position=queue.get("queue_position"),
+        estimated_start=queue.get("estimated_start"),
+        created_at=job["created_at"],
+        started_at=job.get("started_at"),
+        finished_at=job.get("finished_at"),
+        error=job.get("error"),
+        result=job.get("result"),
+        links=links
+    )
+
+def session_artifact(request: Request, session_id: str, section: str, not_found: str, download: bool = False) -> Response:
+    """Serve a session artifact through the artifact cache (ETag, 304, compression)
+    
+    Only the requested section of the session container is decoded.
+    """
     
-    return results
+    spec = SECTIONS_BY_NAME.get(section)
+    filename = spec.filename if spec else FULL_RESULT_FILENAME
+    kind = spec.kind if spec else "json"
+    output_dir = os.path.join(OUTPUT_DIR, session_id)
+    path = container_path(output_dir)
+    try:
+        if os.path.isfile(path):
+            return artifact_response(request, artifact_cache, path, kind, filename if download else None, section=section)
+        # Sessions saved before the session store have one file per artifact
+        return artifact_response(request, artifact_cache, os.path.join(output_dir, filename), kind, filename if download else None)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=not_found)
+
+@app.get("/api/v1/results/{session_id}")
+def get_results(session_id: str, request: Request):
+    """Get full results for a session"""
+    return session_artifact(request, session_id, FULL_RESULT, "Session not found")
 
 @app.get("/api/v1/results/{session_id}/current-state-map")
-async def get_current_state_map(session_id: str):
+def get_current_state_map(session_id: str, request: Request):
     """Get current state process map"""
-    
-    map_path = os.path.join(OUTPUT_DIR, session_id, "current_state_map.mermaid")
-    if not os.path.exists(map_path):
-        raise HTTPException(status_code=404, detail="Current state map not found")
-    
-    return FileResponse(map_path, media_type="text/plain", filename="current_state_map.mermaid")
+    return session_artifact(request, session_id, "current_state_map", "Current state map not found", download=True)
 
 @app.get("/api/v1/results/{session_id}/future-state-map")
-async def get_future_state_map(session_id: str):
+def get_future_state_map(session_id: str, request: Request):
     """Get future state process map"""
+    return session_artifact(request, session_id, "future_state_map", "Future state map not found", download=True)
+
+def artifact_page(
+    session_id: str,
+    name: str,
+    spec: IndexSpec,
+    filters: Dict[str, Optional[str]],
+    sort: Optional[str],
+    order: str,
+    cursor: Optional[str],
+    limit: Optional[int],
+    fields: Optional[str],
+    not_found: str
+) -> Dict:
+    """One page of an indexed artifact collection"""
+    
+    if sort is not None and sort not in spec.sorts:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(spec.sorts)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
     
-    map_path = os.path.join(OUTPUT_DIR, session_id, "future_state_map.mermaid")
-    if not os.path.exists(map_path):
-        raise HTTPException(status_code=404, detail="Future state map not found")
+    output_dir = os.path.join(OUTPUT_DIR, session_id)
+    path = container_path(output_dir)
+    try:
+        if os.path.isfile(path):
+            records = artifact_cache.get(path, section=name).value
+            try:
+                index = artifact_cache.get(path, section=f"{name}.index").value
+            except FileNotFoundError:
+                index = None  # container packed from legacy files
+        else:
+            records = artifact_cache.get(os.path.join(output_dir, SECTIONS_BY_NAME[name].filename)).value
+            index = None
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=not_found)
     
-    return FileResponse(map_path, media_type="text/plain", filename="future_state_map.mermaid")
+    try:
+        return query_collection(
+            records,
+            index or build_collection_index(records, spec),
+            filters,
+            sort=sort,
+            descending=order == "desc",
+            cursor=cursor,
+            limit=max(1, min(limit or ARTIFACT_PAGE_DEFAULT, ARTIFACT_PAGE_MAX)),
+            fields=[field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/api/v1/results/{session_id}/automation-opportunities")
-async def get_automation_opportunities(session_id: str):
-    """Get automation opportunities"""
+def get_automation_opportunities(
+    session_id: str,
+    request: Request,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    priority: Optional[str] = None,
+    type: Optional[str] = Query(None, description="Alias of automation_type"),
+    automation_type: Optional[str] = None,
+    step_id: Optional[str] = None,
+    sort: Optional[str] = None,
+    order: str = "asc",
+    fields: Optional[str] = None
+):
+    """Get automation opportunities
     
-    opp_path = os.path.join(OUTPUT_DIR, session_id, "automation_opportunities.json")
-    if not os.path.exists(opp_path):
-        raise HTTPException(status_code=404, detail="Automation opportunities not found")
+    Without query parameters the full ranked array is returned. With any of
+    limit/cursor/filters/sort/fields, a page {items, total, limit, next_cursor}
+    is served from the session's artifact index. Filters accept comma-separated
+    alternatives; fields accepts dotted paths (e.g. impact_analysis.total_annual_savings).
+    """
     
-    with open(opp_path, "r") as f:
-        opportunities = json.load(f)
+    filters = {"priority": priority, "automation_type": automation_type or type, "step_id": step_id}
+    if limit is None and cursor is None and sort is None and fields is None and not any(filters.values()):
+        return session_artifact(request, session_id, "automation_opportunities", "Automation opportunities not found")
     
-    return opportunities
+    return artifact_page(session_id, "automation_opportunities", OPPORTUNITY_INDEX, filters, sort, order, cursor, limit, fields, "Automation opportunities not found")
 
 @app.get("/api/v1/results/{session_id}/test-cases")
-async def get_test_cases(session_id: str):
-    """Get test cases"""
+def get_test_cases(
+    session_id: str,
+    request: Request,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    priority: Optional[str] = None,
+    type: Optional[str] = Query(None, description="Test type, e.g. Functional"),
+    status: Optional[str] = None,
+    process_step: Optional[str] = None,
+    sort: Optional[str] = None,
+    order: str = "asc",
+    fields: Optional[str] = None
+):
+    """Get test cases
     
-    test_path = os.path.join(OUTPUT_DIR, session_id, "test_cases.json")
-    if not os.path.exists(test_path):
-        raise HTTPException(status_code=404, detail="Test cases not found")
+    Without query parameters the full array is returned; otherwise a page
+    is served from the artifact index (see get_automation_opportunities).
+    """
     
-    with open(test_path, "r") as f:
-        test_cases = json.load(f)
+    filters = {"priority": priority, "test_type": type, "status": status, "process_step": process_step}
+    if limit is None and cursor is None and sort is None and fields is None and not any(filters.values()):
+        return session_artifact(request, session_id, "test_cases", "Test cases not found")
     
-    return test_cases
+    return artifact_page(session_id, "test_cases", TEST_CASE_INDEX, filters, sort, order, cursor, limit, fields, "Test cases not found")
 
 @app.get("/api/v1/results/{session_id}/generated-code")
-async def get_generated_code(session_id: str):
+def get_generated_code(session_id: str, request: Request):
     """Get generated code"""
-    
-    code_path = os.path.join(OUTPUT_DIR, session_id, "generated_code.txt")
-    if not os.path.exists(code_path):
-        raise HTTPException(status_code=404, detail="Generated code not found")
-    
-    return FileResponse(code_path, media_type="text/plain", filename="generated_code.txt")
+    return session_artifact(request, session_id, "generated_code", "Generated code not found", download=True)
 
 @app.get("/api/v1/results/{session_id}/kpi-analysis")
-async def get_kpi_analysis(session_id: str):
+def get_kpi_analysis(session_id: str, request: Request):
     """Get KPI/SLA analysis"""
+    return session_artifact(request, session_id, "kpi_analysis", "KPI analysis not found")
+
+@app.get("/api/v1/sessions")
+def list_sessions(
+    limit: int = 50,
+    offset: int = 0,
+    domain: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    min_savings: Optional[float] = None,
+    sort: str = "timestamp",
+    order: str = "desc",
+    catalog: SessionCatalog = Depends(get_session_catalog)
+):
+    """List processing sessions from the session catalog (paginated, filterable)
     
-    kpi_path = os.path.join(OUTPUT_DIR, session_id, "kpi_analysis.json")
-    if not os.path.exists(kpi_path):
-        raise HTTPException(status_code=404, detail="KPI analysis not found")
+    Sessions processed before the catalog existed can be indexed with
+    `python kevin_catalog.py backfill`.
+    """
     
-    with open(kpi_path, "r") as f:
-        kpi_analysis = json.load(f)
+    if sort not in SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    limit = max(1, min(limit, SESSION_PAGE_MAX))
+    offset = max(0, offset)
     
-    return kpi_analysis
-
-@app.get("/api/v1/sessions")
-async def list_sessions():
-    """List all processing sessions"""
-    
-    if not os.path.exists(OUTPUT_DIR):
-        return {"sessions": []}
-    
-    sessions = []
-    for session_id in os.listdir(OUTPUT_DIR):
-        session_path = os.path.join(OUTPUT_DIR, session_id)
-        if os.path.isdir(session_path):
-            result_path = os.path.join(session_path, "full_result.json")
-            if os.path.exists(result_path):
-                with open(result_path, "r") as f:
-                    result = json.load(f)
-                    sessions.append({
-                        "session_id": session_id,
-                        "timestamp": result.get("timestamp"),
-                        "domain": result.get("domain"),
-                        "automation_opportunities": len(result.get("automation_opportunities", [])),
-                        "test_cases": len(result.get("test_cases", []))
-                    })
-    
-    return {"sessions": sorted(sessions, key=lambda x: x["timestamp"], reverse=True)}
+    sessions, total = catalog.list(
+        limit=limit,
+        offset=offset,
+        domain=domain,
+        status=status,
+        since=since,
+        until=until,
+        min_savings=min_savings,
+        sort=sort,
+        descending=order == "desc"
+    )
+    
+    return {
+        "sessions": sessions,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "next_offset": offset + limit if offset + limit < total else None
+    }
 
 # ============================================================================
 # EXPORT ENDPOINTS
 # ============================================================================
 
 @app.get("/api/v1/export/{session_id}/package")
-async def export_package(session_id: str):
-    """Export complete package as ZIP"""
+def export_package(session_id: str, request: Request, mode: str = "auto"):
+    """Export complete package as a streamed ZIP
     
-    import zipfile
-    from io import BytesIO
+    mode: auto (store already-compressed artifacts, deflate the rest),
+    deflate or stored. Archives are deterministic, so interrupted downloads
+    can resume with a Range request (validated with If-Range).
+    """
+    
+    if mode not in ZIP_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(ZIP_MODES)}")
     
     output_dir = os.path.join(OUTPUT_DIR, session_id)
-    if not os.path.exists(output_dir):
+    if not os.path.isdir(output_dir):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Create ZIP in memory
-    zip_buffer = BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for root, dirs, files in os.walk(output_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, output_dir)
-                zip_file.write(file_path, arcname)
+    files = session_package(output_dir)
+    etag = package_etag(files, mode)
+    headers = {
+        "Content-Disposition": f"attachment; filename=kevin_ai_{session_id}.zip",
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{etag}"'
+    }
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == f'"{etag}"'):
+        size = zip_sizes.size_of(etag, files, mode)
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        
+        if byte_range is not None:
+            start, end = byte_range
+            return StreamingResponse(
+                slice_stream(iter_zip(files, mode), start, end),
+                status_code=206,
+                media_type="application/zip",
+                headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)}
+            )
     
-    zip_buffer.seek(0)
+    size = zip_sizes.get(etag)
+    if size is not None:
+        headers["Content-Length"] = str(size)
     
-    return Response(
-        content=zip_buffer.getvalue(),
+    return StreamingResponse(
+        zip_sizes.recording(etag, iter_zip(files, mode)),
         media_type="application/zip",
-        headers={"Content-Disposition": f"attachment; filename=kevin_ai_{session_id}.zip"}
+        headers=headers
     )
 
+@app.get("/api/v1/export/{session_id}/report")
+def export_report(session_id: str, format: str = "pdf", full: bool = False):
+    """Export the session report as PDF, PPTX or XLSX
+    
+    full=true (PDF only) includes every test case with its details and the
+    complete process maps. XLSX has one sheet each for opportunities, test
+    cases, KPIs and process steps. Full PDFs and workbooks are spooled to a
+    temporary file (on disk past 8 MB) and streamed from there. The session
+    result is loaded in memory, and ReportLab keeps the laid-out PDF pages
+    until the document is saved (see export_utils.create_pdf_report).
+    """
+    
+    if build_reports is None:
+        raise HTTPException(status_code=501, detail="Report export requires reportlab, python-pptx and openpyxl")
+    if format not in REPORT_MIME_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(REPORT_MIME_TYPES)}")
+    if full and format != "pdf":
+        raise HTTPException(status_code=400, detail="full is only supported for PDF reports")
+    
+    try:
+        result = load_full_result(os.path.join(OUTPUT_DIR, session_id))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    suffix = "_full" if full else ""
+    headers = {"Content-Disposition": f"attachment; filename=kevin_ai_report_{session_id}{suffix}.{format}"}
+    if format == "xlsx":
+        return StreamingResponse(stream_xlsx_report(result), media_type=REPORT_MIME_TYPES[format], headers=headers)
+    if full:
+        return StreamingResponse(stream_pdf_report(result), media_type=REPORT_MIME_TYPES[format], headers=headers)
+    return Response(build_reports(result, (format,))[format], media_type=REPORT_MIME_TYPES[format], headers=headers)
+
 # ============================================================================
 # MAIN
 # ============================================================================
 
 if __name__ == "__main__":
+    if API_WORKERS > 1 and JOB_MODE != "queue":
+        # Each process would run (and resume) jobs on its own pool
+        raise SystemExit("KEVIN_API_WORKERS > 1 requires KEVIN_JOB_MODE=queue with kevin_worker.py processes")
+    
     uvicorn.run(
         "kevin_api:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=API_WORKERS == 1,
+        workers=API_WORKERS,
         log_level="info"
     )
@@ -0,0 +1,133 @@
+"""
+Kevin AI - Artifact Index
+Per-session record index for paginated, filtered and projected artifact reads
+
+Version: 2.1
+Date: October 19, 2026
+"""
+
+import base64
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+INDEX_VERSION = 2
+
+# ============================================================================
+# INDEX SPECS
+# ============================================================================
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """How one artifact collection is indexed
+
+    filters: query parameter -> record value used for equality filtering
+    sorts: sort key name -> record value used for ordering
+    """
+    filters: Dict[str, Callable[[Dict], Any]]
+    sorts: Dict[str, Callable[[Dict], Any]]
+
+# ============================================================================
+# BUILDING
+# ============================================================================
+
+def _filter_value(value: Any) -> Optional[str]:
+    return None if value is None else str(value).strip().lower()
+
+def build_collection_index(records: List[Dict], spec: IndexSpec) -> Dict:
+    """Filter and sort keys of every record, stored next to the records"""
+    rows = [
+        {
+            "position": position,
+            "filters": {key: _filter_value(extract(record)) for key, extract in spec.filters.items()},
+            "sorts": {key: extract(record) for key, extract in spec.sorts.items()}
+        }
+        for position, record in enumerate(records)
+    ]
+    return {"version": INDEX_VERSION, "count": len(records), "rows": rows}
+
+# ============================================================================
+# QUERYING
+# ============================================================================
+
+def encode_cursor(position: int) -> str:
+    return base64.urlsafe_b64encode(str(position).encode("ascii")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """Start position encoded in a cursor; raises ValueError for a malformed cursor"""
+    if not cursor:
+        return 0
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        position = int(base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii"))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if position < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return position
+
+def _sort_key(value: Any) -> Tuple:
+    # Numbers before strings so mixed keys stay orderable (missing values are kept apart)
+    if isinstance(value, (int, float)):
+        return (0, value, "")
+    return (1, 0, str(value).lower())
+
+def project(record: Dict, fields: Optional[Sequence[str]]) -> Dict:
+    """Keep only the requested top-level (or dotted nested) fields"""
+    if not fields:
+        return record
+    projected: Dict = {}
+    for path in fields:
+        source, target = record, projected
+        parts = path.split(".")
+        for part in parts[:-1]:
+            if not isinstance(source, dict) or part not in source:
+                break
+            source = source[part]
+            target = target.setdefault(part, {})
+        else:
+            if isinstance(source, dict) and parts[-1] in source:
+                target[parts[-1]] = source[parts[-1]]
+    return projected
+
+def query_collection(
+    records: List[Dict],
+    index: Dict,
+    filters: Dict[str, Optional[str]],
+    sort: Optional[str] = None,
+    descending: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    fields: Optional[Sequence[str]] = None
+) -> Dict:
+    """One page of a collection; only the records on the page are projected
+
+    filters values may list alternatives separated by commas; without a sort
+    key records keep their artifact order (ranked, for opportunities). The cursor is
+    a position in the filtered, sorted sequence, which is stable because
+    session artifacts never change after they are written.
+    """
+    rows = index["rows"]
+    for key, wanted in filters.items():
+        if wanted:
+            accepted = {_filter_value(value) for value in wanted.split(",")}
+            rows = [row for row in rows if row["filters"].get(key) in accepted]
+
+    if sort:
+        # Stable sort: ties keep artifact order in both directions; records
+        # without the key come last either way
+        present = [row for row in rows if row["sorts"].get(sort) is not None]
+        missing = [row for row in rows if row["sorts"].get(sort) is None]
+        rows = sorted(present, key=lambda row: _sort_key(row["sorts"][sort]), reverse=descending) + missing
+
+    start = decode_cursor(cursor)
+    page = rows[start:start + limit]
+
+    items = [project(records[row["position"]], fields) for row in page]
+
+    next_position = start + len(page)
+    return {
+        "items": items,
+        "total": len(rows),
+        "limit": limit,
+        "next_cursor": encode_cursor(next_position) if next_position < len(rows) else None
+    }
@@ -0,0 +1,172 @@
+"""
+Kevin AI - Content-Addressed Blob Store
+Keeps large pipeline fields (SOP text, maps, architecture, code) out of AgentState
+
+Blobs are scoped to a pipeline run (one directory per session) and are
+deleted when the run ends; directories left by crashed runs are swept by age.
+
+Version: 2.1
+Date: October 19, 2026
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set
+
+from kevin_metrics import record_cache
+
+# ============================================================================
+# BLOB HANDLE
+# ============================================================================
+
+@dataclass(frozen=True)
+class BlobRef:
+    """Lazy handle to a stored blob; resolve with BlobStore.get / get_text"""
+    digest: str  # sha256 of the stored UTF-8 text
+    size: int    # stored size in bytes
+    kind: str    # "text" or "json"
+    scope: str = ""  # run (session) the blob belongs to
+
+    def __repr__(self) -> str:
+        return f"BlobRef({self.kind}:{self.digest[:12]}, {self.size} bytes)"
+
+# ============================================================================
+# BLOB STORE
+# ============================================================================
+
+class BlobStore:
+    """Content-addressed store with an in-memory LRU tier over a disk tier
+
+    Identical content is stored once per scope; clear_scope deletes a
+    finished run's blobs.
+    """
+
+    def __init__(self, root: str, memory_limit_bytes: int = 64 * 1024 * 1024):
+        self.root = root
+        self.memory_limit_bytes = memory_limit_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._scopes: Dict[str, Set[str]] = {}  # scope -> digests written in it
+        os.makedirs(root, exist_ok=True)
+
+    def _scope_dir(self, scope: str) -> str:
+        if os.path.basename(scope) != scope or scope in (".", ".."):
+            raise ValueError(f"Invalid blob scope: {scope!r}")
+        return os.path.join(self.root, scope)
+
+    def _path(self, digest: str, scope: str = "") -> str:
+        return os.path.join(self._scope_dir(scope) if scope else self.root, digest[:2], digest[2:])
+
+    def _remember(self, digest: str, text: str, size: int) -> None:
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                return
+            if size > self.memory_limit_bytes:
+                return
+            self._memory[digest] = text
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_limit_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted.encode("utf-8"))
+
+    def put_text(self, text: str, kind: str = "text", scope: str = "") -> BlobRef:
+        """Store text in a run's scope and return its handle (identical content is stored once)"""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest, scope)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._scopes.setdefault(scope, set()).add(digest)
+        self._remember(digest, text, len(data))
+        return BlobRef(digest=digest, size=len(data), kind=kind, scope=scope)
+
+    def put_json(self, obj: Any, scope: str = "") -> BlobRef:
+        """Store obj in its prompt-ready serialized form (json, indent=2)"""
+        return self.put_text(json.dumps(obj, indent=2, default=str), kind="json", scope=scope)
+
+    def get_text(self, ref: BlobRef) -> str:
+        """Stored text of a blob; for json blobs this is the serialized form"""
+        with self._lock:
+            text = self._memory.get(ref.digest)
+            if text is not None:
+                self._memory.move_to_end(ref.digest)
+        record_cache("blob_memory", text is not None)
+        if text is not None:
+            return text
+
+        with open(self._path(ref.digest, ref.scope), "rb") as f:
+            text = f.read().decode("utf-8")
+        self._remember(ref.digest, text, ref.size)
+        return text
+
+    def get(self, ref: BlobRef) -> Any:
+        """Decoded blob value (parsed object for json blobs)"""
+        text = self.get_text(ref)
+        return json.loads(text) if ref.kind == "json" else text
+
+    def resolve(self, value: Any) -> Any:
+        """Return value itself, or the blob it points to if it is a BlobRef"""
+        return self.get(value) if isinstance(value, BlobRef) else value
+
+    def resolve_text(self, value: Any, default: Optional[Any] = None) -> str:
+        """Serialized text for a BlobRef, or json.dumps(indent=2) of a plain value"""
+        if isinstance(value, BlobRef):
+            return self.get_text(value)
+        if isinstance(value, str):
+            return value
+        return json.dumps(default if value is None else value, indent=2, default=str)
+
+    def materialize(self, value: Any) -> Any:
+        """Recursively replace every BlobRef in dicts/lists with its value"""
+        if isinstance(value, BlobRef):
+            return self.get(value)
+        if isinstance(value, dict):
+            return {k: self.materialize(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.materialize(v) for v in value]
+        return value
+
+    def clear_scope(self, scope: str) -> None:
+        """Delete every blob of a finished run (its handles can no longer be resolved)"""
+        with self._lock:
+            for digest in self._scopes.pop(scope, ()):
+                text = self._memory.pop(digest, None)
+                if text is not None:
+                    self._memory_bytes -= len(text.encode("utf-8"))
+        shutil.rmtree(self._scope_dir(scope), ignore_errors=True)
+
+    def sweep(self, max_age_seconds: float) -> int:
+        """Delete scopes not written to for max_age_seconds (runs that never cleared theirs)"""
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for entry in os.scandir(self.root):
+            try:
+                if entry.stat().st_mtime >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            with self._lock:
+                if entry.name in self._scopes:
+                    continue  # a run of this process is still using it
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)
+            removed += 1
+        return removed
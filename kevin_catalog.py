@@ -0,0 +1,185 @@
+"""
+Kevin AI - Session Catalog
+SQLite index of processed sessions for fast, paginated session listings
+
+Version: 2.1
+Date: October 19, 2026
+
+Usage:
+    python kevin_catalog.py backfill [--output-dir ./outputs] [--db ./data/kevin_catalog.db]
+"""
+
+import argparse
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from kevin_opportunities import opportunity_savings
+from kevin_session_store import load_full_result, session_dirs
+
+SORT_COLUMNS = ("timestamp", "domain", "automation_opportunities", "test_cases", "estimated_savings_annual")
+
+# ============================================================================
+# SESSION CATALOG
+# ============================================================================
+
+class SessionCatalog:
+    """One row per session, written when the session completes"""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            timestamp TEXT,
+            domain TEXT,
+            automation_opportunities INTEGER NOT NULL DEFAULT 0,
+            test_cases INTEGER NOT NULL DEFAULT 0,
+            estimated_savings_annual REAL NOT NULL DEFAULT 0,
+            status TEXT NOT NULL,
+            errors INTEGER NOT NULL DEFAULT 0,
+            indexed_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_timestamp ON sessions (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_sessions_domain ON sessions (domain, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions (status, timestamp);
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self._SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(
+        self,
+        session_id: str,
+        timestamp: Optional[str],
+        domain: Optional[str],
+        automation_opportunities: int = 0,
+        test_cases: int = 0,
+        estimated_savings_annual: float = 0.0,
+        status: str = "completed",
+        errors: int = 0
+    ) -> None:
+        """Insert or replace the catalog row of a session"""
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO sessions
+                   (session_id, timestamp, domain, automation_opportunities, test_cases,
+                    estimated_savings_annual, status, errors, indexed_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (session_id, timestamp, domain, automation_opportunities, test_cases,
+                 estimated_savings_annual, status, errors, datetime.now().isoformat())
+            )
+
+    def record_result(self, session_id: str, result: Dict, status: str = "completed") -> None:
+        """Catalog a session from its full result dict"""
+        self.record(session_id, **summarize_result(result), status=status)
+
+    def list(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        domain: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        min_savings: Optional[float] = None,
+        sort: str = "timestamp",
+        descending: bool = True
+    ) -> Tuple[List[Dict], int]:
+        """Filtered page of sessions plus the total number of matches"""
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort column: {sort}")
+
+        clauses, params = [], []
+        if domain:
+            clauses.append("domain = ?")
+            params.append(domain)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if min_savings is not None:
+            clauses.append("estimated_savings_annual >= ?")
+            params.append(min_savings)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        direction = "DESC" if descending else "ASC"
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM sessions {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"""SELECT session_id, timestamp, domain, automation_opportunities, test_cases,
+                           estimated_savings_annual, status, errors
+                    FROM sessions {where}
+                    ORDER BY {sort} {direction}, session_id {direction}
+                    LIMIT ? OFFSET ?""",
+                (*params, limit, offset)
+            ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def backfill(self, output_dir: str, overwrite: bool = False) -> int:
+        """Catalog existing output directories; returns the number of sessions added"""
+        with self._connect() as conn:
+            known = {row[0] for row in conn.execute("SELECT session_id FROM sessions")}
+
+        added = 0
+        for session_id, session_dir in session_dirs(output_dir):
+            if session_id in known and not overwrite:
+                continue
+            try:
+                result = load_full_result(session_dir)
+            except (OSError, ValueError) as e:
+                print(f"Skipping {session_id}: {e}")
+                continue
+            self.record_result(session_id, result)
+            added += 1
+        return added
+
+def summarize_result(result: Dict) -> Dict:
+    """Catalog columns derived from a session result"""
+    opportunities = result.get("automation_opportunities") or []
+    return {
+        "timestamp": result.get("timestamp"),
+        "domain": result.get("domain"),
+        "automation_opportunities": len(opportunities),
+        "test_cases": len(result.get("test_cases") or []),
+        "estimated_savings_annual": sum(opportunity_savings(opp) for opp in opportunities if isinstance(opp, dict)),
+        "errors": len(result.get("errors") or [])
+    }
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kevin AI session catalog")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = subcommands.add_parser("backfill", help="Index existing session output directories")
+    backfill_parser.add_argument("--output-dir", default=os.getenv("KEVIN_OUTPUT_DIR", "./outputs"))
+    backfill_parser.add_argument("--db", default=os.getenv("KEVIN_CATALOG_DB", os.path.join(os.getenv("KEVIN_DATA_DIR", "./data"), "kevin_catalog.db")))
+    backfill_parser.add_argument("--overwrite", action="store_true", help="Re-index sessions already in the catalog")
+
+    args = parser.parse_args()
+    if args.command == "backfill":
+        catalog = SessionCatalog(args.db)
+        added = catalog.backfill(args.output_dir, overwrite=args.overwrite)
+        print(f"✅ Indexed {added} sessions from {args.output_dir} into {args.db}")
@@ -0,0 +1,117 @@
+"""
+Kevin AI - Near-Duplicate Detection
+Character shingling + MinHash with LSH banding for merging generated artifacts
+
+Version: 2.1
+Date: October 19, 2026
+"""
+
+import hashlib
+import re
+import struct
+from typing import Callable, Dict, List, Set, Tuple
+
+_DENSIFY_OFFSET = 1 << 58  # keeps borrowed bin values apart from genuine ones
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# ============================================================================
+# SHINGLING
+# ============================================================================
+
+def shingles(text: str, k: int = 5) -> Set[int]:
+    """64-bit hashes of the k-character shingles of normalized text
+
+    Text is lowercased and reduced to single-spaced words, so punctuation,
+    casing and plural/tense edits only disturb a few shingles.
+    """
+    normalized = " ".join(_WORD_RE.findall(text.lower()))
+    if len(normalized) < k:
+        normalized = normalized.ljust(k)
+    return {
+        struct.unpack("<Q", hashlib.blake2b(normalized[i:i + k].encode("utf-8"), digest_size=8).digest())[0]
+        for i in range(len(normalized) - k + 1)
+    }
+
+# ============================================================================
+# MINHASH
+# ============================================================================
+
+class MinHasher:
+    """One-permutation MinHash: each shingle hash lands in one of num_perm bins
+
+    Costs O(len(shingles)) per signature instead of O(num_perm * len(shingles)).
+    Empty bins borrow the next non-empty bin's value (rotation densification)
+    so short texts still produce comparable signatures.
+    """
+
+    def __init__(self, num_perm: int = 64):
+        self.num_perm = num_perm
+
+    def signature(self, shingle_set: Set[int]) -> Tuple[int, ...]:
+        n = self.num_perm
+        bins: List = [None] * n
+        for h in shingle_set:
+            b, value = h % n, h // n
+            if bins[b] is None or value < bins[b]:
+                bins[b] = value
+
+        if all(v is None for v in bins):
+            return tuple([0] * n)
+
+        filled = list(bins)
+        for i in range(n):
+            if bins[i] is None:
+                j = 1
+                while bins[(i + j) % n] is None:
+                    j += 1
+                filled[i] = bins[(i + j) % n] + j * _DENSIFY_OFFSET
+        return tuple(filled)
+
+    @staticmethod
+    def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the underlying shingle sets"""
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+# ============================================================================
+# DEDUPLICATION
+# ============================================================================
+
+def dedupe_near_duplicates(
+    items: List,
+    text_of: Callable[[object], str],
+    threshold: float = 0.8,
+    num_perm: int = 64,
+    bands: int = 16
+) -> Tuple[List, int]:
+    """Drop items whose text is a near duplicate of an earlier item
+
+    LSH banding only compares items that share at least one signature band,
+    so merging stays close to linear for hundreds of items. The first
+    occurrence wins, so callers control precedence through ordering.
+
+    Returns:
+        (kept items in original order, number of items dropped)
+    """
+    hasher = MinHasher(num_perm=num_perm)
+    rows = num_perm // bands
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+    kept_signatures: Dict[int, Tuple[int, ...]] = {}
+    kept: List = []
+    dropped = 0
+
+    for item in items:
+        sig = hasher.signature(shingles(text_of(item)))
+        band_keys = [(band, sig[band * rows:(band + 1) * rows]) for band in range(bands)]
+
+        candidates = {idx for key in band_keys for idx in buckets.get(key, [])}
+        if any(MinHasher.similarity(sig, kept_signatures[idx]) >= threshold for idx in candidates):
+            dropped += 1
+            continue
+
+        idx = len(kept)
+        kept.append(item)
+        kept_signatures[idx] = sig
+        for key in band_keys:
+            buckets.setdefault(key, []).append(idx)
+
+    return kept, dropped
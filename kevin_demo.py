@@ -11,24 +11,19 @@ import gradio as gr
 import os
 import json
 from datetime import datetime
-from kevin_agents import MasterOrchestratorAgent
+from kevin_agents import MasterOrchestratorAgent, get_shared_orchestrator
+from kevin_uploads import new_session_id
 from pathlib import Path
 
 # ============================================================================
 # GLOBAL SETUP
 # ============================================================================
 
-orchestrator = None
 current_session = None
 
-def get_orchestrator():
-    """Initialize orchestrator once"""
-    global orchestrator
-    if orchestrator is None:
-        print("🔄 Initializing Kevin AI Orchestrator...")
-        orchestrator = MasterOrchestratorAgent()
-        print("✅ Orchestrator ready!")
-    return orchestrator
+def get_orchestrator() -> MasterOrchestratorAgent:
+    """Process-wide orchestrator shared by all Gradio sessions"""
+    return get_shared_orchestrator()
 
 # ============================================================================
 # MAIN PROCESSING FUNCTION
@@ -44,6 +39,7 @@ def process_sop(sop_file, diagram_file, domain):
             None, None, "[]", "[]", "{}", "[]", "{}"
         )
     
+    session_id = new_session_id()
     try:
         # Initialize orchestrator
         orch = get_orchestrator()
@@ -78,7 +74,7 @@ def process_sop(sop_file, diagram_file, domain):
         print(f"Domain: {domain}")
         print(f"{'='*60}\n")
         
-        result = orch.process(sop_path, diagram_path, domain)
+        result = orch.process(sop_path, diagram_path, domain, session_id=session_id)
         current_session = result
         
         # Extract outputs
@@ -179,7 +175,7 @@ Please check:
 3. Environment variables are configured
 4. LLM API keys are valid
 
-**Session ID:** {datetime.now().strftime('%Y%m%d_%H%M%S')}
+**Session ID:** {session_id}
 """
         return (
             error_msg,
@@ -8,9 +8,7 @@ Demo Date: January 8, 2026
 """
 
 import streamlit as st
-import os
 import json
-from datetime import datetime
 from pathlib import Path
 
 # Set page config
@@ -23,26 +21,23 @@ st.set_page_config(
 
 # Import Kevin AI
 try:
-    from kevin_agents import MasterOrchestratorAgent
-    from export_utils import create_pdf_report, create_pptx_report
+    from kevin_agents import get_shared_orchestrator
+    from export_utils import REPORT_MIME_TYPES, build_reports
+    from kevin_uploads import new_session_id
 except ImportError as e:
     st.error(f"Failed to import modules: {e}")
     st.stop()
 
 # Initialize session state
-if 'orchestrator' not in st.session_state:
-    st.session_state.orchestrator = None
 if 'current_session' not in st.session_state:
     st.session_state.current_session = None
 if 'processing' not in st.session_state:
     st.session_state.processing = False
 
 def get_orchestrator():
-    """Initialize orchestrator once"""
-    if st.session_state.orchestrator is None:
-        with st.spinner("🔄 Initializing Kevin AI Orchestrator..."):
-            st.session_state.orchestrator = MasterOrchestratorAgent()
-    return st.session_state.orchestrator
+    """Process-wide orchestrator shared by every browser session"""
+    with st.spinner("🔄 Initializing Kevin AI Orchestrator..."):
+        return get_shared_orchestrator()
 
 def process_sop(sop_file, diagram_file, domain):
     """Process SOP through Kevin AI pipeline"""
@@ -53,7 +48,7 @@ def process_sop(sop_file, diagram_file, domain):
     
     try:
         # Save uploaded files
-        session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        session_id = new_session_id()
         upload_dir = Path("uploads") / session_id
         upload_dir.mkdir(parents=True, exist_ok=True)
         
@@ -80,7 +75,7 @@ def process_sop(sop_file, diagram_file, domain):
         progress_bar.progress(10)
         
         # Process
-        result = orch.process(str(sop_path), str(diagram_path) if diagram_path else None, domain)
+        result = orch.process(str(sop_path), str(diagram_path) if diagram_path else None, domain, session_id=session_id)
         st.session_state.current_session = result
         
         progress_bar.progress(100)
@@ -193,37 +188,32 @@ if st.session_state.current_session is not None:
     st.markdown("---")
     col1, col2, col3 = st.columns(3)
     
+    # Both formats are built together (and cached), so the second download is instant
     with col1:
         if st.button("📄 Export PDF Report", use_container_width=True):
             try:
-                pdf_path = f"kevin_ai_report_{result['session_id']}.pdf"
-                create_pdf_report(result, pdf_path)
-                with open(pdf_path, "rb") as f:
-                    st.download_button(
-                        "⬇️ Download PDF",
-                        f,
-                        file_name=pdf_path,
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
-                os.remove(pdf_path)
+                reports = build_reports(result)
+                st.download_button(
+                    "⬇️ Download PDF",
+                    reports['pdf'],
+                    file_name=f"kevin_ai_report_{result['session_id']}.pdf",
+                    mime=REPORT_MIME_TYPES['pdf'],
+                    use_container_width=True
+                )
             except Exception as e:
                 st.error(f"Failed to create PDF: {e}")
     
     with col2:
         if st.button("📊 Export PPTX Report", use_container_width=True):
             try:
-                pptx_path = f"kevin_ai_report_{result['session_id']}.pptx"
-                create_pptx_report(result, pptx_path)
-                with open(pptx_path, "rb") as f:
-                    st.download_button(
-                        "⬇️ Download PPTX",
-                        f,
-                        file_name=pptx_path,
-                        mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-                        use_container_width=True
-                    )
-                os.remove(pptx_path)
+                reports = build_reports(result)
+                st.download_button(
+                    "⬇️ Download PPTX",
+                    reports['pptx'],
+                    file_name=f"kevin_ai_report_{result['session_id']}.pptx",
+                    mime=REPORT_MIME_TYPES['pptx'],
+                    use_container_width=True
+                )
             except Exception as e:
                 st.error(f"Failed to create PPTX: {e}")
     
@@ -266,33 +256,25 @@ if st.session_state.current_session is not None:
             with col2:
                 if st.button("🖼️ Export as PNG", key="current_png"):
                     try:
-                        from export_utils import mermaid_to_image
-                        png_path = f"current_state_{result['session_id']}.png"
-                        mermaid_to_image(result['current_state_map'], png_path, 'png')
-                        with open(png_path, "rb") as f:
-                            st.download_button(
-                                "⬇️ Download PNG",
-                                f,
-                                file_name=png_path,
-                                mime="image/png"
-                            )
-                        os.remove(png_path)
+                        from export_utils import render_diagram
+                        st.download_button(
+                            "⬇️ Download PNG",
+                            render_diagram(result['current_state_map'], 'png'),
+                            file_name=f"current_state_{result['session_id']}.png",
+                            mime="image/png"
+                        )
                     except Exception as e:
                         st.error(f"Error: {e}")
             with col3:
                 if st.button("🖼️ Export as JPG", key="current_jpg"):
                     try:
-                        from export_utils import mermaid_to_image
-                        jpg_path = f"current_state_{result['session_id']}.jpg"
-                        mermaid_to_image(result['current_state_map'], jpg_path, 'jpg')
-                        with open(jpg_path, "rb") as f:
-                            st.download_button(
-                                "⬇️ Download JPG",
-                                f,
-                                file_name=jpg_path,
-                                mime="image/jpeg"
-                            )
-                        os.remove(jpg_path)
+                        from export_utils import render_diagram
+                        st.download_button(
+                            "⬇️ Download JPG",
+                            render_diagram(result['current_state_map'], 'jpg'),
+                            file_name=f"current_state_{result['session_id']}.jpg",
+                            mime="image/jpeg"
+                        )
                     except Exception as e:
                         st.error(f"Error: {e}")
         else:
@@ -314,33 +296,25 @@ if st.session_state.current_session is not None:
             with col2:
                 if st.button("🖼️ Export as PNG", key="future_png"):
                     try:
-                        from export_utils import mermaid_to_image
-                        png_path = f"future_state_{result['session_id']}.png"
-                        mermaid_to_image(result['future_state_map'], png_path, 'png')
-                        with open(png_path, "rb") as f:
-                            st.download_button(
-                                "⬇️ Download PNG",
-                                f,
-                                file_name=png_path,
-                                mime="image/png"
-                            )
-                        os.remove(png_path)
+                        from export_utils import render_diagram
+                        st.download_button(
+                            "⬇️ Download PNG",
+                            render_diagram(result['future_state_map'], 'png'),
+                            file_name=f"future_state_{result['session_id']}.png",
+                            mime="image/png"
+                        )
                     except Exception as e:
                         st.error(f"Error: {e}")
             with col3:
                 if st.button("🖼️ Export as JPG", key="future_jpg"):
                     try:
-                        from export_utils import mermaid_to_image
-                        jpg_path = f"future_state_{result['session_id']}.jpg"
-                        mermaid_to_image(result['future_state_map'], jpg_path, 'jpg')
-                        with open(jpg_path, "rb") as f:
-                            st.download_button(
-                                "⬇️ Download JPG",
-                                f,
-                                file_name=jpg_path,
-                                mime="image/jpeg"
-                            )
-                        os.remove(jpg_path)
+                        from export_utils import render_diagram
+                        st.download_button(
+                            "⬇️ Download JPG",
+                            render_diagram(result['future_state_map'], 'jpg'),
+                            file_name=f"future_state_{result['session_id']}.jpg",
+                            mime="image/jpeg"
+                        )
                     except Exception as e:
                         st.error(f"Error: {e}")
         else:
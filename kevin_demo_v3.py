@@ -7,9 +7,7 @@ Date: January 6, 2026
 """
 
 import streamlit as st
-import os
 import json
-from datetime import datetime
 from pathlib import Path
 import pandas as pd
 
@@ -23,8 +21,9 @@ st.set_page_config(
 
 # Import Kevin AI
 try:
-    from kevin_agents import MasterOrchestratorAgent
-    from export_utils import create_pdf_report, mermaid_to_image
+    from kevin_agents import get_shared_orchestrator, PIPELINE_NODES
+    from export_utils import REPORT_MIME_TYPES, build_reports, render_diagram
+    from kevin_uploads import new_session_id
 except ImportError as e:
     st.error(f"Failed to import modules: {e}")
     st.stop()
@@ -61,8 +60,6 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if 'orchestrator' not in st.session_state:
-    st.session_state.orchestrator = None
 if 'current_session' not in st.session_state:
     st.session_state.current_session = None
 if 'processing' not in st.session_state:
@@ -73,11 +70,9 @@ if 'selected_test_case' not in st.session_state:
     st.session_state.selected_test_case = None
 
 def get_orchestrator():
-    """Initialize orchestrator once"""
-    if st.session_state.orchestrator is None:
-        with st.spinner("🔄 Initializing Kevin AI..."):
-            st.session_state.orchestrator = MasterOrchestratorAgent()
-    return st.session_state.orchestrator
+    """Process-wide orchestrator shared by every browser session"""
+    with st.spinner("🔄 Initializing Kevin AI..."):
+        return get_shared_orchestrator()
 
 def process_sop(sop_file, diagram_file, industry, process_type, erp_system, risk_sensitivity):
     """Process SOP through Kevin AI pipeline"""
@@ -88,7 +83,7 @@ def process_sop(sop_file, diagram_file, industry, process_type, erp_system, risk
     
     try:
         # Save uploaded files
-        session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        session_id = new_session_id()
         upload_dir = Path("uploads") / session_id
         upload_dir.mkdir(parents=True, exist_ok=True)
         
@@ -113,29 +108,35 @@ def process_sop(sop_file, diagram_file, industry, process_type, erp_system, risk
             progress_bar = st.progress(0)
             status_text = st.empty()
         
-        # Phase updates
-        phases = [
-            (10, "🔄 Analyzing SOP document..."),
-            (25, "📊 Creating current state map..."),
-            (40, "🤖 Identifying automation opportunities..."),
-            (60, "🚀 Designing optimized future state..."),
-            (75, "🧪 Generating test scenarios..."),
-            (90, "💻 Creating production code..."),
-            (95, "📈 Calculating ROI metrics..."),
-        ]
+        # Real progress: the orchestrator streams node and artifact events
+        node_messages = {
+            "sop_analysis": "🔄 Analyzing SOP document...",
+            "process_mapping": "📊 Creating current state map...",
+            "gap_identification": "🔎 Checking for gaps...",
+            "automation_opportunity": "🤖 Identifying automation opportunities...",
+            "future_state_design": "🚀 Designing optimized future state...",
+            "test_case_generation": "🧪 Generating test scenarios...",
+            "code_generation": "💻 Creating production code...",
+            "kpi_calculation": "📈 Calculating ROI metrics...",
+        }
+        with progress_container:
+            preview = st.empty()
         
         import threading
-        import time
+        import queue
         
         result_container = {}
         error_container = {}
+        events = queue.Queue()
         
         def process_thread():
             try:
                 result_container['result'] = orch.process(
                     str(sop_path), 
                     str(diagram_path) if diagram_path else None, 
-                    industry
+                    industry,
+                    session_id=session_id,
+                    on_event=events.put
                 )
             except Exception as e:
                 error_container['error'] = e
@@ -143,19 +144,28 @@ def process_sop(sop_file, diagram_file, industry, process_type, erp_system, risk
         thread = threading.Thread(target=process_thread)
         thread.start()
         
-        phase_idx = 0
-        elapsed = 0
-        
-        while thread.is_alive() and elapsed < 900:
-            if phase_idx < len(phases):
-                progress, message = phases[phase_idx]
-                progress_bar.progress(progress)
-                status_text.text(message)
-                phase_idx += 1
-            time.sleep(120)
-            elapsed += 120
-        
-        thread.join(timeout=10)
+        current_node = None
+        while thread.is_alive() or not events.empty():
+            try:
+                event = events.get(timeout=1)
+            except queue.Empty:
+                continue
+            
+            if event.get("event") == "node_started":
+                current_node = event["node"]
+                done = PIPELINE_NODES.index(current_node) if current_node in PIPELINE_NODES else 0
+                progress_bar.progress(int(100 * done / len(PIPELINE_NODES)))
+                status_text.text(node_messages.get(current_node, f"Running {current_node}..."))
+            elif event.get("event") == "llm_progress" and current_node and not event.get("done"):
+                status_text.text(f"{node_messages.get(current_node, current_node)} ({event['chunks']} chunks received)")
+            elif event.get("event") == "artifact" and event.get("artifact") == "current_state_map":
+                # Show the current state map as soon as it exists
+                with preview.container():
+                    st.markdown("**Current State Map (preview)**")
+                    st.code(event["value"])
+        
+        thread.join()
+        preview.empty()
         
         if 'error' in error_container:
             raise error_container['error']
@@ -177,7 +187,6 @@ def process_sop(sop_file, diagram_file, industry, process_type, erp_system, risk
         
         progress_bar.progress(100)
         status_text.text("✅ Processing Complete!")
-        time.sleep(1)
         
         return result
         
@@ -372,17 +381,14 @@ elif st.session_state.page == 'results':
     st.markdown("---")
     if st.button("📄 Export Complete PDF Report", use_container_width=True):
         try:
-            pdf_path = f"kevin_ai_report_{result['session_id']}.pdf"
-            create_pdf_report(result, pdf_path)
-            with open(pdf_path, "rb") as f:
-                st.download_button(
-                    "⬇️ Download PDF Report",
-                    f,
-                    file_name=pdf_path,
-                    mime="application/pdf",
-                    use_container_width=True
-                )
-            os.remove(pdf_path)
+            pdf = build_reports(result, ('pdf',))['pdf']
+            st.download_button(
+                "⬇️ Download PDF Report",
+                pdf,
+                file_name=f"kevin_ai_report_{result['session_id']}.pdf",
+                mime=REPORT_MIME_TYPES['pdf'],
+                use_container_width=True
+            )
             st.success("✅ PDF Report Generated!")
         except Exception as e:
             st.error(f"Failed to create PDF: {e}")
@@ -409,20 +415,17 @@ elif st.session_state.page == 'results':
             
             with col1:
                 try:
-                    # Generate PNG image
-                    png_path = f"current_state_{result['session_id']}.png"
-                    mermaid_to_image(result['current_state_map'], png_path, 'png')
-                    st.image(png_path, use_container_width=True)
+                    # Rendered once per diagram; reruns are served from the diagram cache
+                    png_bytes = render_diagram(result['current_state_map'], 'png')
+                    st.image(png_bytes, use_container_width=True)
                     
                     # Download button
-                    with open(png_path, "rb") as f:
-                        st.download_button(
-                            "📥 Download Process Map (PNG)",
-                            f,
-                            file_name=png_path,
-                            mime="image/png"
-                        )
-                    os.remove(png_path)
+                    st.download_button(
+                        "📥 Download Process Map (PNG)",
+                        png_bytes,
+                        file_name=f"current_state_{result['session_id']}.png",
+                        mime="image/png"
+                    )
                 except Exception as e:
                     st.warning("Could not generate image, showing Mermaid code:")
                     st.code(result['current_state_map'], language='mermaid')
@@ -0,0 +1,150 @@
+"""
+Kevin AI - Rendered Diagram Cache
+Rendered diagram images keyed by content hash, with a memory and a disk tier
+
+Version: 2.1
+Date: October 19, 2026
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from kevin_metrics import record_cache
+
+# Bump when rendering output changes so stale images are not served
+RENDER_VERSION = "1"
+
+DIAGRAM_CACHE_DIR = os.getenv("KEVIN_DIAGRAM_CACHE_DIR", os.path.join(os.getenv("KEVIN_DATA_DIR", "./data"), "diagram_cache"))
+DIAGRAM_MEMORY_MB = int(os.getenv("KEVIN_DIAGRAM_MEMORY_MB", "32"))
+DIAGRAM_DISK_MB = int(os.getenv("KEVIN_DIAGRAM_DISK_MB", "256"))
+
+def diagram_key(source: str, format: str, theme: str, scale: float = 1.0) -> str:
+    """Content hash of everything that determines the rendered bytes"""
+    digest = hashlib.sha256()
+    for part in (RENDER_VERSION, format, theme, repr(float(scale)), source or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+# ============================================================================
+# DIAGRAM CACHE
+# ============================================================================
+
+class DiagramCache:
+    """In-memory LRU over an on-disk directory, both bounded by total bytes
+
+    The disk tier is shared by every process using the same directory;
+    least recently read files are evicted first.
+    """
+
+    def __init__(self, root: str, memory_limit_bytes: int, disk_limit_bytes: int):
+        self.root = root
+        self.memory_limit_bytes = memory_limit_bytes
+        self.disk_limit_bytes = disk_limit_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: Optional[int] = None  # measured on the first write
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:])
+
+    def _remember(self, key: str, data: bytes) -> None:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            if len(data) > self.memory_limit_bytes:
+                return
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.memory_limit_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+        record_cache("diagram_memory", data is not None)
+        if data is not None:
+            return data
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # recency for disk eviction
+        except FileNotFoundError:
+            data = None
+        record_cache("diagram_disk", data is not None)
+        if data is not None:
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._remember(key, data)
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            else:
+                self._disk_bytes += len(data)
+            over = self._disk_bytes > self.disk_limit_bytes
+        if over:
+            self._evict_disk()
+
+    def get_or_render(self, key: str, render: Callable[[], bytes]) -> bytes:
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def _disk_files(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # evicted by another process
+                yield path, stat.st_size, stat.st_mtime
+
+    def _evict_disk(self) -> None:
+        """Delete least recently used files until the disk tier is at 90% of its limit"""
+        files = sorted(self._disk_files(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in files)
+        target = self.disk_limit_bytes * 0.9
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+# Global diagram cache instance
+diagram_cache = None
+
+def get_diagram_cache() -> DiagramCache:
+    """Process-wide diagram cache"""
+    global diagram_cache
+    if diagram_cache is None:
+        diagram_cache = DiagramCache(DIAGRAM_CACHE_DIR, DIAGRAM_MEMORY_MB * 1024 * 1024, DIAGRAM_DISK_MB * 1024 * 1024)
+    return diagram_cache
@@ -0,0 +1,197 @@
+"""
+Kevin AI - Artifact HTTP Responses
+Cached, conditional and compressed responses for immutable session artifacts
+
+Version: 2.1
+Date: October 19, 2026
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+from kevin_session_store import read_section
+
+try:
+    import brotli  # optional; gzip is used when it is not installed
+except ImportError:
+    brotli = None
+
+# Session artifacts never change once written
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MIN_COMPRESS_BYTES = 1024
+
+# ============================================================================
+# PARSED ARTIFACT CACHE
+# ============================================================================
+
+@dataclass
+class Artifact:
+    """One artifact file: parsed value, response body and compressed variants"""
+    value: Any
+    body: bytes
+    etag: str  # unquoted; encoded variants append "-<encoding>"
+    media_type: str
+    key: Optional[Tuple[str, int, int, Optional[str]]] = None
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.encoded.values())
+
+class ArtifactCache:
+    """LRU of hot artifacts keyed by (path, mtime, size, section), bounded by bytes"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int, int, Optional[str]], Artifact]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, kind: str = "json", section: Optional[str] = None) -> Artifact:
+        """Artifact for a file, or one section of a session container (kind: json or text)
+
+        Raises FileNotFoundError for a missing file or section.
+        """
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size, section)
+
+        with self._lock:
+            artifact = self._entries.get(key)
+            if artifact is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return artifact
+            self.misses += 1
+
+        artifact = _load_artifact(path, kind, section)
+        artifact.key = key
+        self._store(key, artifact)
+        return artifact
+
+    def encoded(self, artifact: Artifact, encoding: str) -> bytes:
+        """Compressed body for an encoding, compressed once per cached artifact"""
+        data = artifact.encoded.get(encoding)
+        if data is None:
+            data = compress(artifact.body, encoding)
+            with self._lock:
+                if encoding not in artifact.encoded and self._entries.get(artifact.key) is artifact:
+                    artifact.encoded[encoding] = data
+                    self._bytes += len(data)
+                    self._evict()
+        return data
+
+    def _store(self, key: Tuple[str, int, int, Optional[str]], artifact: Artifact) -> None:
+        with self._lock:
+            if key in self._entries or artifact.size() > self.max_bytes:
+                return
+            self._entries[key] = artifact
+            self._bytes += artifact.size()
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size()
+
+def _load_artifact(path: str, kind: str, section: Optional[str]) -> Artifact:
+    if section is not None:
+        raw = read_section(path, section)  # decodes only this section
+    else:
+        with open(path, "rb") as f:
+            raw = f.read()
+
+    if kind == "json":
+        value = orjson.loads(raw)
+        # Container sections are already compact JSON
+        body = raw if section is not None else orjson.dumps(value)
+        media_type = "application/json"
+    else:
+        value = raw.decode("utf-8")
+        body = raw
+        media_type = "text/plain; charset=utf-8"
+
+    return Artifact(value=value, body=body, etag=hashlib.sha256(body).hexdigest()[:32], media_type=media_type)
+
+# ============================================================================
+# CONTENT NEGOTIATION
+# ============================================================================
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    return body
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """Best supported encoding the client accepts (br, gzip or identity)"""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+
+    for encoding in (("br",) if brotli is not None else ()) + ("gzip",):
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak If-None-Match comparison that accepts any encoded variant of etag"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        tag = tag[2:] if tag.startswith("W/") else tag
+        if tag.strip('"').split("-", 1)[0] == etag:
+            return True
+    return False
+
+def artifact_response(
+    request: Request,
+    cache: ArtifactCache,
+    path: str,
+    kind: str = "json",
+    filename: Optional[str] = None,
+    section: Optional[str] = None
+) -> Response:
+    """Serve an artifact with a strong ETag, immutable caching, 304s and compression"""
+    artifact = cache.get(path, kind, section)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if len(artifact.body) < MIN_COMPRESS_BYTES:
+        encoding = "identity"
+    headers = {
+        "ETag": f'"{artifact.etag}"' if encoding == "identity" else f'"{artifact.etag}-{encoding}"',
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding"
+    }
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    if etag_matches(request.headers.get("if-none-match"), artifact.etag):
+        return Response(status_code=304, headers=headers)
+
+    body = artifact.body
+    if encoding != "identity":
+        body = cache.encoded(artifact, encoding)
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=artifact.media_type, headers=headers)
@@ -0,0 +1,1076 @@
+"""
+Kevin AI - Pipeline Jobs
+SQLite-backed job records, queues and workers for SOP processing
+
+Version: 2.1
+Date: October 19, 2026
+
+Deployment modes:
+- local: the API process runs jobs on its own thread pool (JobManager)
+- queue: API processes only enqueue; kevin_worker.py processes lease jobs
+  from a shared queue (SqliteJobQueue, or RedisJobQueue) and keep their
+  leases alive with heartbeats. Events go through SqliteJobEventLog so
+  every API process can stream them.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Job statuses
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_HELD = "held"  # batch item waiting for a free slot in its batch
+JOB_ACTIVE = (JOB_HELD, JOB_QUEUED, JOB_RUNNING)
+
+# Claim order (lower first): interactive single-SOP jobs before batch items
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+# Batch statuses
+BATCH_RUNNING = "running"
+BATCH_DONE = "done"
+
+# Submission outcomes
+SUBMIT_NEW = "new"
+SUBMIT_ATTACHED = "attached"    # joined an identical queued/running job
+SUBMIT_COMPLETED = "completed"  # reused an identical finished job
+
+# ============================================================================
+# JOB STORE
+# ============================================================================
+
+class JobStore:
+    """Persistent job records (survive API restarts)"""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            session_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            node TEXT,
+            params TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            dedup_key TEXT,
+            lease_owner TEXT,
+            lease_expires_at REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            priority INTEGER NOT NULL DEFAULT 0,
+            est_tokens INTEGER,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT,
+            updated_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+        CREATE TABLE IF NOT EXISTS batches (
+            batch_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            params TEXT NOT NULL,
+            max_concurrency INTEGER NOT NULL,
+            summary TEXT,
+            created_at TEXT NOT NULL,
+            finished_at TEXT,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS batch_items (
+            batch_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            job_id TEXT NOT NULL,
+            deduplicated TEXT,
+            PRIMARY KEY (batch_id, position)
+        );
+        CREATE INDEX IF NOT EXISTS idx_batch_items_job ON batch_items (job_id);
+        CREATE TABLE IF NOT EXISTS submission_stats (
+            outcome TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        );
+    """
+    # Columns added after the first release; added to existing databases on startup
+    _MIGRATIONS = {
+        "dedup_key": "TEXT",
+        "lease_owner": "TEXT",
+        "lease_expires_at": "REAL",
+        "attempts": "INTEGER NOT NULL DEFAULT 0",
+        "batch_id": "TEXT",
+        "priority": "INTEGER NOT NULL DEFAULT 0",
+        "est_tokens": "INTEGER"
+    }
+    _INDEXES = """
+        CREATE INDEX IF NOT EXISTS idx_jobs_dedup ON jobs (dedup_key, created_at);
+        CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, lease_expires_at);
+        CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch_id, status);
+        CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, priority, created_at);
+    """
+    _JSON_COLUMNS = ("params", "result")
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self._SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, definition in self._MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+            conn.executescript(self._INDEXES)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _to_dict(self, row: Optional[sqlite3.Row]) -> Optional[Dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        for column in self._JSON_COLUMNS:
+            if job.get(column) is not None:
+                job[column] = json.loads(job[column])
+        return job
+
+    def create(
+        self,
+        session_id: str,
+        params: Dict,
+        job_id: Optional[str] = None,
+        dedup_key: Optional[str] = None,
+        batch_id: Optional[str] = None,
+        status: str = JOB_QUEUED,
+        priority: int = PRIORITY_INTERACTIVE,
+        est_tokens: Optional[int] = None
+    ) -> Dict:
+        """Record a new queued (or held) job"""
+        job_id = job_id or uuid.uuid4().hex
+        with self._connect() as conn:
+            self._insert(conn, job_id, session_id, params, dedup_key, batch_id, status, priority, est_tokens)
+        return self.get(job_id)
+
+    def create_unique(
+        self,
+        session_id: str,
+        params: Dict,
+        dedup_key: str,
+        batch_id: Optional[str] = None,
+        status: str = JOB_QUEUED,
+        priority: int = PRIORITY_INTERACTIVE,
+        est_tokens: Optional[int] = None
+    ) -> Tuple[Dict, bool]:
+        """Record a new job unless one with this dedup key is active; returns (job, created)
+
+        The lookup and the insert share one write transaction, so identical
+        submissions from several API processes never both create a job.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"""SELECT job_id FROM jobs WHERE dedup_key = ? AND status IN ({", ".join("?" for _ in JOB_ACTIVE)})
+                    ORDER BY created_at DESC LIMIT 1""",
+                (dedup_key, *JOB_ACTIVE)
+            ).fetchone()
+            if row is not None:
+                job_id, created = row["job_id"], False
+            else:
+                job_id, created = uuid.uuid4().hex, True
+                self._insert(conn, job_id, session_id, params, dedup_key, batch_id, status, priority, est_tokens)
+        return self.get(job_id), created
+
+    def _insert(self, conn, job_id, session_id, params, dedup_key, batch_id, status, priority, est_tokens) -> None:
+        now = datetime.now().isoformat()
+        conn.execute(
+            """INSERT INTO jobs (job_id, session_id, status, params, dedup_key, batch_id, priority, est_tokens, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (job_id, session_id, status, json.dumps(params), dedup_key, batch_id, priority, est_tokens, now, now)
+        )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            return self._to_dict(conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone())
+
+    def update(self, job_id: str, **fields) -> None:
+        """Update columns of a job (JSON columns are serialized)"""
+        for column in self._JSON_COLUMNS:
+            if column in fields and fields[column] is not None:
+                fields[column] = json.dumps(fields[column], default=str)
+        fields["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def find_by_dedup_key(self, dedup_key: str, statuses: Tuple[str, ...]) -> Optional[Dict]:
+        """Most recent job with this dedup key in one of the given statuses"""
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._connect() as conn:
+            return self._to_dict(conn.execute(
+                f"SELECT * FROM jobs WHERE dedup_key = ? AND status IN ({placeholders}) ORDER BY created_at DESC LIMIT 1",
+                (dedup_key, *statuses)
+            ).fetchone())
+
+    def count_submission(self, outcome: str, forced: bool = False) -> None:
+        """Add a submission to the persisted dedup counters (shared by all API processes)"""
+        keys = ["submissions", outcome] + (["forced"] if forced else [])
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO submission_stats (outcome, count) VALUES (?, 1) ON CONFLICT(outcome) DO UPDATE SET count = count + 1",
+                [(key,) for key in keys]
+            )
+
+    def submission_counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            return {row["outcome"]: row["count"] for row in conn.execute("SELECT outcome, count FROM submission_stats")}
+
+    def unfinished(self) -> List[Dict]:
+        """Queued or running jobs, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JOB_QUEUED, JOB_RUNNING)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def queued_jobs(self) -> List[Dict]:
+        """Jobs waiting to be claimed, in claim order"""
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(
+                """SELECT job_id, priority, est_tokens, created_at FROM jobs WHERE status = ?
+                   ORDER BY priority, created_at""",
+                (JOB_QUEUED,)
+            )]
+
+    def running_jobs(self) -> List[Dict]:
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(
+                "SELECT job_id, priority, est_tokens, started_at FROM jobs WHERE status = ?", (JOB_RUNNING,)
+            )]
+
+    def status_counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            return {row["status"]: row["n"] for row in conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+
+    def recent_done(self, limit: int) -> List[Dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id, est_tokens, result FROM jobs WHERE status = ? ORDER BY finished_at DESC LIMIT ?",
+                (JOB_DONE, limit)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    # ------------------------------------------------------------------
+    # Batches
+    # ------------------------------------------------------------------
+
+    def create_batch(self, params: Dict, max_concurrency: int) -> str:
+        now = datetime.now().isoformat()
+        batch_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO batches (batch_id, status, params, max_concurrency, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (batch_id, BATCH_RUNNING, json.dumps(params), max_concurrency, now, now)
+            )
+        return batch_id
+
+    def add_batch_item(self, batch_id: str, position: int, filename: str, job_id: str, deduplicated: Optional[str] = None) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO batch_items (batch_id, position, filename, job_id, deduplicated) VALUES (?, ?, ?, ?, ?)",
+                (batch_id, position, filename, job_id, deduplicated)
+            )
+
+    def get_batch(self, batch_id: str) -> Optional[Dict]:
+        """Batch record with its items joined to their jobs"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM batches WHERE batch_id = ?", (batch_id,)).fetchone()
+            if row is None:
+                return None
+            items = conn.execute(
+                """SELECT bi.position, bi.filename, bi.deduplicated, j.*
+                   FROM batch_items bi JOIN jobs j ON j.job_id = bi.job_id
+                   WHERE bi.batch_id = ? ORDER BY bi.position""",
+                (batch_id,)
+            ).fetchall()
+        batch = dict(row)
+        batch["params"] = json.loads(batch["params"])
+        batch["summary"] = json.loads(batch["summary"]) if batch["summary"] else None
+        batch["items"] = [self._to_dict(item) for item in items]
+        return batch
+
+    def update_batch(self, batch_id: str, **fields) -> None:
+        if "summary" in fields and fields["summary"] is not None:
+            fields["summary"] = json.dumps(fields["summary"], default=str)
+        fields["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE batches SET {assignments} WHERE batch_id = ?", (*fields.values(), batch_id))
+
+    def batches_for_job(self, job_id: str) -> List[str]:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT batch_id FROM batch_items WHERE job_id = ?", (job_id,))]
+
+    def open_batch_ids(self) -> List[str]:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT batch_id FROM batches WHERE status = ?", (BATCH_RUNNING,))]
+
+    def promote(self, job_id: str) -> Optional[Dict]:
+        """Queue a held or queued batch job at interactive priority; None if it is not waiting"""
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            changed = conn.execute(
+                "UPDATE jobs SET status = ?, priority = ?, updated_at = ? WHERE job_id = ? AND status IN (?, ?) AND priority > ?",
+                (JOB_QUEUED, PRIORITY_INTERACTIVE, now, job_id, JOB_HELD, JOB_QUEUED, PRIORITY_INTERACTIVE)
+            ).rowcount
+        return self.get(job_id) if changed else None
+
+    def release_held(self, batch_id: str) -> List[Dict]:
+        """Queue held jobs of a batch while it has fewer than max_concurrency active jobs"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            limit = conn.execute("SELECT max_concurrency FROM batches WHERE batch_id = ?", (batch_id,)).fetchone()
+            if limit is None:
+                return []
+            active = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE batch_id = ? AND status IN (?, ?)",
+                (batch_id, JOB_QUEUED, JOB_RUNNING)
+            ).fetchone()[0]
+            job_ids = [row[0] for row in conn.execute(
+                "SELECT job_id FROM jobs WHERE batch_id = ? AND status = ? ORDER BY created_at LIMIT ?",
+                (batch_id, JOB_HELD, max(0, limit[0] - active))
+            )]
+            now = datetime.now().isoformat()
+            for job_id in job_ids:
+                conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?", (JOB_QUEUED, now, job_id))
+        return [self.get(job_id) for job_id in job_ids]
+
+    def try_complete_batch(self, batch_id: str) -> bool:
+        """Mark a batch done once none of its items is active; True only for the caller that did it"""
+        with self._connect() as conn:
+            return conn.execute(
+                f"""UPDATE batches SET status = ?, finished_at = ?, updated_at = ?
+                    WHERE batch_id = ? AND status = ? AND NOT EXISTS (
+                        SELECT 1 FROM batch_items bi JOIN jobs j ON j.job_id = bi.job_id
+                        WHERE bi.batch_id = ? AND j.status IN ({", ".join("?" for _ in JOB_ACTIVE)})
+                    )""",
+                (BATCH_DONE, datetime.now().isoformat(), datetime.now().isoformat(), batch_id, BATCH_RUNNING, batch_id, *JOB_ACTIVE)
+            ).rowcount == 1
+
+    # ------------------------------------------------------------------
+    # Leasing (queue mode)
+    # ------------------------------------------------------------------
+
+    def claim(
+        self,
+        owner: str,
+        lease_seconds: Optional[float],
+        job_id: Optional[str] = None,
+        admit: Optional[Callable[[List[Dict], Dict], bool]] = None
+    ) -> Optional[Dict]:
+        """Atomically move a queued job (the next in claim order, or job_id) to running
+
+        admit(running_jobs, job) may refuse the claim. It runs inside the
+        write transaction, so concurrent claimers always see each other's
+        jobs. Without lease_seconds the lease never expires (local mode).
+        """
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE takes SQLite's write lock, so two workers never claim the same row
+            conn.execute("BEGIN IMMEDIATE")
+            if job_id:
+                row = conn.execute("SELECT * FROM jobs WHERE job_id = ? AND status = ?", (job_id, JOB_QUEUED)).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY priority, created_at LIMIT 1", (JOB_QUEUED,)
+                ).fetchone()
+            if row is None:
+                return None
+            if admit is not None:
+                running = [dict(running_row) for running_row in conn.execute(
+                    "SELECT job_id, priority, est_tokens, started_at FROM jobs WHERE status = ?", (JOB_RUNNING,)
+                )]
+                if not admit(running, self._to_dict(row)):
+                    return None
+            conn.execute(
+                """UPDATE jobs SET status = ?, lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1,
+                       started_at = ?, node = NULL, updated_at = ?
+                   WHERE job_id = ?""",
+                (JOB_RUNNING, owner, time.time() + lease_seconds if lease_seconds else None, now, now, row["job_id"])
+            )
+            return self._to_dict(conn.execute("SELECT * FROM jobs WHERE job_id = ?", (row["job_id"],)).fetchone())
+
+    def heartbeat(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Extend a lease; False if the lease was lost (expired and re-queued)"""
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE job_id = ? AND lease_owner = ? AND status = ?",
+                (time.time() + lease_seconds, job_id, owner, JOB_RUNNING)
+            ).rowcount == 1
+
+    def finish(self, job_id: str, owner: str, **fields) -> bool:
+        """Record the outcome of a leased job, only if the lease is still held"""
+        for column in self._JSON_COLUMNS:
+            if column in fields and fields[column] is not None:
+                fields[column] = json.dumps(fields[column], default=str)
+        fields.update(lease_owner=None, lease_expires_at=None, updated_at=datetime.now().isoformat())
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as conn:
+            return conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ? AND lease_owner = ?",
+                (*fields.values(), job_id, owner)
+            ).rowcount == 1
+
+    def requeue_expired(self, max_attempts: int) -> List[Tuple[str, str]]:
+        """Re-queue running jobs whose lease expired; fail those out of attempts
+
+        Returns (job_id, new status) pairs.
+        """
+        now = datetime.now().isoformat()
+        changed = []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id, lease_owner, attempts FROM jobs WHERE status = ? AND lease_expires_at < ?",
+                (JOB_RUNNING, time.time())
+            ).fetchall()
+            for row in rows:
+                if row["attempts"] >= max_attempts:
+                    status, error = JOB_FAILED, f"Abandoned by workers {row['attempts']} times"
+                else:
+                    status, error = JOB_QUEUED, None
+                updated = conn.execute(
+                    """UPDATE jobs SET status = ?, error = ?, node = NULL, lease_owner = NULL, lease_expires_at = NULL,
+                           started_at = CASE WHEN ? = ? THEN NULL ELSE started_at END, finished_at = ?, updated_at = ?
+                       WHERE job_id = ? AND lease_owner = ? AND status = ?""",
+                    (status, error, status, JOB_QUEUED, now if status == JOB_FAILED else None, now,
+                     row["job_id"], row["lease_owner"], JOB_RUNNING)
+                ).rowcount
+                if updated:
+                    changed.append((row["job_id"], status))
+        return changed
+
+def dedup_key(**parts) -> str:
+    """Stable hash of everything that determines a job's output"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+# ============================================================================
+# JOB EVENT BUS
+# ============================================================================
+
+TERMINAL_EVENTS = ("job_done", "job_failed")
+
+class JobEventBus:
+    """In-process fan-out of job events to SSE / WebSocket subscribers
+
+    Events get per-job sequence numbers so clients can resume after a
+    reconnect (Last-Event-ID). Only the most recent jobs are kept.
+    """
+
+    def __init__(self, max_jobs: int = 200, max_events_per_job: int = 5000):
+        self.max_jobs = max_jobs
+        self.max_events_per_job = max_events_per_job
+        self._cond = threading.Condition()
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()  # job_id -> {"next_seq", "events"}
+
+    def publish(self, job_id: str, event: Dict) -> Dict:
+        with self._cond:
+            log = self._jobs.get(job_id)
+            if log is None:
+                log = self._jobs[job_id] = {"next_seq": 1, "events": []}
+                while len(self._jobs) > self.max_jobs:
+                    self._jobs.popitem(last=False)
+            event = {**event, "seq": log["next_seq"], "job_id": job_id}
+            event.setdefault("timestamp", datetime.now().isoformat())
+            log["next_seq"] += 1
+            log["events"].append(event)
+            if len(log["events"]) > self.max_events_per_job:
+                del log["events"][0]
+            self._cond.notify_all()
+        return event
+
+    def has_events(self, job_id: str) -> bool:
+        with self._cond:
+            return job_id in self._jobs
+
+    def events_after(self, job_id: str, after_seq: int = 0) -> List[Dict]:
+        with self._cond:
+            log = self._jobs.get(job_id)
+            return [e for e in log["events"] if e["seq"] > after_seq] if log else []
+
+    def wait(self, job_id: str, after_seq: int = 0, timeout: float = 15.0) -> List[Dict]:
+        """Block until events newer than after_seq exist (or timeout), then return them"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: job_id in self._jobs and self._jobs[job_id]["next_seq"] - 1 > after_seq,
+                timeout=timeout
+            )
+        return self.events_after(job_id, after_seq)
+
+class SqliteJobEventLog:
+    """Job events persisted in SQLite so they cross process boundaries (queue mode)
+
+    Same interface as JobEventBus; readers poll instead of waiting on a condition.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS job_events (
+            job_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (job_id, seq)
+        );
+        CREATE INDEX IF NOT EXISTS idx_job_events_created ON job_events (created_at);
+    """
+
+    def __init__(self, db_path: str, poll_seconds: float = 0.25):
+        self.db_path = db_path
+        self.poll_seconds = poll_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self._SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def publish(self, job_id: str, event: Dict) -> Dict:
+        event = {**event, "job_id": job_id}
+        event.setdefault("timestamp", datetime.now().isoformat())
+        payload = json.dumps(event, default=str)
+        with self._connect() as conn:
+            # Sequence numbers are assigned inside the INSERT, so concurrent publishers cannot collide
+            cursor = conn.execute(
+                """INSERT INTO job_events (job_id, seq, payload, created_at)
+                   SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ? FROM job_events WHERE job_id = ?""",
+                (job_id, payload, time.time(), job_id)
+            )
+            seq = conn.execute("SELECT seq FROM job_events WHERE rowid = ?", (cursor.lastrowid,)).fetchone()[0]
+        return {**event, "seq": seq}
+
+    def has_events(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM job_events WHERE job_id = ? LIMIT 1", (job_id,)).fetchone() is not None
+
+    def events_after(self, job_id: str, after_seq: int = 0) -> List[Dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, payload FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after_seq)
+            ).fetchall()
+        return [{**json.loads(payload), "seq": seq} for seq, payload in rows]
+
+    def wait(self, job_id: str, after_seq: int = 0, timeout: float = 15.0) -> List[Dict]:
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self.events_after(job_id, after_seq)
+            if events or time.monotonic() >= deadline:
+                return events
+            time.sleep(self.poll_seconds)
+
+    def prune(self, older_than_seconds: float) -> int:
+        """Delete events older than the retention window"""
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM job_events WHERE created_at < ?", (time.time() - older_than_seconds,)
+            ).rowcount
+
+def report_job_event(store: JobStore, events, job_id: str, event: Dict) -> None:
+    """Record an orchestrator event: track the running node and publish it"""
+    if event.get("event") == "node_started":
+        store.update(job_id, node=event.get("node"))
+    events.publish(job_id, event)
+
+# on_batch_done(batch) -> summary runs once per batch, in the process that
+# finished its last item; the returned summary is stored on the batch
+BatchCallback = Callable[[Dict], Optional[Dict]]
+
+def settle_batch(store: JobStore, batch_id: str, dispatch: Callable[[Dict], None], on_batch_done: Optional[BatchCallback]) -> None:
+    """Start held items that now fit the batch's concurrency limit; close the batch when all are finished"""
+    for job in store.release_held(batch_id):
+        dispatch(job)
+    if store.try_complete_batch(batch_id) and on_batch_done is not None:
+        try:
+            summary = on_batch_done(store.get_batch(batch_id))
+        except Exception:
+            traceback.print_exc()
+            return
+        if summary is not None:
+            store.update_batch(batch_id, summary=summary)
+
+def settle_batches_of(store: JobStore, job_id: str, dispatch: Callable[[Dict], None], on_batch_done: Optional[BatchCallback]) -> None:
+    for batch_id in store.batches_for_job(job_id):
+        settle_batch(store, batch_id, dispatch, on_batch_done)
+
+# ============================================================================
+# JOB QUEUES (queue mode)
+# ============================================================================
+
+class SqliteJobQueue:
+    """Default queue: queued rows of the jobs table, leased with an atomic UPDATE"""
+
+    def __init__(self, store: JobStore):
+        self.store = store
+
+    def enqueue(self, job: Dict) -> None:
+        pass  # a queued job row is already in the queue
+
+    def lease(self, owner: str, lease_seconds: float, admit=None) -> Optional[Dict]:
+        return self.store.claim(owner, lease_seconds, admit=admit)
+
+    def heartbeat(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        return self.store.heartbeat(job_id, owner, lease_seconds)
+
+    def release(self, job_id: str) -> None:
+        pass
+
+    def requeue_expired(self, max_attempts: int) -> List[Tuple[str, str]]:
+        return self.store.requeue_expired(max_attempts)
+
+class RedisJobQueue:
+    """Redis-compatible ready queue (sorted set by priority, then enqueue time) over the job store
+
+    Workers pop job IDs from Redis instead of polling SQLite; job records and
+    lease ownership stay in the JobStore, which remains the source of truth.
+    Any server speaking the Redis protocol works (Redis, Valkey, KeyDB, or a
+    local stand-in for development).
+    """
+
+    def __init__(self, store: JobStore, url: str, prefix: str = "kevin:jobs"):
+        import redis  # optional dependency, only needed for this backend
+
+        self.store = store
+        self.client = redis.Redis.from_url(url)
+        self.queue_key = f"{prefix}:queue"
+
+    @staticmethod
+    def _score(job: Dict) -> float:
+        # Priority dominates; creation time orders jobs of the same priority, so
+        # re-queued jobs get their original place back
+        return job.get("priority", PRIORITY_INTERACTIVE) * 1e10 + datetime.fromisoformat(job["created_at"]).timestamp()
+
+    def enqueue(self, job: Dict) -> None:
+        # lt: adds new entries, and only ever moves a queued job forward (promotion)
+        self.client.zadd(self.queue_key, {job["job_id"]: self._score(job)}, lt=True)
+
+    def lease(self, owner: str, lease_seconds: float, admit=None) -> Optional[Dict]:
+        while True:
+            popped = self.client.zpopmin(self.queue_key)
+            if not popped:
+                return None
+            member, score = popped[0]
+            job_id = member.decode("utf-8") if isinstance(member, bytes) else member
+            job = self.store.claim(owner, lease_seconds, job_id=job_id, admit=admit)
+            if job is not None:
+                return job
+            current = self.store.get(job_id)
+            if current is not None and current["status"] == JOB_QUEUED:
+                # Refused by admission control: put it back at the head
+                self.client.zadd(self.queue_key, {job_id: score}, nx=True)
+                return None
+            # Stale entry (already claimed, finished or failed); try the next one
+
+    def heartbeat(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        return self.store.heartbeat(job_id, owner, lease_seconds)
+
+    def release(self, job_id: str) -> None:
+        self.client.zrem(self.queue_key, job_id)
+
+    def requeue_expired(self, max_attempts: int) -> List[Tuple[str, str]]:
+        changed = self.store.requeue_expired(max_attempts)
+        # Re-add every queued job: covers expired leases and a Redis that lost its data
+        queued = self.store.queued_jobs()
+        if queued:
+            self.client.zadd(self.queue_key, {job["job_id"]: self._score(job) for job in queued}, nx=True)
+        return changed
+
+def make_job_queue(store: JobStore, backend: str = "sqlite", redis_url: str = ""):
+    """Queue backend by name (sqlite or redis)"""
+    if backend == "sqlite":
+        return SqliteJobQueue(store)
+    if backend == "redis":
+        return RedisJobQueue(store, redis_url)
+    raise ValueError(f"Unsupported job queue backend: {backend}")
+
+# ============================================================================
+# JOB MANAGER
+# ============================================================================
+
+# runner(job, report) -> result dict; report(event) receives orchestrator events
+JobRunner = Callable[[Dict, Callable[[Dict], None]], Dict]
+
+class JobManager:
+    """Run jobs from a JobStore on a bounded thread pool
+
+    Pool threads claim jobs in priority order, through the admission
+    controller when one is given. With a queue, jobs are only enqueued here
+    and separate JobWorker processes run them.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        runner: Optional[JobRunner],
+        max_workers: int = 2,
+        events=None,
+        queue=None,
+        on_batch_done: Optional[BatchCallback] = None,
+        admission=None
+    ):
+        self.store = store
+        self.runner = runner
+        self.max_workers = max_workers
+        self.events = events or JobEventBus()
+        self.queue = queue
+        self.on_batch_done = on_batch_done
+        self.admission = admission
+        self.owner = f"local-{socket.gethostname()}-{os.getpid()}"
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the pool and resume jobs left queued or running by a previous process"""
+        if self.queue is not None:
+            return  # workers own execution and recovery
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="kevin-job")
+
+        for job in self.store.unfinished():
+            if job["status"] == JOB_RUNNING:
+                # The process that ran it is gone; start the pipeline over
+                self.store.update(job["job_id"], status=JOB_QUEUED, node=None, started_at=None, lease_owner=None)
+            print(f"Resuming job {job['job_id']} (session {job['session_id']})")
+
+        for batch_id in self.store.open_batch_ids():
+            settle_batch(self.store, batch_id, self._dispatch, self.on_batch_done)
+        self._wake(self.max_workers)
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def submit(
+        self,
+        session_id: str,
+        params: Dict,
+        dedup_key: Optional[str] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        est_tokens: Optional[int] = None
+    ) -> Dict:
+        """Record a job and queue it for the worker pool"""
+        self.start()
+        job = self.store.create(session_id, params, dedup_key=dedup_key, priority=priority, est_tokens=est_tokens)
+        self._queued(job)
+        return job
+
+    def _queued(self, job: Dict) -> None:
+        self.events.publish(job["job_id"], {"event": "job_queued", "session_id": job["session_id"]})
+        self._dispatch(job)
+
+    def _dispatch(self, job: Dict) -> None:
+        """Hand a queued job to the queue (queue mode) or the local pool"""
+        if self.queue is not None:
+            self.queue.enqueue(job)
+        else:
+            self._wake()
+
+    def _wake(self, threads: int = 1) -> None:
+        """Have pool threads look for jobs they can claim"""
+        with self._lock:
+            if self._executor is None:
+                return
+            for _ in range(threads):
+                self._executor.submit(self._run_next)
+
+    def submit_unique(
+        self,
+        session_id: str,
+        params: Dict,
+        dedup_key: str,
+        force: bool = False,
+        reusable: Optional[Callable[[Dict], bool]] = None,
+        est_tokens: Optional[int] = None
+    ) -> Tuple[Dict, str]:
+        """Submit unless an identical job exists; returns (job, outcome)
+
+        An identical queued/running job is returned as is (SUBMIT_ATTACHED);
+        if it is a batch item still waiting, it is promoted to interactive
+        priority so the caller is not held behind the rest of the batch.
+        An identical finished job is returned (SUBMIT_COMPLETED) unless force
+        is set or reusable(job) says its outputs are gone. New jobs are
+        refused with QueueFull when the admission queue is full.
+        """
+        duplicate = self._find_duplicate(dedup_key, force, reusable)
+        if duplicate is not None:
+            job, outcome = duplicate
+        else:
+            if self.admission is not None:
+                self.admission.check_queue()
+            self.start()
+            if force:
+                job, created = self.store.create(session_id, params, dedup_key=dedup_key, est_tokens=est_tokens), True
+            else:
+                # Another API process may have created it since _find_duplicate looked
+                job, created = self.store.create_unique(session_id, params, dedup_key, est_tokens=est_tokens)
+            if created:
+                self._queued(job)
+            outcome = SUBMIT_NEW if created else SUBMIT_ATTACHED
+        if outcome == SUBMIT_ATTACHED and job["priority"] != PRIORITY_INTERACTIVE:
+            job = self._promote(job)
+        self.store.count_submission(outcome, forced=force)
+        return job, outcome
+
+    def _promote(self, job: Dict) -> Dict:
+        """Move a waiting batch job to interactive priority and (re)dispatch it"""
+        promoted = self.store.promote(job["job_id"])
+        if promoted is None:
+            return job  # already running or finished
+        self.events.publish(job["job_id"], {"event": "job_promoted", "session_id": job["session_id"]})
+        self._dispatch(promoted)
+        return promoted
+
+    def _find_duplicate(self, dedup_key: str, force: bool, reusable: Optional[Callable[[Dict], bool]]) -> Optional[Tuple[Dict, str]]:
+        """Existing job for a submission and its outcome (None: a new job is needed)"""
+        if force:
+            return None
+
+        job = self.store.find_by_dedup_key(dedup_key, JOB_ACTIVE)
+        if job is not None:
+            return job, SUBMIT_ATTACHED
+
+        job = self.store.find_by_dedup_key(dedup_key, (JOB_DONE,))
+        if job is not None and (reusable is None or reusable(job)):
+            return job, SUBMIT_COMPLETED
+
+        return None
+
+    def submit_batch(
+        self,
+        items: List[Dict],
+        params: Dict,
+        max_concurrency: int,
+        force: bool = False,
+        reusable: Optional[Callable[[Dict], bool]] = None
+    ) -> Dict:
+        """Submit many SOPs as one batch that runs at most max_concurrency at a time
+
+        items: {"filename", "session_id", "params", "dedup_key", "est_tokens"}
+        per SOP. Duplicates attach to existing jobs exactly like submit_unique.
+        Batch items are claimed after interactive jobs.
+        """
+        self.start()
+        if self.admission is not None:
+            self.admission.check_queue()
+        batch_id = self.store.create_batch(params, max_concurrency)
+        for position, item in enumerate(items):
+            duplicate = self._find_duplicate(item["dedup_key"], force, reusable)
+            if duplicate is not None:
+                job, outcome = duplicate
+            else:
+                fields = dict(batch_id=batch_id, status=JOB_HELD, priority=PRIORITY_BATCH, est_tokens=item.get("est_tokens"))
+                if force:
+                    job, created = self.store.create(item["session_id"], item["params"], dedup_key=item["dedup_key"], **fields), True
+                else:
+                    job, created = self.store.create_unique(item["session_id"], item["params"], item["dedup_key"], **fields)
+                if created:
+                    outcome = None
+                    self.events.publish(job["job_id"], {"event": "job_queued", "session_id": item["session_id"], "batch_id": batch_id})
+                else:
+                    outcome = SUBMIT_ATTACHED
+            self.store.add_batch_item(batch_id, position, item["filename"], job["job_id"], outcome)
+            self.store.count_submission(outcome or SUBMIT_NEW, forced=force)
+
+        settle_batch(self.store, batch_id, self._dispatch, self.on_batch_done)
+        return self.store.get_batch(batch_id)
+
+    def dedup_summary(self) -> Dict:
+        """Submission counts and dedup hit rate of every API process sharing the job store"""
+        stats = {"submissions": 0, SUBMIT_NEW: 0, SUBMIT_ATTACHED: 0, SUBMIT_COMPLETED: 0, "forced": 0}
+        stats.update(self.store.submission_counts())
+        hits = stats[SUBMIT_ATTACHED] + stats[SUBMIT_COMPLETED]
+        stats["hit_rate"] = round(hits / stats["submissions"], 4) if stats["submissions"] else 0.0
+        return stats
+
+    def _report(self, job_id: str, event: Dict) -> None:
+        report_job_event(self.store, self.events, job_id, event)
+
+    def _run_next(self) -> None:
+        """Pool task: run claimable jobs until none is left or admission refuses"""
+        admit = self.admission.admits if self.admission is not None else None
+        while self._executor is not None:
+            if self.admission is not None:
+                self.admission.calibrate()
+            job = self.store.claim(self.owner, None, admit=admit)
+            if job is None:
+                return
+            self._run(job)
+            # The finished job's capacity may admit more than one waiting job
+            self._wake(self.max_workers - 1)
+
+    def _run(self, job: Dict) -> None:
+        job_id = job["job_id"]
+        self.events.publish(job_id, {"event": "job_started", "session_id": job["session_id"]})
+        try:
+            result = self.runner(job, lambda event: self._report(job_id, event))
+        except Exception as e:
+            traceback.print_exc()
+            self.store.finish(job_id, self.owner, status=JOB_FAILED, error=str(e), finished_at=datetime.now().isoformat())
+            self.events.publish(job_id, {"event": "job_failed", "error": str(e)})
+        else:
+            self.store.finish(job_id, self.owner, status=JOB_DONE, node=None, result=result, finished_at=datetime.now().isoformat())
+            self.events.publish(job_id, {"event": "job_done", "result": result})
+
+        settle_batches_of(self.store, job_id, self._dispatch, self.on_batch_done)
+
+# ============================================================================
+# JOB WORKER (queue mode)
+# ============================================================================
+
+class JobWorker:
+    """Lease jobs from a queue and run them, keeping leases alive with heartbeats
+
+    A job whose worker dies stops heartbeating; once its lease expires any
+    worker's sweep re-queues it (or fails it after max_attempts).
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        queue,
+        runner: JobRunner,
+        events,
+        concurrency: int = 1,
+        lease_seconds: float = 60.0,
+        poll_seconds: float = 1.0,
+        max_attempts: int = 3,
+        event_retention_seconds: float = 24 * 3600,
+        worker_id: Optional[str] = None,
+        on_batch_done: Optional[BatchCallback] = None,
+        admission=None
+    ):
+        self.store = store
+        self.queue = queue
+        self.runner = runner
+        self.events = events
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.event_retention_seconds = event_retention_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.on_batch_done = on_batch_done
+        self.admission = admission
+        self._stop = threading.Event()
+
+    def run_forever(self) -> None:
+        """Run job slots until stop() is called; the calling thread sweeps leases"""
+        slots = [
+            threading.Thread(target=self._slot, name=f"kevin-worker-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for slot in slots:
+            slot.start()
+        print(f"Worker {self.worker_id} started ({self.concurrency} slots, {self.lease_seconds:.0f}s leases)")
+
+        while not self._stop.is_set():
+            self._sweep()
+            self._stop.wait(self.lease_seconds / 2)
+
+        for slot in slots:
+            slot.join()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _sweep(self) -> None:
+        try:
+            for job_id, status in self.queue.requeue_expired(self.max_attempts):
+                print(f"Lease expired for job {job_id}; now {status}")
+                event = "job_requeued" if status == JOB_QUEUED else "job_failed"
+                self.events.publish(job_id, {"event": event, "error": None if status == JOB_QUEUED else "Lease expired too often"})
+            # Also recovers batches whose last settle was lost with a crashed worker
+            for batch_id in self.store.open_batch_ids():
+                settle_batch(self.store, batch_id, self.queue.enqueue, self.on_batch_done)
+            if hasattr(self.events, "prune"):
+                self.events.prune(self.event_retention_seconds)
+            if self.admission is not None:
+                self.admission.calibrate()
+        except Exception:
+            traceback.print_exc()
+
+    def _slot(self) -> None:
+        admit = self.admission.admits if self.admission is not None else None
+        while not self._stop.is_set():
+            owner = f"{self.worker_id}:{uuid.uuid4().hex[:8]}"
+            try:
+                job = self.queue.lease(owner, self.lease_seconds, admit=admit)
+            except Exception:
+                traceback.print_exc()
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_seconds)
+                continue
+            self._execute(job, owner)
+
+    def _execute(self, job: Dict, owner: str) -> None:
+        job_id = job["job_id"]
+        lease_lost = threading.Event()
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(self.lease_seconds / 3):
+                if not self.queue.heartbeat(job_id, owner, self.lease_seconds):
+                    lease_lost.set()
+                    return
+
+        beat = threading.Thread(target=heartbeat, name=f"kevin-heartbeat-{job_id[:8]}", daemon=True)
+        beat.start()
+        self.events.publish(job_id, {"event": "job_started", "session_id": job["session_id"], "worker": self.worker_id, "attempt": job["attempts"]})
+
+        try:
+            result = self.runner(job, lambda event: report_job_event(self.store, self.events, job_id, event))
+        except Exception as e:
+            traceback.print_exc()
+            done.set()
+            if self.store.finish(job_id, owner, status=JOB_FAILED, error=str(e), finished_at=datetime.now().isoformat()):
+                self.events.publish(job_id, {"event": "job_failed", "error": str(e)})
+        else:
+            done.set()
+            if self.store.finish(job_id, owner, status=JOB_DONE, node=None, result=result, finished_at=datetime.now().isoformat()):
+                self.events.publish(job_id, {"event": "job_done", "result": result})
+        finally:
+            done.set()
+            beat.join()
+            self.queue.release(job_id)
+
+        settle_batches_of(self.store, job_id, self.queue.enqueue, self.on_batch_done)
+
+        if lease_lost.is_set():
+            print(f"Lost the lease on job {job_id}; its result was discarded")
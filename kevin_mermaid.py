@@ -0,0 +1,931 @@
+"""
+Kevin AI - Mermaid Renderer
+Offline PNG/JPEG/SVG rendering of the Mermaid flowcharts the agents emit
+
+Version: 2.1
+Date: October 19, 2026
+
+Supports the flowchart subset of Mermaid: graph/flowchart headers in every
+direction, the common node shapes, solid/dotted/thick links with labels,
+chains and & groups, subgraphs, classDef/class/style and ::: classes.
+Other statements (click, linkStyle, ...) are ignored.
+
+Layout is layered (Sugiyama style): cycles are broken, nodes are assigned
+to layers by longest path, long edges get dummy nodes, barycenter sweeps
+reduce crossings and nodes are pulled toward their neighbours.
+
+Usage:
+    python kevin_mermaid.py diagram.mmd -o diagram.png [--theme dark] [--scale 2]
+"""
+
+import argparse
+import functools
+import io
+import re
+import textwrap
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+IMAGE_FORMATS = ("png", "jpeg", "svg")
+
+FONT_SIZE = 14
+WRAP_CHARS = 28  # label characters per line before wrapping
+NODE_SEP = 28  # between neighbours of a layer
+RANK_SEP = 48  # between layers
+MARGIN = 20
+PNG_COLORS = 64
+
+SANS_FONTS = ("DejaVuSans.ttf", "Arial.ttf", "LiberationSans-Regular.ttf")
+MONO_FONTS = ("DejaVuSansMono.ttf", "Courier New.ttf", "LiberationMono-Regular.ttf")
+SVG_FONT_FAMILY = "DejaVu Sans, Arial, Helvetica, sans-serif"
+
+THEMES = {
+    "default": {
+        "background": "#ffffff", "fill": "#ececff", "stroke": "#9370db", "text": "#333333",
+        "edge": "#333333", "label_bg": "#e8e8e8", "cluster_fill": "#ffffde", "cluster_stroke": "#aaaa33"
+    },
+    "neutral": {
+        "background": "#ffffff", "fill": "#eeeeee", "stroke": "#999999", "text": "#333333",
+        "edge": "#666666", "label_bg": "#ffffff", "cluster_fill": "#f8f8f8", "cluster_stroke": "#bbbbbb"
+    },
+    "dark": {
+        "background": "#1f2020", "fill": "#1f2020", "stroke": "#cccccc", "text": "#e0dfdf",
+        "edge": "#d3d3d3", "label_bg": "#585858", "cluster_fill": "#2b2b2b", "cluster_stroke": "#888888"
+    },
+}
+
+class MermaidError(ValueError):
+    """Source is not a flowchart this renderer understands"""
+
+# ============================================================================
+# MODEL
+# ============================================================================
+
+@dataclass
+class Node:
+    id: str
+    label: str
+    shape: str = "rect"
+    classes: List[str] = field(default_factory=list)
+    style: Dict[str, str] = field(default_factory=dict)
+
+@dataclass
+class Edge:
+    src: str
+    dst: str
+    label: str = ""
+    line: str = "solid"  # solid, dotted, thick
+    arrow: bool = True
+
+@dataclass
+class Subgraph:
+    id: str
+    title: str
+    nodes: List[str] = field(default_factory=list)
+    parent: Optional[str] = None
+
+@dataclass
+class Flowchart:
+    direction: str = "TD"
+    nodes: Dict[str, Node] = field(default_factory=dict)
+    edges: List[Edge] = field(default_factory=list)
+    subgraphs: Dict[str, Subgraph] = field(default_factory=dict)
+    class_defs: Dict[str, Dict[str, str]] = field(default_factory=dict)
+
+# ============================================================================
+# PARSER
+# ============================================================================
+
+_HEADER = re.compile(r"^(?:graph|flowchart)(?:\s+(TB|TD|BT|LR|RL))?\s*;?\s*$", re.IGNORECASE)
+_NODE_ID = re.compile(r"[A-Za-z0-9_]+(?:-(?=[A-Za-z0-9_])[A-Za-z0-9_]+)*")
+_CLASS_SUFFIX = re.compile(r":::([A-Za-z0-9_-]+)")
+_LINK = re.compile(r"\s*<?(-{2,}>|={2,}>|-\.+->|-{3,}|={3,}|-\.+-|--[ox]|==[ox])\s*(?:\|([^|]*)\|)?")
+_LINK_WITH_TEXT = re.compile(r"\s*<?(--|==|-\.)\s+(.+?)\s+(-{2,}>|={2,}>|\.-+>|-{3,}|={3,}|\.-+)")
+_AMPERSAND = re.compile(r"\s*&\s*")
+_SUBGRAPH = re.compile(r"^subgraph\s+(.+)$")
+
+# (opener, closer, shape), longest openers first
+_SHAPES = (
+    ("([", "])", "stadium"),
+    ("[[", "]]", "subroutine"),
+    ("[(", ")]", "cylinder"),
+    ("((", "))", "circle"),
+    ("{{", "}}", "hexagon"),
+    ("[/", "/]", "parallelogram"),
+    ("[\\", "\\]", "parallelogram_alt"),
+    ("[/", "\\]", "trapezoid"),
+    ("[\\", "/]", "trapezoid_alt"),
+    (">", "]", "asymmetric"),
+    ("[", "]", "rect"),
+    ("(", ")", "round"),
+    ("{", "}", "diamond"),
+)
+
+_ENTITIES = {"#quot;": '"', "#amp;": "&", "#lt;": "<", "#gt;": ">", "&quot;": '"', "&amp;": "&", "&lt;": "<", "&gt;": ">", "&nbsp;": " "}
+
+def _clean_label(text: str) -> str:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        text = text[1:-1]
+    if len(text) >= 2 and text[0] == text[-1] == "`":
+        text = text[1:-1]  # markdown strings
+    text = re.sub(r"<br\s*/?>", "\n", text, flags=re.IGNORECASE).replace("\\n", "\n")
+    for entity, char in _ENTITIES.items():
+        text = text.replace(entity, char)
+    text = re.sub(r"</?(?:b|i|strong|em|u|small|span)[^>]*>", "", text, flags=re.IGNORECASE)
+    return "\n".join(line.strip() for line in text.split("\n")).strip()
+
+def _split_statements(source: str) -> List[str]:
+    """Lines of the source, also split at ; outside brackets and quotes"""
+    statements = []
+    for raw in source.splitlines():
+        line = raw.strip()
+        if not line or line.startswith("%%") or line.startswith("```"):
+            continue
+        depth = 0
+        quoted = False
+        start = 0
+        for i, char in enumerate(line):
+            if char == '"':
+                quoted = not quoted
+            elif not quoted and char in "[({":
+                depth += 1
+            elif not quoted and char in "])}":
+                depth = max(0, depth - 1)
+            elif char == ";" and depth == 0 and not quoted:
+                statements.append(line[start:i].strip())
+                start = i + 1
+        statements.append(line[start:].strip())
+    return [s for s in statements if s]
+
+def _parse_style(text: str) -> Dict[str, str]:
+    style = {}
+    for part in text.split(","):
+        key, _, value = part.partition(":")
+        if key.strip() and value.strip():
+            style[key.strip().lower()] = value.strip()
+    return style
+
+class _StatementParser:
+    """Parses node/link statements: group (link group)* where group is node (& node)*"""
+
+    def __init__(self, chart: Flowchart, subgraph_stack: List[str]):
+        self.chart = chart
+        self.subgraph_stack = subgraph_stack
+
+    def _node(self, text: str, pos: int) -> Tuple[Optional[str], int]:
+        match = _NODE_ID.match(text, pos)
+        if match is None:
+            return None, pos
+        node_id = match.group(0)
+        pos = match.end()
+        label = shape = None
+        for opener, closer, name in _SHAPES:
+            if not text.startswith(opener, pos):
+                continue
+            body_start = pos + len(opener)
+            if text.startswith('"', body_start):
+                quote_end = text.find('"', body_start + 1)
+                end = text.find(closer, quote_end + 1) if quote_end != -1 else -1
+            else:
+                end = text.find(closer, body_start)
+            if end == -1:
+                continue
+            label, shape = _clean_label(text[body_start:end]), name
+            pos = end + len(closer)
+            break
+
+        node = self.chart.nodes.get(node_id)
+        if node is None:
+            node = self.chart.nodes[node_id] = Node(node_id, node_id)
+            if self.subgraph_stack:
+                self.chart.subgraphs[self.subgraph_stack[-1]].nodes.append(node_id)
+        if shape is not None:
+            node.label, node.shape = label, shape
+        suffix = _CLASS_SUFFIX.match(text, pos)
+        if suffix:
+            node.classes.append(suffix.group(1))
+            pos = suffix.end()
+        return node_id, pos
+
+    def _group(self, text: str, pos: int) -> Tuple[List[str], int]:
+        ids = []
+        while True:
+            while pos < len(text) and text[pos].isspace():
+                pos += 1
+            node_id, pos = self._node(text, pos)
+            if node_id is None:
+                return ids, pos
+            ids.append(node_id)
+            amp = _AMPERSAND.match(text, pos)
+            if amp is None:
+                return ids, pos
+            pos = amp.end()
+
+    def _link(self, text: str, pos: int) -> Tuple[Optional[Edge], int]:
+        match = _LINK.match(text, pos)
+        if match:
+            token, label = match.group(1), match.group(2) or ""
+        else:
+            match = _LINK_WITH_TEXT.match(text, pos)
+            if match is None:
+                return None, pos
+            token, label = match.group(1) + match.group(3), match.group(2)
+        line = "dotted" if "." in token else "thick" if "=" in token else "solid"
+        return Edge("", "", _clean_label(label), line, token.endswith(">")), match.end()
+
+    def parse(self, text: str) -> bool:
+        sources, pos = self._group(text, 0)
+        if not sources:
+            return False
+        while True:
+            template, pos = self._link(text, pos)
+            if template is None:
+                break
+            targets, pos = self._group(text, pos)
+            if not targets:
+                break
+            for src in sources:
+                for dst in targets:
+                    self.chart.edges.append(Edge(src, dst, template.label, template.line, template.arrow))
+            sources = targets
+        return True
+
+def parse(source: str) -> Flowchart:
+    """Parse Mermaid flowchart source; raises MermaidError for anything else"""
+    statements = _split_statements(source or "")
+    if not statements:
+        raise MermaidError("Empty diagram")
+    header = _HEADER.match(statements[0])
+    if header is None:
+        raise MermaidError(f"Not a flowchart: {statements[0][:60]!r}")
+
+    direction = (header.group(1) or "TD").upper()
+    chart = Flowchart(direction="TD" if direction == "TB" else direction)
+    stack: List[str] = []
+    parser = _StatementParser(chart, stack)
+
+    for statement in statements[1:]:
+        keyword = statement.split(None, 1)[0]
+        rest = statement[len(keyword):].strip()
+        if keyword == "subgraph":
+            subgraph_match = _SUBGRAPH.match(statement)
+            title = subgraph_match.group(1).strip() if subgraph_match else f"subgraph{len(chart.subgraphs) + 1}"
+            bracket = re.match(r"^([A-Za-z0-9_-]+)\s*\[(.*)\]$", title)
+            sub_id, title = (bracket.group(1), bracket.group(2)) if bracket else (title, title)
+            sub_id = sub_id if sub_id not in chart.subgraphs else f"{sub_id}_{len(chart.subgraphs)}"
+            chart.subgraphs[sub_id] = Subgraph(sub_id, _clean_label(title), parent=stack[-1] if stack else None)
+            stack.append(sub_id)
+        elif keyword == "end" and not rest:
+            if stack:
+                stack.pop()
+        elif keyword == "classDef":
+            names, _, style = rest.partition(" ")
+            for name in names.split(","):
+                chart.class_defs[name.strip()] = _parse_style(style)
+        elif keyword == "class":
+            ids, _, name = rest.rpartition(" ")
+            for node_id in ids.split(","):
+                if node_id.strip() in chart.nodes:
+                    chart.nodes[node_id.strip()].classes.append(name.strip())
+        elif keyword == "style":
+            node_id, _, style = rest.partition(" ")
+            if node_id in chart.nodes:
+                chart.nodes[node_id].style.update(_parse_style(style))
+        elif keyword in ("direction", "linkStyle", "click", "accTitle", "accDescr", "title"):
+            continue
+        else:
+            parser.parse(statement)
+
+    if not chart.nodes:
+        raise MermaidError("Flowchart has no nodes")
+    return chart
+
+# ============================================================================
+# TEXT MEASUREMENT
+# ============================================================================
+
+@functools.lru_cache(maxsize=16)
+def _font(size: int, mono: bool = False) -> ImageFont.FreeTypeFont:
+    for name in MONO_FONTS if mono else SANS_FONTS:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+def _wrap(label: str) -> List[str]:
+    lines = []
+    for line in label.split("\n"):
+        lines.extend(textwrap.wrap(line, WRAP_CHARS, break_long_words=False) or [""])
+    return lines
+
+def _line_height(font: ImageFont.FreeTypeFont) -> float:
+    return font.size * 1.3
+
+def _text_size(lines: List[str], font: ImageFont.FreeTypeFont) -> Tuple[float, float]:
+    width = max((font.getlength(line) for line in lines), default=0.0)
+    return width, _line_height(font) * len(lines)
+
+# ============================================================================
+# LAYOUT
+# ============================================================================
+
+@dataclass
+class PlacedNode:
+    node: Node
+    lines: List[str]
+    cx: float
+    cy: float
+    w: float
+    h: float
+
+@dataclass
+class PlacedEdge:
+    edge: Edge
+    points: List[Tuple[float, float]]
+    lines: List[str]
+    label_center: Optional[Tuple[float, float]] = None
+    label_size: Tuple[float, float] = (0.0, 0.0)
+
+@dataclass
+class Layout:
+    width: float
+    height: float
+    scale: float
+    direction: str
+    nodes: List[PlacedNode]
+    edges: List[PlacedEdge]
+    clusters: List[Tuple[Subgraph, Tuple[float, float, float, float]]]
+
+def _node_size(shape: str, text_w: float, text_h: float, scale: float) -> Tuple[float, float]:
+    pad_x, pad_y = 15 * scale, 9 * scale
+    w, h = text_w + 2 * pad_x, text_h + 2 * pad_y
+    if shape == "diamond":
+        return text_w * 1.6 + 2 * pad_x, text_h * 1.8 + 2 * pad_y
+    if shape == "circle":
+        d = (text_w ** 2 + text_h ** 2) ** 0.5 + pad_x
+        return d, d
+    if shape == "stadium":
+        return w + h / 2, h
+    if shape == "hexagon":
+        return w + h / 2, h
+    if shape == "cylinder":
+        return w, h + 0.3 * h
+    if shape == "subroutine":
+        return w + 16 * scale, h
+    if shape in ("asymmetric", "parallelogram", "parallelogram_alt", "trapezoid", "trapezoid_alt"):
+        return w + h / 2, h
+    return w, h
+
+def _break_cycles(order: List[str], edges: List[Tuple[str, str]]) -> List[bool]:
+    """Which edges to reverse so the graph is acyclic (DFS back edges)"""
+    out: Dict[str, List[int]] = {n: [] for n in order}
+    for i, (src, dst) in enumerate(edges):
+        out[src].append(i)
+    reversed_edges = [False] * len(edges)
+    state: Dict[str, int] = {}  # 1 on the DFS stack, 2 finished
+    for root in order:
+        if root in state:
+            continue
+        state[root] = 1
+        stack = [(root, iter(out[root]))]
+        while stack:
+            node, edge_iter = stack[-1]
+            for i in edge_iter:
+                dst = edges[i][1]
+                if state.get(dst) == 1:
+                    reversed_edges[i] = True
+                elif dst not in state:
+                    state[dst] = 1
+                    stack.append((dst, iter(out[dst])))
+                    break
+            else:
+                state[node] = 2
+                stack.pop()
+    return reversed_edges
+
+def _assign_layers(order: List[str], dag: List[Tuple[str, str]]) -> Dict[str, int]:
+    """Longest-path layering, then sources moved down next to their first successor"""
+    preds: Dict[str, List[str]] = {n: [] for n in order}
+    succs: Dict[str, List[str]] = {n: [] for n in order}
+    for src, dst in dag:
+        preds[dst].append(src)
+        succs[src].append(dst)
+    indegree = {n: len(preds[n]) for n in order}
+    layer = {n: 0 for n in order}
+    ready = [n for n in order if indegree[n] == 0]
+    topo = []
+    while ready:
+        node = ready.pop(0)
+        topo.append(node)
+        for dst in succs[node]:
+            layer[dst] = max(layer[dst], layer[node] + 1)
+            indegree[dst] -= 1
+            if indegree[dst] == 0:
+                ready.append(dst)
+    for node in reversed(topo):
+        if not preds[node] and succs[node]:
+            layer[node] = min(layer[dst] for dst in succs[node]) - 1
+    return layer
+
+def _crossings(layers: List[List[str]], down: Dict[str, List[str]], pos: Dict[str, int]) -> int:
+    total = 0
+    for layer in layers[:-1]:
+        segments = sorted((pos[a], pos[b]) for a in layer for b in down[a])
+        for i, (a1, b1) in enumerate(segments):
+            for a2, b2 in segments[i + 1:]:
+                if a2 > a1 and b2 < b1:
+                    total += 1
+    return total
+
+def _order_layers(layers: List[List[str]], up: Dict[str, List[str]], down: Dict[str, List[str]], sweeps: int = 8) -> List[List[str]]:
+    """Barycenter crossing reduction; returns the best ordering seen"""
+    pos = {n: i for layer in layers for i, n in enumerate(layer)}
+    best = [list(layer) for layer in layers]
+    best_crossings = _crossings(layers, down, pos)
+    for sweep in range(sweeps):
+        downward = sweep % 2 == 0
+        neighbours = up if downward else down
+        indexes = range(1, len(layers)) if downward else range(len(layers) - 2, -1, -1)
+        for li in indexes:
+            layer = layers[li]
+
+            def barycenter(n, neighbours=neighbours):
+                adjacent = neighbours[n]
+                return sum(pos[m] for m in adjacent) / len(adjacent) if adjacent else pos[n]
+
+            layer.sort(key=lambda n: (barycenter(n), pos[n]))
+            for i, n in enumerate(layer):
+                pos[n] = i
+        crossings = _crossings(layers, down, pos)
+        if crossings < best_crossings:
+            best, best_crossings = [list(layer) for layer in layers], crossings
+        if best_crossings == 0:
+            break
+    return best
+
+def _place_layer(layer: List[str], desired: List[float], sizes: Dict[str, float], sep: Dict[str, float]) -> List[float]:
+    """Positions closest to desired that keep neighbours apart (average of a left and right pass)"""
+    def gap(a, b):
+        return (sizes[a] + sizes[b]) / 2 + max(sep[a], sep[b])
+
+    count = len(layer)
+    left = []
+    for i in range(count):
+        x = desired[i]
+        if i:
+            x = max(x, left[i - 1] + gap(layer[i - 1], layer[i]))
+        left.append(x)
+    right = [0.0] * count
+    for i in range(count - 1, -1, -1):
+        x = desired[i]
+        if i < count - 1:
+            x = min(x, right[i + 1] - gap(layer[i], layer[i + 1]))
+        right[i] = x
+    return [(l + r) / 2 for l, r in zip(left, right)]
+
+def layout(chart: Flowchart, scale: float = 1.0) -> Layout:
+    """Place nodes, route edges and size the canvas"""
+    font = _font(round(FONT_SIZE * scale))
+    horizontal = chart.direction in ("LR", "RL")
+    order = list(chart.nodes)
+
+    placed = {}
+    for node_id, node in chart.nodes.items():
+        lines = _wrap(node.label)
+        w, h = _node_size(node.shape, *_text_size(lines, font), scale)
+        placed[node_id] = PlacedNode(node, lines, 0.0, 0.0, w, h)
+
+    # (main, cross) extent of each layout node; main runs along the flow
+    main_size = {n: (p.w if horizontal else p.h) for n, p in placed.items()}
+    cross_size = {n: (p.h if horizontal else p.w) for n, p in placed.items()}
+    sep = {n: NODE_SEP * scale for n in placed}
+
+    drawn = [e for e in chart.edges if e.src != e.dst]  # self-loops are not drawn
+    flipped = _break_cycles(order, [(e.src, e.dst) for e in drawn])
+    dag = [(e.dst, e.src) if flip else (e.src, e.dst) for e, flip in zip(drawn, flipped)]
+    layer_of = _assign_layers(order, dag)
+
+    layers: List[List[str]] = [[] for _ in range(max(layer_of.values()) + 1)]
+    for node_id in order:
+        layers[layer_of[node_id]].append(node_id)
+    up: Dict[str, List[str]] = {n: [] for n in order}
+    down: Dict[str, List[str]] = {n: [] for n in order}
+    chains = []
+    for i, (src, dst) in enumerate(dag):
+        chain = [src]
+        for li in range(layer_of[src] + 1, layer_of[dst]):
+            dummy = f"\0{i}:{li}"
+            main_size[dummy], cross_size[dummy], sep[dummy] = 0.0, 2 * scale, 6 * scale
+            up[dummy], down[dummy] = [], []
+            layers[li].append(dummy)
+            chain.append(dummy)
+        chain.append(dst)
+        for a, b in zip(chain, chain[1:]):
+            down[a].append(b)
+            up[b].append(a)
+        chains.append(chain)
+
+    layers = _order_layers(layers, up, down)
+
+    def layer_index(n: str) -> int:
+        return layer_of[n] if n in layer_of else int(n.rsplit(":", 1)[1])
+
+    # Cross axis: pack each layer, then pull nodes toward their neighbours
+    cross: Dict[str, float] = {}
+    for layer in layers:
+        offset = 0.0
+        for n in layer:
+            cross[n] = offset + cross_size[n] / 2
+            offset += cross_size[n] + sep[n]
+        for n in layer:
+            cross[n] -= offset / 2
+    for sweep in range(8):
+        downward = sweep % 2 == 0
+        neighbours = up if downward else down
+        indexes = range(1, len(layers)) if downward else range(len(layers) - 2, -1, -1)
+        for li in indexes:
+            layer = layers[li]
+            desired = [
+                sum(cross[m] for m in neighbours[n]) / len(neighbours[n]) if neighbours[n] else cross[n]
+                for n in layer
+            ]
+            for n, value in zip(layer, _place_layer(layer, desired, cross_size, sep)):
+                cross[n] = value
+
+    # Edge labels widen the gap between the layers their middle segment spans
+    edge_lines, label_sizes, label_gap = [], [], []
+    gap_extra = [0.0] * len(layers)
+    for edge, chain in zip(drawn, chains):
+        lines = _wrap(edge.label) if edge.label else []
+        size = (0.0, 0.0)
+        gap_index = None
+        if lines:
+            tw, th = _text_size(lines, font)
+            size = (tw + 8 * scale, th + 4 * scale)
+            gap_index = layer_index(chain[(len(chain) - 2) // 2])
+            gap_extra[gap_index] = max(gap_extra[gap_index], (size[0] if horizontal else size[1]) + 8 * scale)
+        edge_lines.append(lines)
+        label_sizes.append(size)
+        label_gap.append(gap_index)
+
+    # Main axis: layer centers
+    layer_main = []
+    offset = 0.0
+    for li, layer in enumerate(layers):
+        extent = max((main_size[n] for n in layer), default=0.0)
+        layer_main.append(offset + extent / 2)
+        offset += extent + RANK_SEP * scale + gap_extra[li]
+    total_main = offset
+
+    def point(n: str) -> Tuple[float, float]:
+        main = layer_main[layer_index(n)]
+        if chart.direction in ("BT", "RL"):
+            main = total_main - main
+        return (main, cross[n]) if horizontal else (cross[n], main)
+
+    for n, p in placed.items():
+        p.cx, p.cy = point(n)
+
+    # Flow direction on screen, for leaving/entering nodes at their main-axis sides
+    step = {"TD": (0, 1), "BT": (0, -1), "LR": (1, 0), "RL": (-1, 0)}[chart.direction]
+    edges = []
+    for edge, chain, flip, lines, size in zip(drawn, chains, flipped, edge_lines, label_sizes):
+        points = [point(n) for n in chain]
+        first, last = placed[chain[0]], placed[chain[-1]]
+        points[0] = (points[0][0] + step[0] * first.w / 2, points[0][1] + step[1] * first.h / 2)
+        points[-1] = (points[-1][0] - step[0] * last.w / 2, points[-1][1] - step[1] * last.h / 2)
+        label_center = None
+        if lines:
+            middle = (len(points) - 2) // 2
+            (x1, y1), (x2, y2) = points[middle], points[middle + 1]
+            label_center = ((x1 + x2) / 2, (y1 + y2) / 2)
+        if flip:
+            points.reverse()
+        edges.append(PlacedEdge(edge, points, lines, label_center, size))
+
+    # Clusters: innermost first so parents can enclose their children
+    title_h = _line_height(font) + 6 * scale
+    pad = 14 * scale
+    cluster_boxes: Dict[str, Tuple[float, float, float, float]] = {}
+    for sub in reversed(list(chart.subgraphs.values())):
+        boxes = [(placed[n].cx - placed[n].w / 2, placed[n].cy - placed[n].h / 2,
+                  placed[n].cx + placed[n].w / 2, placed[n].cy + placed[n].h / 2) for n in sub.nodes]
+        boxes += [box for sid, box in cluster_boxes.items() if chart.subgraphs[sid].parent == sub.id]
+        if not boxes:
+            continue
+        cluster_boxes[sub.id] = (min(b[0] for b in boxes) - pad, min(b[1] for b in boxes) - pad - title_h,
+                                 max(b[2] for b in boxes) + pad, max(b[3] for b in boxes) + pad)
+
+    # Shift everything onto a canvas with a margin
+    xs, ys = [], []
+    for p in placed.values():
+        xs += [p.cx - p.w / 2, p.cx + p.w / 2]
+        ys += [p.cy - p.h / 2, p.cy + p.h / 2]
+    for e in edges:
+        xs += [x for x, _ in e.points]
+        ys += [y for _, y in e.points]
+        if e.label_center:
+            xs += [e.label_center[0] - e.label_size[0] / 2, e.label_center[0] + e.label_size[0] / 2]
+            ys += [e.label_center[1] - e.label_size[1] / 2, e.label_center[1] + e.label_size[1] / 2]
+    for box in cluster_boxes.values():
+        xs += [box[0], box[2]]
+        ys += [box[1], box[3]]
+    margin = MARGIN * scale
+    dx, dy = margin - min(xs), margin - min(ys)
+    for p in placed.values():
+        p.cx += dx
+        p.cy += dy
+    for e in edges:
+        e.points = [(x + dx, y + dy) for x, y in e.points]
+        if e.label_center:
+            e.label_center = (e.label_center[0] + dx, e.label_center[1] + dy)
+    clusters = [
+        (chart.subgraphs[sid], (box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy))
+        for sid, box in reversed(list(cluster_boxes.items()))  # outermost drawn first
+    ]
+    return Layout(max(xs) - min(xs) + 2 * margin, max(ys) - min(ys) + 2 * margin, scale, chart.direction,
+                  [placed[n] for n in order], edges, clusters)
+
+# ============================================================================
+# STYLES
+# ============================================================================
+
+def _node_colors(chart: Flowchart, node: Node, theme: Dict[str, str]) -> Dict[str, str]:
+    colors = {"fill": theme["fill"], "stroke": theme["stroke"], "color": theme["text"]}
+    styles = [chart.class_defs.get("default", {})] + [chart.class_defs.get(c, {}) for c in node.classes] + [node.style]
+    for style in styles:
+        for key in colors:
+            value = style.get(key)
+            if value:
+                try:
+                    ImageColor.getrgb(value)
+                    colors[key] = value
+                except ValueError:
+                    pass  # unknown colour syntax; keep the theme's
+    return colors
+
+def _theme(name: str) -> Dict[str, str]:
+    if name not in THEMES:
+        raise ValueError(f"Unknown theme {name!r}; use one of {', '.join(THEMES)}")
+    return THEMES[name]
+
+def _shape_polygon(shape: str, x0: float, y0: float, x1: float, y1: float) -> Optional[List[Tuple[float, float]]]:
+    cx, cy, h = (x0 + x1) / 2, (y0 + y1) / 2, y1 - y0
+    inset = h / 4
+    return {
+        "diamond": [(cx, y0), (x1, cy), (cx, y1), (x0, cy)],
+        "hexagon": [(x0 + inset, y0), (x1 - inset, y0), (x1, cy), (x1 - inset, y1), (x0 + inset, y1), (x0, cy)],
+        "asymmetric": [(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0 + inset, cy)],
+        "parallelogram": [(x0 + inset, y0), (x1, y0), (x1 - inset, y1), (x0, y1)],
+        "parallelogram_alt": [(x0, y0), (x1 - inset, y0), (x1, y1), (x0 + inset, y1)],
+        "trapezoid": [(x0 + inset, y0), (x1 - inset, y0), (x1, y1), (x0, y1)],
+        "trapezoid_alt": [(x0, y0), (x1, y0), (x1 - inset, y1), (x0 + inset, y1)],
+    }.get(shape)
+
+def _arrow_head(points: List[Tuple[float, float]], size: float) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
+    """(line points shortened to the arrow base, arrow triangle)"""
+    (x1, y1), (x2, y2) = points[-2], points[-1]
+    length = max(((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5, 1e-6)
+    ux, uy = (x2 - x1) / length, (y2 - y1) / length
+    bx, by = x2 - ux * size, y2 - uy * size
+    triangle = [(x2, y2), (bx - uy * size / 2, by + ux * size / 2), (bx + uy * size / 2, by - ux * size / 2)]
+    return points[:-1] + [(bx, by)], triangle
+
+def _plain(text: str) -> str:
+    """Drop characters outside the BMP (emoji) that raster fonts draw as boxes"""
+    return "".join(char for char in text if ord(char) <= 0xFFFF)
+
+# ============================================================================
+# RASTER OUTPUT
+# ============================================================================
+
+def _dashed(draw: ImageDraw.ImageDraw, points: List[Tuple[float, float]], fill: str, width: int, dash: float) -> None:
+    for (x1, y1), (x2, y2) in zip(points, points[1:]):
+        length = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
+        steps = max(1, int(length // dash))
+        for i in range(0, steps, 2):
+            t1, t2 = i / steps, min(1.0, (i + 1) / steps)
+            draw.line([(x1 + (x2 - x1) * t1, y1 + (y2 - y1) * t1), (x1 + (x2 - x1) * t2, y1 + (y2 - y1) * t2)], fill=fill, width=width)
+
+def _draw_lines(draw: ImageDraw.ImageDraw, lines: List[str], cx: float, cy: float, font, fill: str) -> None:
+    line_h = _line_height(font)
+    top = cy - line_h * len(lines) / 2
+    for i, line in enumerate(lines):
+        draw.text((cx, top + line_h * (i + 0.5)), _plain(line), font=font, fill=fill, anchor="mm")
+
+def draw_layout(chart: Flowchart, placed: Layout, theme: str = "default") -> Image.Image:
+    colors = _theme(theme)
+    scale = placed.scale
+    font = _font(round(FONT_SIZE * scale))
+    width = max(1, round(1.5 * scale))
+    image = Image.new("RGB", (int(placed.width + 0.5), int(placed.height + 0.5)), colors["background"])
+    draw = ImageDraw.Draw(image)
+
+    for sub, (x0, y0, x1, y1) in placed.clusters:
+        draw.rectangle((x0, y0, x1, y1), fill=colors["cluster_fill"], outline=colors["cluster_stroke"], width=width)
+        draw.text(((x0 + x1) / 2, y0 + 4 * scale), _plain(sub.title), font=font, fill=colors["text"], anchor="mt")
+
+    for e in placed.edges:
+        line_width = width * 2 if e.edge.line == "thick" else width
+        points = e.points
+        triangle = None
+        if e.edge.arrow:
+            points, triangle = _arrow_head(points, 8 * scale)
+        if e.edge.line == "dotted":
+            _dashed(draw, points, colors["edge"], line_width, 4 * scale)
+        else:
+            draw.line(points, fill=colors["edge"], width=line_width, joint="curve")
+        if triangle:
+            draw.polygon(triangle, fill=colors["edge"])
+        if e.label_center:
+            (cx, cy), (w, h) = e.label_center, e.label_size
+            draw.rectangle((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2), fill=colors["label_bg"])
+            _draw_lines(draw, e.lines, cx, cy, font, colors["text"])
+
+    for p in placed.nodes:
+        style = _node_colors(chart, p.node, colors)
+        x0, y0, x1, y1 = p.cx - p.w / 2, p.cy - p.h / 2, p.cx + p.w / 2, p.cy + p.h / 2
+        polygon = _shape_polygon(p.node.shape, x0, y0, x1, y1)
+        if polygon:
+            draw.polygon(polygon, fill=style["fill"], outline=style["stroke"], width=width)
+        elif p.node.shape == "circle":
+            draw.ellipse((x0, y0, x1, y1), fill=style["fill"], outline=style["stroke"], width=width)
+        elif p.node.shape in ("round", "stadium"):
+            radius = p.h / 2 if p.node.shape == "stadium" else 6 * scale
+            draw.rounded_rectangle((x0, y0, x1, y1), radius=radius, fill=style["fill"], outline=style["stroke"], width=width)
+        elif p.node.shape == "cylinder":
+            ry = 0.15 * p.h
+            draw.ellipse((x0, y1 - 2 * ry, x1, y1), fill=style["fill"], outline=style["stroke"], width=width)
+            draw.rectangle((x0, y0 + ry, x1, y1 - ry), fill=style["fill"])
+            draw.line([(x0, y0 + ry), (x0, y1 - ry)], fill=style["stroke"], width=width)
+            draw.line([(x1, y0 + ry), (x1, y1 - ry)], fill=style["stroke"], width=width)
+            draw.ellipse((x0, y0, x1, y0 + 2 * ry), fill=style["fill"], outline=style["stroke"], width=width)
+        else:
+            draw.rectangle((x0, y0, x1, y1), fill=style["fill"], outline=style["stroke"], width=width)
+            if p.node.shape == "subroutine":
+                inset = 8 * scale
+                draw.line([(x0 + inset, y0), (x0 + inset, y1)], fill=style["stroke"], width=width)
+                draw.line([(x1 - inset, y0), (x1 - inset, y1)], fill=style["stroke"], width=width)
+        _draw_lines(draw, p.lines, p.cx, p.cy + (0.15 * p.h / 2 if p.node.shape == "cylinder" else 0), font, style["color"])
+    return image
+
+def _encode(image: Image.Image, format: str) -> bytes:
+    buffer = io.BytesIO()
+    if format == "jpeg":
+        image.save(buffer, "JPEG", quality=90, optimize=True)
+    else:
+        # Diagrams use a handful of colours: a palette image encodes several times faster and smaller
+        image.quantize(PNG_COLORS, method=Image.Quantize.FASTOCTREE).save(buffer, "PNG")
+    return buffer.getvalue()
+
+# ============================================================================
+# SVG OUTPUT
+# ============================================================================
+
+def _svg_text(lines: List[str], cx: float, cy: float, font_size: float, fill: str) -> str:
+    line_h = font_size * 1.3
+    top = cy - line_h * len(lines) / 2
+    spans = "".join(
+        f'<tspan x="{cx:.1f}" y="{top + line_h * (i + 0.5):.1f}">{escape(line)}</tspan>' for i, line in enumerate(lines)
+    )
+    return f'<text text-anchor="middle" dominant-baseline="central" fill="{fill}">{spans}</text>'
+
+def _svg_points(points: List[Tuple[float, float]]) -> str:
+    return " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+
+def layout_svg(chart: Flowchart, placed: Layout, theme: str = "default") -> str:
+    colors = _theme(theme)
+    scale = placed.scale
+    font_size = round(FONT_SIZE * scale)
+    width = 1.5 * scale
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{placed.width:.0f}" height="{placed.height:.0f}" '
+        f'viewBox="0 0 {placed.width:.1f} {placed.height:.1f}" font-family="{SVG_FONT_FAMILY}" font-size="{font_size}">',
+        f'<rect width="100%" height="100%" fill="{colors["background"]}"/>'
+    ]
+
+    for sub, (x0, y0, x1, y1) in placed.clusters:
+        parts.append(f'<rect x="{x0:.1f}" y="{y0:.1f}" width="{x1 - x0:.1f}" height="{y1 - y0:.1f}" '
+                     f'fill="{colors["cluster_fill"]}" stroke="{colors["cluster_stroke"]}" stroke-width="{width}"/>')
+        parts.append(f'<text x="{(x0 + x1) / 2:.1f}" y="{y0 + 4 * scale + font_size:.1f}" text-anchor="middle" '
+                     f'fill="{colors["text"]}">{escape(sub.title)}</text>')
+
+    for e in placed.edges:
+        points = e.points
+        triangle = None
+        if e.edge.arrow:
+            points, triangle = _arrow_head(points, 8 * scale)
+        dash = f' stroke-dasharray="{4 * scale:.0f} {4 * scale:.0f}"' if e.edge.line == "dotted" else ""
+        stroke_width = width * 2 if e.edge.line == "thick" else width
+        parts.append(f'<polyline points="{_svg_points(points)}" fill="none" stroke="{colors["edge"]}" '
+                     f'stroke-width="{stroke_width}" stroke-linejoin="round"{dash}/>')
+        if triangle:
+            parts.append(f'<polygon points="{_svg_points(triangle)}" fill="{colors["edge"]}"/>')
+        if e.label_center:
+            (cx, cy), (w, h) = e.label_center, e.label_size
+            parts.append(f'<rect x="{cx - w / 2:.1f}" y="{cy - h / 2:.1f}" width="{w:.1f}" height="{h:.1f}" fill="{colors["label_bg"]}"/>')
+            parts.append(_svg_text(e.lines, cx, cy, font_size, colors["text"]))
+
+    for p in placed.nodes:
+        style = _node_colors(chart, p.node, colors)
+        paint = f'fill="{style["fill"]}" stroke="{style["stroke"]}" stroke-width="{width}"'
+        x0, y0, x1, y1 = p.cx - p.w / 2, p.cy - p.h / 2, p.cx + p.w / 2, p.cy + p.h / 2
+        polygon = _shape_polygon(p.node.shape, x0, y0, x1, y1)
+        text_cy = p.cy
+        if polygon:
+            parts.append(f'<polygon points="{_svg_points(polygon)}" {paint}/>')
+        elif p.node.shape == "circle":
+            parts.append(f'<ellipse cx="{p.cx:.1f}" cy="{p.cy:.1f}" rx="{p.w / 2:.1f}" ry="{p.h / 2:.1f}" {paint}/>')
+        elif p.node.shape == "cylinder":
+            ry = 0.15 * p.h
+            rx = p.w / 2
+            parts.append(f'<path d="M{x0:.1f},{y0 + ry:.1f} A{rx:.1f},{ry:.1f} 0 0 0 {x1:.1f},{y0 + ry:.1f} '
+                         f'L{x1:.1f},{y1 - ry:.1f} A{rx:.1f},{ry:.1f} 0 0 1 {x0:.1f},{y1 - ry:.1f} Z" {paint}/>')
+            parts.append(f'<path d="M{x0:.1f},{y0 + ry:.1f} A{rx:.1f},{ry:.1f} 0 0 1 {x1:.1f},{y0 + ry:.1f}" fill="none" '
+                         f'stroke="{style["stroke"]}" stroke-width="{width}"/>')
+            text_cy += ry / 2
+        else:
+            radius = p.h / 2 if p.node.shape == "stadium" else 6 * scale if p.node.shape == "round" else 0
+            parts.append(f'<rect x="{x0:.1f}" y="{y0:.1f}" width="{p.w:.1f}" height="{p.h:.1f}" rx="{radius:.1f}" {paint}/>')
+            if p.node.shape == "subroutine":
+                inset = 8 * scale
+                parts.append(f'<polyline points="{_svg_points([(x0 + inset, y0), (x0 + inset, y1)])}" stroke="{style["stroke"]}" stroke-width="{width}"/>')
+                parts.append(f'<polyline points="{_svg_points([(x1 - inset, y0), (x1 - inset, y1)])}" stroke="{style["stroke"]}" stroke-width="{width}"/>')
+        parts.append(_svg_text(p.lines, p.cx, text_cy, font_size, style["color"]))
+
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+# ============================================================================
+# PUBLIC API
+# ============================================================================
+
+def _normalize_format(format: str) -> str:
+    format = format.lower().lstrip(".")
+    format = "jpeg" if format == "jpg" else format
+    if format not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {format}")
+    return format
+
+def render(source: str, format: str = "png", theme: str = "default", scale: float = 1.0) -> bytes:
+    """Render Mermaid flowchart source to PNG, JPEG or SVG bytes; raises MermaidError"""
+    format = _normalize_format(format)
+    chart = parse(source)
+    placed = layout(chart, scale)
+    if format == "svg":
+        return layout_svg(chart, placed, theme).encode("utf-8")
+    return _encode(draw_layout(chart, placed, theme), format)
+
+def render_svg(source: str, theme: str = "default") -> str:
+    chart = parse(source)
+    return layout_svg(chart, layout(chart), theme)
+
+def render_text(text: str, format: str = "png", theme: str = "default", scale: float = 1.0) -> bytes:
+    """Render text as is in a monospace font (for diagrams that are not Mermaid, e.g. ASCII art)"""
+    format = _normalize_format(format)
+    colors = _theme(theme)
+    lines = (text or "").rstrip().splitlines() or [""]
+    font = _font(round(FONT_SIZE * scale), mono=True)
+    line_h = _line_height(font)
+    margin = MARGIN * scale
+    width = max(font.getlength(line) for line in lines) + 2 * margin
+    height = line_h * len(lines) + 2 * margin
+
+    if format == "svg":
+        spans = "".join(
+            f'<tspan x="{margin:.1f}" y="{margin + line_h * (i + 0.8):.1f}">{escape(line)}</tspan>' for i, line in enumerate(lines)
+        )
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" viewBox="0 0 {width:.1f} {height:.1f}">'
+            f'<rect width="100%" height="100%" fill="{colors["background"]}"/>'
+            f'<text font-family="DejaVu Sans Mono, monospace" font-size="{font.size}" fill="{colors["text"]}" xml:space="preserve">{spans}</text></svg>'
+        ).encode("utf-8")
+
+    image = Image.new("RGB", (int(width + 0.5), int(height + 0.5)), colors["background"])
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        draw.text((margin, margin + line_h * i), _plain(line), font=font, fill=colors["text"])
+    return _encode(image, format)
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a Mermaid flowchart without a browser or network")
+    parser.add_argument("source", help="Mermaid file")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.png, .jpg or .svg)")
+    parser.add_argument("--theme", default="default", choices=sorted(THEMES))
+    parser.add_argument("--scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with open(args.source, encoding="utf-8") as f:
+        data = render(f.read(), args.output.rsplit(".", 1)[-1], args.theme, args.scale)
+    with open(args.output, "wb") as f:
+        f.write(data)
+    print(f"Wrote {args.output} ({len(data)} bytes)")
@@ -0,0 +1,324 @@
+"""
+Kevin AI - Metrics
+In-process counters, gauges and histograms rendered in the Prometheus text format
+
+Version: 2.1
+Date: October 19, 2026
+
+Metrics are plain locked dictionaries updated in place; nothing is exported
+until a scrape renders them. Each process (API, kevin_worker.py) keeps its
+own values, so scrape every process. When prometheus_client is installed the
+same metrics are also registered with its default registry, for processes
+that already serve that one.
+"""
+
+import bisect
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import prometheus_client  # optional; only used to expose these metrics through its registry too
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+except ImportError:
+    prometheus_client = None
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond cache reads up to multi-minute pipelines
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# ============================================================================
+# METRIC TYPES
+# ============================================================================
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[Tuple[str, ...], float]]:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def exported_samples(self) -> List[Tuple[Tuple[str, ...], float]]:
+        samples = self.samples()
+        if not samples and not self.labelnames:
+            samples = [((), 0.0)]  # unlabelled metrics exist from the start
+        return samples
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in self.exported_samples():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    """Monotonic count"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels) -> None:
+        """Mirror a count kept elsewhere (e.g. a cache's own hit counter)"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Gauge(_Metric):
+    """Value that goes up and down"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, +Inf last, then sum
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return sum(state[:-1]) if state else 0
+
+    def cumulative(self) -> List[Tuple[Tuple[str, ...], List[Tuple[str, int]], float]]:
+        """(labels, [(le, cumulative count), ... +Inf], sum) per label set"""
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        series = []
+        for key, state in items:
+            buckets, running = [], 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                running += count
+                buckets.append((_format_value(bound), running))
+            series.append((key, buckets, state[-1]))
+        return series
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, buckets, total in self.cumulative():
+            for bound, count in buckets:
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', bound))} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {buckets[-1][1]}")
+        return lines
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+class MetricsRegistry:
+    """Metrics of this process plus callbacks that refresh gauges at scrape time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing  # module reloaded; keep the values already counted
+            self._metrics[metric.name] = metric
+        return metric
+
+    def on_collect(self, callback: Callable[[], None]) -> None:
+        """Run callback before every render (keep it cheap: it runs per scrape)"""
+        with self._lock:
+            self._collectors.append(callback)
+
+    def collect(self) -> List[_Metric]:
+        """Run the collect callbacks and return the metrics, sorted by name"""
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        for callback in collectors:
+            try:
+                callback()
+            except Exception:
+                traceback.print_exc()  # a broken collector must not break the scrape
+        return metrics
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.collect():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, tuple(labelnames)))
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, tuple(labelnames)))
+
+def histogram(name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, tuple(labelnames), buckets))
+
+# ============================================================================
+# KEVIN METRICS
+# ============================================================================
+
+# Pipeline (recorded by kevin_tracing.span as each span ends)
+PIPELINE_DURATION = histogram("kevin_pipeline_duration_seconds", "End-to-end SOP pipeline latency")
+PIPELINES_IN_FLIGHT = gauge("kevin_pipelines_in_flight", "Pipelines running in this process")
+AGENT_DURATION = histogram("kevin_agent_duration_seconds", "Agent node latency", ["agent"])
+AGENT_ERRORS = counter("kevin_agent_errors_total", "Errors recorded by agent nodes", ["agent"])
+LLM_DURATION = histogram("kevin_llm_call_duration_seconds", "LLM call latency", ["provider", "model", "operation"])
+LLM_TOKENS = counter("kevin_llm_tokens_total", "LLM tokens consumed", ["provider", "model", "direction"])
+LLM_CACHED_TOKENS = counter("kevin_llm_cached_tokens_total", "Input tokens served from the provider's prompt cache", ["provider", "model"])
+EXTRACTION_DURATION = histogram("kevin_extraction_duration_seconds", "Document text extraction latency", ["format"])
+EXTRACTION_PAGE_DURATION = histogram(
+    "kevin_extraction_page_seconds", "Extraction time per page (document latency / pages)", ["format"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+EXTRACTED_PAGES = counter("kevin_extracted_pages_total", "Pages extracted, by whether they needed OCR", ["format", "ocr"])
+OCR_PAGE_DURATION = histogram(
+    "kevin_ocr_page_seconds", "OCR latency per scanned page",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0)
+)
+JSON_PARSE_FAILURES = counter("kevin_json_parse_failures_total", "LLM responses that were not valid JSON", ["operation"])
+
+# Caches (hit ratios are derived at scrape time)
+CACHE_REQUESTS = counter("kevin_cache_requests_total", "Cache lookups", ["cache", "result"])
+CACHE_HIT_RATIO = gauge("kevin_cache_hit_ratio", "Hits / lookups since process start", ["cache"])
+
+# Jobs and admission (refreshed from the job store when the API is scraped)
+JOBS = gauge("kevin_jobs", "Jobs in the job store by status", ["status"])
+SUBMISSIONS = counter("kevin_submissions_total", "SOP submissions by dedup outcome", ["outcome"])
+ADMISSION_TPM = gauge("kevin_admission_tokens_per_minute", "LLM tokens per minute: the quota and the running jobs' projected draw", ["kind"])
+ADMISSION_ESTIMATE_SCALE = gauge("kevin_admission_estimate_scale", "Median actual / estimated tokens of recent jobs")
+
+# API
+HTTP_DURATION = histogram("kevin_http_request_duration_seconds", "API request latency", ["method", "route", "status"])
+HTTP_IN_FLIGHT = gauge("kevin_http_requests_in_flight", "API requests being served")
+
+def _update_hit_ratios() -> None:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), value in CACHE_REQUESTS.samples():
+        hits_and_lookups = totals.setdefault(cache, [0.0, 0.0])
+        hits_and_lookups[1] += value
+        if result == "hit":
+            hits_and_lookups[0] += value
+    for cache, (hits, lookups) in totals.items():
+        CACHE_HIT_RATIO.set(hits / lookups if lookups else 0.0, cache=cache)
+
+REGISTRY.on_collect(_update_hit_ratios)
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+# ============================================================================
+# PROMETHEUS_CLIENT BRIDGE (optional)
+# ============================================================================
+
+class _ClientCollector:
+    """Custom prometheus_client collector reading REGISTRY at scrape time"""
+
+    def collect(self):
+        for metric in REGISTRY.collect():
+            if isinstance(metric, Histogram):
+                family = HistogramMetricFamily(metric.name, metric.documentation, labels=metric.labelnames)
+                for key, buckets, total in metric.cumulative():
+                    family.add_metric(list(key), buckets, total)
+            else:
+                family_type = CounterMetricFamily if isinstance(metric, Counter) else GaugeMetricFamily
+                family = family_type(metric.name, metric.documentation, labels=metric.labelnames)
+                for key, value in metric.exported_samples():
+                    family.add_metric(list(key), value)
+            yield family
+
+if prometheus_client is not None:
+    try:
+        prometheus_client.REGISTRY.register(_ClientCollector())
+    except ValueError:
+        pass  # module reloaded: the collector from the first import is still registered
+
+# ============================================================================
+# STANDALONE EXPORTER (worker processes)
+# ============================================================================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the log
+
+def start_http_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread (for processes without the API)"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="kevin-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,26 @@
+"""
+Kevin AI - Opportunity Figures
+Savings of automation opportunities, shared by the agents, exports and catalog
+
+Kept free of the LLM stack so reports and catalog tools can import it alone.
+
+Version: 2.1
+Date: October 19, 2026
+"""
+
+from typing import Dict
+
+
+def as_number(value) -> float:
+    """Lenient float conversion for LLM-produced numbers ("$47,100", None, ...)"""
+    try:
+        return float(str(value).replace("$", "").replace(",", "").replace("%", ""))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def opportunity_savings(opp: Dict) -> float:
+    """Annual savings of an opportunity in either of the shapes agents produce"""
+    if "estimated_savings_annual" in opp:
+        return as_number(opp["estimated_savings_annual"])
+    return as_number((opp.get("impact_analysis") or {}).get("total_annual_savings"))
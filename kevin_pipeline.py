@@ -0,0 +1,227 @@
+"""
+Kevin AI - Pipeline Jobs
+Job runner, session output writer and batch hook shared by the API and queue workers
+
+Version: 2.1
+Date: October 19, 2026
+
+kevin_api (local job mode) and kevin_worker (queue mode) both run jobs
+through run_pipeline_job; this module keeps the worker from importing the
+FastAPI app.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from kevin_admission import AdmissionController
+from kevin_agents import PRIORITY_TIER_ORDER, get_shared_orchestrator, settings
+from kevin_artifact_index import IndexSpec, build_collection_index
+from kevin_catalog import SessionCatalog, summarize_result
+from kevin_jobs import JobStore, JOB_DONE, JOB_FAILED
+from kevin_opportunities import opportunity_savings
+from kevin_session_store import BATCHES_DIR, write_session
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+OUTPUT_DIR = "./outputs"
+DATA_DIR = os.getenv("KEVIN_DATA_DIR", "./data")  # databases and caches
+
+# Job store and queue (shared by API processes and workers)
+JOB_DB_PATH = os.getenv("KEVIN_JOB_DB", os.path.join(DATA_DIR, "kevin_jobs.db"))
+JOB_QUEUE_BACKEND = os.getenv("KEVIN_JOB_QUEUE", "sqlite")  # sqlite or redis (queue mode)
+REDIS_URL = os.getenv("KEVIN_REDIS_URL", "redis://localhost:6379/0")
+
+# Session catalog
+CATALOG_DB_PATH = os.getenv("KEVIN_CATALOG_DB", os.path.join(DATA_DIR, "kevin_catalog.db"))
+
+# Admission control (quota and token estimates are LLM settings in kevin_agents)
+MAX_QUEUE_DEPTH = int(os.getenv("KEVIN_MAX_QUEUE_DEPTH", "50"))  # 429 beyond this many waiting jobs; 0 = unlimited
+
+# Indexes of the paginated collections, written with each session
+TEST_PRIORITY_ORDER = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+def _number_or_none(value) -> Optional[float]:
+    try:
+        return float(str(value).replace("$", "").replace(",", "").replace("%", ""))
+    except (TypeError, ValueError):
+        return None
+
+OPPORTUNITY_INDEX = IndexSpec(
+    filters={
+        "priority": lambda opp: opp.get("priority_tier") or opp.get("priority"),
+        "automation_type": lambda opp: opp.get("automation_type"),
+        "step_id": lambda opp: opp.get("step_id")
+    },
+    sorts={
+        "opportunity_id": lambda opp: opp.get("opportunity_id"),
+        "priority": lambda opp: PRIORITY_TIER_ORDER.get(str(opp.get("priority_tier") or opp.get("priority") or "").upper()),
+        "priority_score": lambda opp: _number_or_none(opp.get("priority_score", opp.get("roi_score"))),
+        "savings": opportunity_savings,
+        "payback_months": lambda opp: _number_or_none((opp.get("roi_metrics") or {}).get("payback_period_months")),
+        "implementation_cost": lambda opp: _number_or_none((opp.get("implementation") or {}).get("estimated_cost"))
+    }
+)
+
+TEST_CASE_INDEX = IndexSpec(
+    filters={
+        "priority": lambda test: test.get("priority"),
+        "test_type": lambda test: test.get("test_type"),
+        "status": lambda test: test.get("status"),
+        "process_step": lambda test: test.get("process_step")
+    },
+    sorts={
+        "test_id": lambda test: test.get("test_id"),
+        "priority": lambda test: TEST_PRIORITY_ORDER.get(str(test.get("priority") or "").lower()),
+        "test_type": lambda test: test.get("test_type"),
+        "status": lambda test: test.get("status"),
+        "process_step": lambda test: test.get("process_step")
+    }
+)
+
+# ============================================================================
+# SHARED INSTANCES
+# ============================================================================
+
+def make_admission(store: JobStore, slots: Optional[int] = None) -> AdmissionController:
+    """Admission controller for the LLM quota configured in settings"""
+    return AdmissionController(
+        store,
+        tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+        base_tokens=settings.PIPELINE_BASE_TOKENS,
+        tokens_per_sop_token=settings.PIPELINE_TOKENS_PER_SOP_TOKEN,
+        pipeline_tpm=settings.PIPELINE_TOKENS_PER_MINUTE,
+        max_queue_depth=MAX_QUEUE_DEPTH,
+        slots=slots
+    )
+
+# Global session catalog instance
+session_catalog = None
+
+def get_session_catalog() -> SessionCatalog:
+    """Dependency to get the session catalog (indexed session listings)"""
+    global session_catalog
+    if session_catalog is None:
+        session_catalog = SessionCatalog(CATALOG_DB_PATH)
+    return session_catalog
+
+# ============================================================================
+# SESSION OUTPUTS
+# ============================================================================
+
+class ProcessResponse(BaseModel):
+    """Response model for SOP processing"""
+    session_id: str
+    status: str
+    timestamp: str
+    current_state_map: Optional[str] = None
+    future_state_map: Optional[str] = None
+    automation_opportunities_count: int = 0
+    test_cases_count: int = 0
+    estimated_savings_annual: Optional[float] = None
+    llm_tokens: Optional[int] = None  # tokens in + out across all LLM calls
+    errors: List[str] = []
+
+def run_pipeline_job(job: Dict, report: Callable[[Dict], None]) -> Dict:
+    """Job runner: process the uploaded SOP and save the session outputs"""
+    params = job["params"]
+    session_id = job["session_id"]
+    
+    print(f"Processing SOP for session: {session_id}")
+    try:
+        result = get_shared_orchestrator().process(
+            params["sop_path"],
+            params.get("diagram_path"),
+            params.get("domain", "logistics"),
+            session_id=session_id,
+            on_event=report
+        )
+    except Exception:
+        get_session_catalog().record(
+            session_id,
+            timestamp=datetime.now().isoformat(),
+            domain=params.get("domain", "logistics"),
+            status="failed"
+        )
+        raise
+    
+    return save_session_outputs(session_id, result).model_dump()
+
+def save_session_outputs(session_id: str, result: Dict) -> ProcessResponse:
+    """Write the session container to OUTPUT_DIR and summarize the session"""
+    
+    # One compressed container: each artifact is a section that endpoints
+    # decode on its own, plus the indexes of the paginated collections
+    write_session(
+        os.path.join(OUTPUT_DIR, session_id),
+        result,
+        extra_sections={
+            "automation_opportunities.index": build_collection_index(result["automation_opportunities"], OPPORTUNITY_INDEX),
+            "test_cases.index": build_collection_index(result["test_cases"], TEST_CASE_INDEX)
+        }
+    )
+    
+    # Index the session for listings
+    summary = summarize_result(result)
+    get_session_catalog().record(session_id, **summary, status="completed")
+    llm_usage = (result.get("timing_summary") or {}).get("llm")
+    
+    return ProcessResponse(
+        session_id=session_id,
+        status="completed",
+        timestamp=result["timestamp"],
+        current_state_map=result["current_state_map"],
+        future_state_map=result["future_state_map"],
+        automation_opportunities_count=summary["automation_opportunities"],
+        test_cases_count=summary["test_cases"],
+        estimated_savings_annual=summary["estimated_savings_annual"],
+        llm_tokens=llm_usage["tokens_in"] + llm_usage["tokens_out"] if llm_usage else None,
+        errors=result.get("errors", [])
+    )
+
+def write_batch_summary(batch: Dict) -> Dict:
+    """Batch completion hook: write the combined summary artifact and return the totals"""
+    
+    rows = []
+    totals = {"items": 0, JOB_DONE: 0, JOB_FAILED: 0, "automation_opportunities": 0, "test_cases": 0, "estimated_savings_annual": 0.0}
+    for item in batch["items"]:
+        result = item.get("result") or {}
+        rows.append({
+            "position": item["position"],
+            "filename": item["filename"],
+            "job_id": item["job_id"],
+            "session_id": item["session_id"],
+            "status": item["status"],
+            "deduplicated": item["deduplicated"],
+            "automation_opportunities": result.get("automation_opportunities_count", 0),
+            "test_cases": result.get("test_cases_count", 0),
+            "estimated_savings_annual": result.get("estimated_savings_annual") or 0.0,  # Optional in ProcessResponse
+            "error": item.get("error")
+        })
+        totals["items"] += 1
+        totals[item["status"]] = totals.get(item["status"], 0) + 1
+        totals["automation_opportunities"] += rows[-1]["automation_opportunities"]
+        totals["test_cases"] += rows[-1]["test_cases"]
+        totals["estimated_savings_annual"] += rows[-1]["estimated_savings_annual"]
+    
+    summary_dir = os.path.join(OUTPUT_DIR, BATCHES_DIR, batch["batch_id"])
+    os.makedirs(summary_dir, exist_ok=True)
+    tmp_path = os.path.join(summary_dir, "batch_summary.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "batch_id": batch["batch_id"],
+            "domain": batch["params"].get("domain"),
+            "created_at": batch["created_at"],
+            "finished_at": batch["finished_at"],
+            "totals": totals,
+            "items": rows
+        }, f, indent=2, default=str)
+    os.replace(tmp_path, os.path.join(summary_dir, "batch_summary.json"))
+    
+    print(f"Batch {batch['batch_id']} finished: {totals[JOB_DONE]}/{totals['items']} SOPs processed")
+    return totals
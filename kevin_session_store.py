@@ -0,0 +1,300 @@
+"""
+Kevin AI - Session Store
+One compressed, self-indexed container per session instead of per-artifact files
+
+Version: 2.1
+Date: October 19, 2026
+
+Layout of session.bundle:
+    8 bytes   magic "KVNSESS1"
+    4 bytes   header length (little-endian)
+    header    JSON: codec and {section: offset, length, size, kind}
+    sections  each compressed on its own, so a read decodes only its section
+
+Usage:
+    python kevin_session_store.py pack [--output-dir ./outputs] [--remove-files]
+"""
+
+import argparse
+import functools
+import os
+import struct
+import uuid
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+from kevin_zipstream import PackageEntry, package_files
+
+try:
+    import zstandard  # optional; zlib is used when it is not installed
+except ImportError:
+    zstandard = None
+
+CONTAINER_NAME = "session.bundle"
+BATCHES_DIR = "batches"  # output subdirectory of batch summaries, next to the sessions
+MAGIC = b"KVNSESS1"
+CONTAINER_VERSION = 1
+
+# Everything of the result not stored in its own section
+RESULT_SECTION = "result"
+# Virtual section: the result with every section merged back in
+FULL_RESULT = "full_result"
+
+# ============================================================================
+# SECTION LAYOUT
+# ============================================================================
+
+@dataclass(frozen=True)
+class SectionSpec:
+    """A part of the session result stored (and served) on its own"""
+    name: str
+    path: Tuple[str, ...]  # location in the result
+    kind: str  # json or text
+    filename: str  # per-artifact file of the legacy layout and of exports
+
+SESSION_SECTIONS = (
+    SectionSpec("current_state_map", ("current_state_map",), "text", "current_state_map.mermaid"),
+    SectionSpec("future_state_map", ("future_state_map",), "text", "future_state_map.mermaid"),
+    SectionSpec("automation_opportunities", ("automation_opportunities",), "json", "automation_opportunities.json"),
+    SectionSpec("test_cases", ("test_cases",), "json", "test_cases.json"),
+    SectionSpec("generated_code", ("generated_code", "code"), "text", "generated_code.txt"),
+    SectionSpec("kpi_analysis", ("kpi_analysis",), "json", "kpi_analysis.json"),
+)
+SECTIONS_BY_NAME = {spec.name: spec for spec in SESSION_SECTIONS}
+FULL_RESULT_FILENAME = "full_result.json"
+
+def container_path(session_dir: str) -> str:
+    return os.path.join(session_dir, CONTAINER_NAME)
+
+def section_kind(name: str) -> str:
+    spec = SECTIONS_BY_NAME.get(name)
+    return spec.kind if spec else "json"
+
+# ============================================================================
+# CODECS
+# ============================================================================
+
+def _default_codec() -> str:
+    return "zstd" if zstandard is not None else "zlib"
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 6)
+
+def _decompress(data: bytes, codec: str, size: int) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This session container is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=size)
+    return zlib.decompress(data)
+
+def _encode(value: Any, kind: str) -> bytes:
+    if kind == "text":
+        return (value or "").encode("utf-8")
+    return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+# ============================================================================
+# WRITING
+# ============================================================================
+
+def _split_result(result: Dict) -> Tuple[Dict, Dict[str, Any]]:
+    """(remaining result, section values) without modifying result"""
+    remaining = dict(result)
+    values = {}
+    for spec in SESSION_SECTIONS:
+        parent = remaining
+        for key in spec.path[:-1]:
+            if not isinstance(parent.get(key), dict):
+                break
+            parent[key] = dict(parent[key])  # copy before popping from it
+            parent = parent[key]
+        else:
+            if spec.path[-1] in parent:
+                values[spec.name] = parent.pop(spec.path[-1])
+    return remaining, values
+
+def write_session(session_dir: str, result: Dict, extra_sections: Optional[Dict[str, Any]] = None, codec: Optional[str] = None) -> str:
+    """Write the session container atomically; returns its path
+
+    extra_sections: additional JSON sections (e.g. collection indexes)
+    """
+    codec = codec or _default_codec()
+    remaining, values = _split_result(result)
+    sections = {RESULT_SECTION: (remaining, "json")}
+    for name, value in values.items():
+        sections[name] = (value, SECTIONS_BY_NAME[name].kind)
+    for name, value in (extra_sections or {}).items():
+        sections[name] = (value, "json")
+
+    table = {}
+    blobs = []
+    offset = 0
+    for name, (value, kind) in sections.items():
+        raw = _encode(value, kind)
+        blob = _compress(raw, codec)
+        table[name] = {"offset": offset, "length": len(blob), "size": len(raw), "kind": kind}
+        blobs.append(blob)
+        offset += len(blob)
+    header = orjson.dumps({"version": CONTAINER_VERSION, "codec": codec, "sections": table})
+
+    os.makedirs(session_dir, exist_ok=True)
+    path = container_path(session_dir)
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.part"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+# ============================================================================
+# READING
+# ============================================================================
+
+@functools.lru_cache(maxsize=512)
+def _header(path: str, mtime_ns: int, size: int) -> Tuple[Dict, int]:
+    """(header, data start) of a container version; cached per file version"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a session container")
+        prefix = f.read(4)
+        length = struct.unpack("<I", prefix)[0] if len(prefix) == 4 else None
+        header = f.read(length) if length is not None else b""
+    if length is None or len(header) < length:
+        raise ValueError(f"{path} is truncated (header)")
+    return orjson.loads(header), len(MAGIC) + 4 + length
+
+def read_header(path: str) -> Tuple[Dict, int]:
+    stat = os.stat(path)
+    return _header(path, stat.st_mtime_ns, stat.st_size)
+
+def section_names(path: str) -> List[str]:
+    return list(read_header(path)[0]["sections"])
+
+def read_section(path: str, name: str) -> bytes:
+    """Decoded bytes of one section (JSON or UTF-8 text); raises FileNotFoundError if absent
+
+    A container cut short (e.g. a copy that did not finish) raises ValueError.
+
+    FULL_RESULT assembles the complete result as JSON.
+    """
+    if name == FULL_RESULT:
+        return orjson.dumps(read_full_result(path), default=str, option=orjson.OPT_NON_STR_KEYS)
+
+    header, start = read_header(path)
+    entry = header["sections"].get(name)
+    if entry is None:
+        raise FileNotFoundError(f"{path} has no section {name}")
+    with open(path, "rb") as f:
+        f.seek(start + entry["offset"])
+        blob = f.read(entry["length"])
+    if len(blob) != entry["length"]:
+        raise ValueError(f"{path} is truncated (section {name})")
+    return _decompress(blob, header["codec"], entry["size"])
+
+def read_value(path: str, name: str) -> Any:
+    data = read_section(path, name)
+    return data.decode("utf-8") if section_kind(name) == "text" else orjson.loads(data)
+
+def read_full_result(path: str) -> Dict:
+    """The session result with every stored section merged back in"""
+    result = read_value(path, RESULT_SECTION)
+    names = set(section_names(path))
+    for spec in SESSION_SECTIONS:
+        if spec.name not in names:
+            continue
+        parent = result
+        for key in spec.path[:-1]:
+            parent = parent.setdefault(key, {})
+        parent[spec.path[-1]] = read_value(path, spec.name)
+    return result
+
+# ============================================================================
+# SESSION DIRECTORIES (container or legacy per-artifact files)
+# ============================================================================
+
+def session_exists(session_dir: str) -> bool:
+    return os.path.isfile(container_path(session_dir)) or os.path.isfile(os.path.join(session_dir, FULL_RESULT_FILENAME))
+
+def session_dirs(output_dir: str) -> List[Tuple[str, str]]:
+    """(session_id, directory) of every session in an output directory, by name"""
+    sessions = []
+    for name in sorted(os.listdir(output_dir)):
+        session_dir = os.path.join(output_dir, name)
+        if name != BATCHES_DIR and session_exists(session_dir):
+            sessions.append((name, session_dir))
+    return sessions
+
+def load_full_result(session_dir: str) -> Dict:
+    """Full result of a session in either layout; raises FileNotFoundError"""
+    path = container_path(session_dir)
+    if os.path.isfile(path):
+        return read_full_result(path)
+    with open(os.path.join(session_dir, FULL_RESULT_FILENAME), "rb") as f:
+        return orjson.loads(f.read())
+
+def pack_session(session_dir: str, remove_files: bool = False) -> bool:
+    """Convert a legacy session directory into a container; False if nothing to do"""
+    if os.path.isfile(container_path(session_dir)) or not os.path.isfile(os.path.join(session_dir, FULL_RESULT_FILENAME)):
+        return False
+    write_session(session_dir, load_full_result(session_dir))
+    if remove_files:
+        for filename in [FULL_RESULT_FILENAME] + [spec.filename for spec in SESSION_SECTIONS]:
+            path = os.path.join(session_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+    return True
+
+def _export_bytes(path: str, name: str) -> bytes:
+    if section_kind(name) == "text":
+        return read_section(path, name)
+    # Exports are for people: pretty-print JSON
+    return orjson.dumps(read_value(path, name), default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+def session_package(session_dir: str) -> List[PackageEntry]:
+    """Archive members of a session: its artifacts as individual files
+
+    Container sections are expanded into the per-artifact files of the
+    legacy layout; other files of the directory are included as they are.
+    """
+    path = container_path(session_dir)
+    if not os.path.isfile(path):
+        return package_files(session_dir)
+
+    stat = os.stat(path)
+    names = set(section_names(path))
+    entries = package_files(session_dir, exclude=(CONTAINER_NAME,))
+    entries.append(PackageEntry(FULL_RESULT_FILENAME, path, stat, functools.partial(_export_bytes, path, FULL_RESULT)))
+    for spec in SESSION_SECTIONS:
+        if spec.name in names:
+            entries.append(PackageEntry(spec.filename, path, stat, functools.partial(_export_bytes, path, spec.name)))
+    return sorted(entries, key=lambda entry: entry.arcname)
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kevin AI session store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack_parser = subparsers.add_parser("pack", help="Convert per-artifact session directories into containers")
+    pack_parser.add_argument("--output-dir", default=os.getenv("KEVIN_OUTPUT_DIR", "./outputs"))
+    pack_parser.add_argument("--remove-files", action="store_true", help="Delete the per-artifact files afterwards")
+    args = parser.parse_args()
+
+    packed = 0
+    for _, session_dir in session_dirs(args.output_dir):
+        if pack_session(session_dir, args.remove_files):
+            packed += 1
+    print(f"Packed {packed} sessions in {args.output_dir}")
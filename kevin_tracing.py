@@ -0,0 +1,269 @@
+"""
+Kevin AI - Pipeline Tracing
+OpenTelemetry spans for agent nodes, LLM calls, extraction and JSON parsing
+
+Version: 2.1
+Date: October 19, 2026
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+import kevin_metrics as metrics
+
+TRACER_NAME = "kevin_ai"
+NODE_SPAN_PREFIX = "node."
+PIPELINE_SPAN = "pipeline"
+
+# ============================================================================
+# SESSION TIMING COLLECTOR
+# ============================================================================
+
+class SessionTimingCollector(SpanProcessor):
+    """Keep finished spans per trace so a run can summarize its own timings"""
+
+    def __init__(self, max_traces: int = 256):
+        self.max_traces = max_traces
+        self._lock = threading.Lock()
+        self._traces: Dict[int, List[Dict]] = {}
+
+    def on_start(self, span, parent_context=None) -> None:
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        record = {
+            "name": span.name,
+            "span_id": span.context.span_id,
+            "parent_id": span.parent.span_id if span.parent else None,
+            "duration_ms": (span.end_time - span.start_time) / 1e6,
+            "attributes": dict(span.attributes or {})
+        }
+        with self._lock:
+            if span.context.trace_id not in self._traces and len(self._traces) >= self.max_traces:
+                # Drop the oldest trace; summaries are only read right after a run
+                self._traces.pop(next(iter(self._traces)))
+            self._traces.setdefault(span.context.trace_id, []).append(record)
+
+    def pop(self, trace_id: int) -> List[Dict]:
+        with self._lock:
+            return self._traces.pop(trace_id, [])
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+def _record_span_metrics(name: str, seconds: float, attrs: Dict) -> None:
+    """Feed a finished span into the process-wide Prometheus metrics"""
+    if name.startswith(NODE_SPAN_PREFIX):
+        agent = name[len(NODE_SPAN_PREFIX):]
+        metrics.AGENT_DURATION.observe(seconds, agent=agent)
+        if attrs.get("kevin.errors_added", 0) > 0:
+            metrics.AGENT_ERRORS.inc(attrs["kevin.errors_added"], agent=agent)
+    elif name == "llm.invoke":
+        provider = attrs.get("llm.provider", "unknown")
+        model = attrs.get("llm.model", "unknown")
+        metrics.LLM_DURATION.observe(seconds, provider=provider, model=model, operation=attrs.get("llm.operation", "unknown"))
+        metrics.LLM_TOKENS.inc(attrs.get("llm.tokens_in", 0), provider=provider, model=model, direction="in")
+        metrics.LLM_TOKENS.inc(attrs.get("llm.tokens_out", 0), provider=provider, model=model, direction="out")
+        if attrs.get("llm.cached_tokens"):
+            metrics.LLM_CACHED_TOKENS.inc(attrs["llm.cached_tokens"], provider=provider, model=model)
+        metrics.record_cache("llm_prompt", bool(attrs.get("llm.cache_hit")))
+    elif name == "extract.ocr_page":
+        metrics.OCR_PAGE_DURATION.observe(seconds)
+    elif name.startswith("extract."):
+        fmt = name[len("extract."):]
+        pages = attrs.get("extract.pages", 0)
+        ocr_pages = attrs.get("extract.ocr_pages", 0)
+        metrics.EXTRACTION_DURATION.observe(seconds, format=fmt)
+        if pages:
+            metrics.EXTRACTION_PAGE_DURATION.observe(seconds / pages, format=fmt)
+            metrics.EXTRACTED_PAGES.inc(pages - ocr_pages, format=fmt, ocr="false")
+            metrics.EXTRACTED_PAGES.inc(ocr_pages, format=fmt, ocr="true")
+        if fmt == "image":
+            # An image is a single OCR'd page without a child span
+            metrics.OCR_PAGE_DURATION.observe(seconds)
+    elif name == "json.parse":
+        if not attrs.get("json.success", True):
+            metrics.JSON_PARSE_FAILURES.inc(operation=attrs.get("json.operation", "unknown"))
+    elif name == PIPELINE_SPAN:
+        metrics.PIPELINE_DURATION.observe(seconds)
+
+class _MeteredSpan:
+    """The current OpenTelemetry span, keeping a copy of its attributes for the metrics"""
+
+    def __init__(self, current):
+        self._span = current
+        self.attributes: Dict = {}
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+        self._span.set_attribute(key, value)
+
+    def __getattr__(self, name):
+        return getattr(self._span, name)
+
+# ============================================================================
+# SETUP
+# ============================================================================
+
+_init_lock = threading.Lock()
+_collector: Optional[SessionTimingCollector] = None
+
+def init_tracing(exporter: str = "none", otlp_endpoint: str = "", service_name: str = "kevin-ai") -> None:
+    """Install the tracer provider once per process (exporter: console, otlp, none)"""
+    global _collector
+
+    with _init_lock:
+        if _collector is not None:
+            return
+
+        provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        _collector = SessionTimingCollector()
+        provider.add_span_processor(_collector)
+
+        if exporter == "console":
+            provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+        elif exporter == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=otlp_endpoint or None)))
+        elif exporter != "none":
+            raise ValueError(f"Unsupported trace exporter: {exporter}")
+
+        trace.set_tracer_provider(provider)
+
+def get_tracer():
+    """Get the Kevin AI tracer"""
+    return trace.get_tracer(TRACER_NAME)
+
+@contextmanager
+def span(name: str, **attributes):
+    """Open a span as the current span, skipping None-valued attributes
+
+    Metrics are recorded here when the span ends, from its name, duration and
+    attributes, so they do not depend on which tracer provider is installed
+    or whether the span is sampled.
+    """
+    if name == PIPELINE_SPAN:
+        metrics.PIPELINES_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    with get_tracer().start_as_current_span(name) as current:
+        metered = _MeteredSpan(current)
+        try:
+            set_attributes(metered, **attributes)
+            yield metered
+        finally:
+            if name == PIPELINE_SPAN:
+                metrics.PIPELINES_IN_FLIGHT.dec()
+            _record_span_metrics(name, time.perf_counter() - started, metered.attributes)
+
+def set_attributes(current, **attributes) -> None:
+    """Set span attributes, skipping None values (OpenTelemetry rejects them)"""
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+
+def traced_node(name: str, fn: Callable) -> Callable:
+    """Wrap a LangGraph node function in a node span"""
+
+    @wraps(fn)
+    def wrapper(state, *args, **kwargs):
+        with span(NODE_SPAN_PREFIX + name, **{"kevin.node": name, "kevin.session_id": state.get("session_id")}) as current:
+            errors_before = len(state.get("errors", []))
+            result = fn(state, *args, **kwargs)
+            current.set_attribute("kevin.errors_added", len(result.get("errors", [])) - errors_before)
+            return result
+
+    return wrapper
+
+def record_llm_usage(current, response) -> None:
+    """Copy token usage and cache hits from a LangChain message onto a span"""
+    usage = getattr(response, "usage_metadata", None) or {}
+    cached = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+    set_attributes(
+        current,
+        **{
+            "llm.tokens_in": usage.get("input_tokens"),
+            "llm.tokens_out": usage.get("output_tokens"),
+            "llm.cached_tokens": cached,
+            "llm.cache_hit": cached > 0,
+            "llm.response_bytes": len(str(getattr(response, "content", "")).encode("utf-8"))
+        }
+    )
+
+# ============================================================================
+# SESSION TIMING SUMMARY
+# ============================================================================
+
+def _owning_node(record: Dict, by_id: Dict[int, Dict]) -> Optional[str]:
+    """Walk up the parent chain to the enclosing node span"""
+    parent = by_id.get(record["parent_id"])
+    while parent is not None:
+        if parent["name"].startswith(NODE_SPAN_PREFIX):
+            return parent["name"][len(NODE_SPAN_PREFIX):]
+        parent = by_id.get(parent["parent_id"])
+    return None
+
+def session_timing_summary(trace_id: int) -> Dict:
+    """Summarize (and release) the spans recorded for one pipeline trace"""
+    records = _collector.pop(trace_id) if _collector is not None else []
+    by_id = {r["span_id"]: r for r in records}
+
+    summary = {
+        "total_ms": 0.0,
+        "nodes": {},
+        "llm": {"calls": 0, "duration_ms": 0.0, "tokens_in": 0, "tokens_out": 0, "cache_hits": 0},
+        "extraction": {"duration_ms": 0.0, "pages": 0, "ocr_pages": 0, "bytes": 0},
+        "json_parse": {"count": 0, "failures": 0, "duration_ms": 0.0}
+    }
+
+    for record in records:
+        attrs = record["attributes"]
+        name = record["name"]
+
+        if record["parent_id"] not in by_id:
+            summary["total_ms"] = max(summary["total_ms"], record["duration_ms"])
+
+        if name.startswith(NODE_SPAN_PREFIX):
+            node = summary["nodes"].setdefault(name[len(NODE_SPAN_PREFIX):], {"duration_ms": 0.0, "llm_calls": 0, "tokens_in": 0, "tokens_out": 0})
+            node["duration_ms"] += record["duration_ms"]
+        elif name == "llm.invoke":
+            llm = summary["llm"]
+            llm["calls"] += 1
+            llm["duration_ms"] += record["duration_ms"]
+            llm["tokens_in"] += attrs.get("llm.tokens_in", 0)
+            llm["tokens_out"] += attrs.get("llm.tokens_out", 0)
+            llm["cache_hits"] += int(attrs.get("llm.cache_hit", False))
+            owner = _owning_node(record, by_id)
+            if owner:
+                node = summary["nodes"].setdefault(owner, {"duration_ms": 0.0, "llm_calls": 0, "tokens_in": 0, "tokens_out": 0})
+                node["llm_calls"] += 1
+                node["tokens_in"] += attrs.get("llm.tokens_in", 0)
+                node["tokens_out"] += attrs.get("llm.tokens_out", 0)
+        elif name.startswith("extract.") and name != "extract.ocr_page":
+            extraction = summary["extraction"]
+            extraction["duration_ms"] += record["duration_ms"]
+            extraction["pages"] += attrs.get("extract.pages", 0)
+            extraction["ocr_pages"] += attrs.get("extract.ocr_pages", 0)
+            extraction["bytes"] += attrs.get("extract.bytes", 0)
+        elif name == "json.parse":
+            parse = summary["json_parse"]
+            parse["count"] += 1
+            parse["failures"] += int(not attrs.get("json.success", True))
+            parse["duration_ms"] += record["duration_ms"]
+
+    return summary
@@ -0,0 +1,156 @@
+"""
+Kevin AI - Upload Handling
+Chunked async upload storage with on-the-fly SHA-256 and size limits
+
+Version: 2.1
+Date: October 19, 2026
+"""
+
+import hashlib
+import os
+import shutil
+import uuid
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Sequence, Tuple
+
+import aiofiles
+import aiofiles.os
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# ============================================================================
+# ERRORS
+# ============================================================================
+
+class UploadRejected(Exception):
+    """Upload violates a limit; status_code is the HTTP status to report"""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+# ============================================================================
+# SESSION IDS
+# ============================================================================
+
+def new_session_id() -> str:
+    """Sortable, collision-free session ID (timestamp + random suffix)"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+# ============================================================================
+# STREAMING UPLOAD
+# ============================================================================
+
+@dataclass(frozen=True)
+class StoredUpload:
+    """An upload written to disk"""
+    path: str
+    sha256: str
+    size: int
+
+async def store_upload(upload, dest_dir: str, max_bytes: int) -> StoredUpload:
+    """Stream an UploadFile to dest_dir in chunks, hashing as it goes
+
+    Data goes to a temp file that is renamed into place only when complete;
+    the upload is rejected (413) as soon as it exceeds max_bytes.
+    """
+    # Starlette knows the size of spooled parts; reject before copying anything
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadRejected(f"{upload.filename} exceeds the {max_bytes // (1024 * 1024)} MB upload limit", 413)
+
+    await aiofiles.os.makedirs(dest_dir, exist_ok=True)
+    path = os.path.join(dest_dir, os.path.basename(upload.filename))
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.part"
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejected(f"{upload.filename} exceeds the {max_bytes // (1024 * 1024)} MB upload limit", 413)
+                digest.update(chunk)
+                await f.write(chunk)
+        if size == 0:
+            raise UploadRejected(f"{upload.filename} is empty")
+        await aiofiles.os.replace(tmp_path, path)
+    except BaseException:
+        if await aiofiles.os.path.exists(tmp_path):
+            await aiofiles.os.remove(tmp_path)
+        raise
+
+    return StoredUpload(path=path, sha256=digest.hexdigest(), size=size)
+
+# ============================================================================
+# ZIP ARCHIVES OF SOPS
+# ============================================================================
+
+def extract_sop_archive(
+    zip_path: str,
+    upload_root: str,
+    extensions: Sequence[str],
+    max_bytes: int,
+    max_items: int
+) -> List[Tuple[str, str, StoredUpload]]:
+    """Extract the SOPs of a ZIP, each into its own new session directory
+
+    Members are streamed and hashed like direct uploads. Declared sizes are
+    checked before extraction and actual sizes while copying, so a
+    misreported (zip bomb) member is cut off at max_bytes.
+
+    Returns:
+        (member name, session_id, stored upload) per SOP, in archive order
+    """
+    extracted = []
+    created = []
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            members = [
+                info for info in archive.infolist()
+                if not info.is_dir()
+                and not os.path.basename(info.filename).startswith(".")
+                and not info.filename.startswith("__MACOSX/")
+                and info.filename.lower().endswith(tuple(extensions))
+            ]
+            if not members:
+                raise UploadRejected(f"{os.path.basename(zip_path)} contains no {', '.join(extensions)} files")
+            if len(members) > max_items:
+                raise UploadRejected(f"{os.path.basename(zip_path)} has {len(members)} SOPs; the limit is {max_items}", 413)
+
+            for info in members:
+                if info.file_size > max_bytes:
+                    raise UploadRejected(f"{info.filename} exceeds the {max_bytes // (1024 * 1024)} MB upload limit", 413)
+
+                session_id = new_session_id()
+                dest_dir = os.path.join(upload_root, session_id)
+                os.makedirs(dest_dir, exist_ok=True)
+                created.append(dest_dir)
+                path = os.path.join(dest_dir, os.path.basename(info.filename))
+                digest = hashlib.sha256()
+                size = 0
+                with archive.open(info) as src, open(path, "wb") as dest:
+                    while True:
+                        chunk = src.read(UPLOAD_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        size += len(chunk)
+                        if size > max_bytes:
+                            raise UploadRejected(f"{info.filename} exceeds the {max_bytes // (1024 * 1024)} MB upload limit", 413)
+                        digest.update(chunk)
+                        dest.write(chunk)
+                extracted.append((info.filename, session_id, StoredUpload(path=path, sha256=digest.hexdigest(), size=size)))
+    except BaseException as e:
+        for dest_dir in created:
+            shutil.rmtree(dest_dir, ignore_errors=True)
+        if isinstance(e, zipfile.BadZipFile):
+            raise UploadRejected(f"{os.path.basename(zip_path)} is not a valid ZIP archive") from e
+        raise
+
+    return extracted
@@ -0,0 +1,76 @@
+"""
+Kevin AI - Job Worker
+Runs queued SOP pipelines for API processes started with KEVIN_JOB_MODE=queue
+
+Version: 2.1
+Date: October 19, 2026
+
+Usage:
+    KEVIN_JOB_MODE=queue KEVIN_API_WORKERS=4 python kevin_api.py
+    python kevin_worker.py --concurrency 2        # one or more per machine
+    python kevin_worker.py --queue redis --redis-url redis://queue-host:6379/0
+    python kevin_worker.py --metrics-port 9101   # Prometheus metrics of this worker
+"""
+
+import argparse
+import os
+import signal
+
+import kevin_metrics
+from kevin_jobs import JobStore, JobWorker, SqliteJobEventLog, make_job_queue
+from kevin_pipeline import JOB_DB_PATH, JOB_QUEUE_BACKEND, REDIS_URL, make_admission, run_pipeline_job, write_batch_summary
+from kevin_agents import REQUIRED_WARMUP_STEPS, warm_up
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Kevin AI job worker")
+    parser.add_argument("--db", default=JOB_DB_PATH, help="Job database shared with the API processes")
+    parser.add_argument("--queue", default=JOB_QUEUE_BACKEND, choices=["sqlite", "redis"])
+    parser.add_argument("--redis-url", default=REDIS_URL)
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("KEVIN_WORKER_CONCURRENCY", "1")),
+                        help="Pipelines run at once by this process")
+    parser.add_argument("--lease-seconds", type=float, default=float(os.getenv("KEVIN_LEASE_SECONDS", "60")))
+    parser.add_argument("--max-attempts", type=int, default=int(os.getenv("KEVIN_JOB_MAX_ATTEMPTS", "3")))
+    parser.add_argument("--worker-id", default=None)
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("KEVIN_WORKER_METRICS_PORT", "0")),
+                        help="Serve /metrics on this port (0 = off)")
+    args = parser.parse_args()
+
+    store = JobStore(args.db)
+    worker = JobWorker(
+        store,
+        make_job_queue(store, args.queue, args.redis_url),
+        run_pipeline_job,
+        SqliteJobEventLog(args.db),
+        concurrency=args.concurrency,
+        lease_seconds=args.lease_seconds,
+        max_attempts=args.max_attempts,
+        worker_id=args.worker_id,
+        on_batch_done=write_batch_summary,
+        admission=make_admission(store)
+    )
+
+    def stop(signum, frame):
+        print("Stopping after the running jobs finish...")
+        worker.stop()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    if args.metrics_port:
+        kevin_metrics.start_http_server(args.metrics_port)
+        print(f"Serving metrics on port {args.metrics_port} (/metrics)")
+
+    # Build the graph, LLM connections and extraction engines before taking the first lease
+    for name, step in warm_up().items():
+        if not step["ok"]:
+            if name in REQUIRED_WARMUP_STEPS:
+                raise SystemExit(f"Warm-up step {name} failed: {step['error']}")
+            print(f"Warm-up step {name} failed: {step['error']}")
+    worker.run_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Kevin AI - Streaming ZIP Export
+Deterministic ZIP packages streamed in chunks with bounded memory
+
+Version: 2.1
+Date: October 19, 2026
+"""
+
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+import zipfile
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+# Artifacts that are already compressed gain nothing from deflate
+STORED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".zip", ".gz", ".zst", ".pdf", ".docx", ".pptx", ".xlsx")
+
+ZIP_MODES = ("auto", "deflate", "stored")
+
+# A single byte range: first-last, first- or -suffix_length (ASCII digits only)
+_BYTE_RANGE = re.compile(r"bytes=\s*([0-9]*)\s*-\s*([0-9]*)\s*")
+
+# ============================================================================
+# CHUNK SINK
+# ============================================================================
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that buffers bytes until drained
+
+    zipfile detects the missing seek/tell and switches to data descriptors,
+    so entries never need to be rewritten after their data is emitted.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+# ============================================================================
+# PACKAGE LAYOUT
+# ============================================================================
+
+class PackageEntry(NamedTuple):
+    """One archive member: a file, or bytes derived from one (read is set)
+
+    stat is the source file's; derived members must be a pure function of it.
+    """
+    arcname: str
+    path: str
+    stat: os.stat_result
+    read: Optional[Callable[[], bytes]] = None
+
+def package_files(root: str, exclude: Tuple[str, ...] = ()) -> List[PackageEntry]:
+    """Every file under root except the excluded archive names, in a stable order"""
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            arcname = os.path.relpath(path, root).replace(os.sep, "/")
+            if arcname not in exclude:
+                entries.append(PackageEntry(arcname, path, os.stat(path)))
+    return sorted(entries, key=lambda entry: entry.arcname)
+
+def package_etag(files: List[PackageEntry], mode: str) -> str:
+    """Strong validator: identical file listings produce byte-identical archives"""
+    digest = hashlib.sha256(mode.encode("utf-8"))
+    for entry in files:
+        digest.update(f"{entry.arcname}\0{entry.stat.st_size}\0{entry.stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+def _compression_for(arcname: str, mode: str) -> int:
+    if mode == "stored" or (mode == "auto" and arcname.lower().endswith(STORED_EXTENSIONS)):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+# ============================================================================
+# STREAMING WRITER
+# ============================================================================
+
+def iter_zip(files: List[PackageEntry], mode: str = "auto") -> Iterator[bytes]:
+    """Yield the ZIP archive of files chunk by chunk
+
+    Entry order, timestamps and compression settings only depend on the file
+    listing, so regenerating the archive yields the same bytes; that is what
+    makes byte-range resume possible without keeping the archive anywhere.
+    """
+    if mode not in ZIP_MODES:
+        raise ValueError(f"Unsupported ZIP mode: {mode}")
+
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for entry in files:
+            info = zipfile.ZipInfo(entry.arcname, date_time=_zip_date_time(entry.stat.st_mtime))
+            info.compress_type = _compression_for(entry.arcname, mode)
+            info.external_attr = 0o644 << 16
+            if entry.read is not None:
+                data = entry.read()
+                info.file_size = len(data)
+                source = io.BytesIO(data)
+            else:
+                info.file_size = entry.stat.st_size
+                source = open(entry.path, "rb")
+
+            with source as src, archive.open(info, "w", force_zip64=info.file_size >= zipfile.ZIP64_LIMIT) as dest:
+                while True:
+                    block = src.read(CHUNK_SIZE)
+                    if not block:
+                        break
+                    dest.write(block)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    # Central directory is written on close
+    data = sink.drain()
+    if data:
+        yield data
+
+def _zip_date_time(mtime: float) -> Tuple[int, int, int, int, int, int]:
+    t = time.localtime(mtime)
+    # ZIP timestamps cannot predate 1980
+    if t.tm_year < 1980:
+        return (1980, 1, 1, 0, 0, 0)
+    return (t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min, t.tm_sec)
+
+def slice_stream(chunks: Iterator[bytes], start: int, end: int) -> Iterator[bytes]:
+    """Yield only bytes start..end (inclusive) of a chunk stream"""
+    position = 0
+    for chunk in chunks:
+        chunk_end = position + len(chunk)
+        if chunk_end > start:
+            yield chunk[max(0, start - position):min(len(chunk), end + 1 - position)]
+        position = chunk_end
+        if position > end:
+            break
+
+# ============================================================================
+# ARCHIVE SIZE CACHE
+# ============================================================================
+
+class ZipSizeCache:
+    """Archive sizes by ETag, so range requests can be answered with Content-Range"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, int] = {}
+
+    def get(self, etag: str) -> Optional[int]:
+        with self._lock:
+            return self._sizes.get(etag)
+
+    def put(self, etag: str, size: int) -> None:
+        with self._lock:
+            if etag not in self._sizes and len(self._sizes) >= self.max_entries:
+                self._sizes.pop(next(iter(self._sizes)))
+            self._sizes[etag] = size
+
+    def size_of(self, etag: str, files: List[PackageEntry], mode: str) -> int:
+        """Cached size, computing it with a throwaway streaming pass if needed"""
+        size = self.get(etag)
+        if size is None:
+            size = sum(len(chunk) for chunk in iter_zip(files, mode))
+            self.put(etag, size)
+        return size
+
+    def recording(self, etag: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """Pass chunks through and remember the total size once the stream completes"""
+        total = 0
+        for chunk in chunks:
+            total += len(chunk)
+            yield chunk
+        self.put(etag, total)
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) of a single "bytes=" range, None for no/unsupported range
+
+    Raises ValueError for a range that cannot be satisfied.
+    """
+    match = _BYTE_RANGE.fullmatch(header or "")
+    first, last = match.groups() if match else ("", "")
+    if (first == last == "") or (first and last and int(last) < int(first)):
+        # Malformed, reversed and multiple ranges are ignored (RFC 9110); the full archive is sent
+        return None
+    if first == "":
+        length = int(last)
+        if length == 0:
+            raise ValueError(f"Unsatisfiable range: {header}")
+        return max(0, size - length), size - 1
+    start = int(first)
+    if start >= size:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    return start, min(int(last) if last else size - 1, size - 1)
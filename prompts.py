@@ -11,6 +11,10 @@ Updates:
 - Detailed KPI calculations
 """
 
+# Bump whenever a prompt changes in a way that changes outputs; identical
+# submissions are only reused across runs with the same prompt version.
+PROMPT_VERSION = "5.2"
+
 # ============================================================================
 # SOP ANALYSIS AGENT PROMPTS
 # ============================================================================
@@ -639,6 +643,20 @@ Business Domain: {domain}
 
 Generate MINIMUM 30 comprehensive test cases with full details. Output valid JSON only."""
 
+TEST_CASE_SHARD_USER_PROMPT = """Process Steps:
+{steps}
+
+Automation Opportunities:
+{automation_opportunities}
+
+Business Domain: {domain}
+
+This is shard {shard_number} of {shard_count} of the test suite. Other shards cover the remaining steps and opportunities, so the MINIMUM 30 applies to the merged suite, not to this shard.
+Shard Focus:
+{shard_focus}
+
+Generate {cases_per_shard} comprehensive test cases for this focus only, spread across every item above and the test types that apply to each, with full details. Output valid JSON only."""
+
 # ============================================================================
 # CODE GENERATOR AGENT PROMPTS
 # ============================================================================
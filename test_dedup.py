@@ -0,0 +1,120 @@
+"""
+Kevin AI - Near-Duplicate Detection Tests
+Shingling, MinHash estimates and the dedup threshold boundary
+
+Run with: python -m pytest test_dedup.py
+"""
+
+import math
+import random
+
+import pytest
+
+from kevin_dedup import MinHasher, dedupe_near_duplicates, shingles
+
+
+MANUAL = "Verify that an order above the credit limit is routed to manual approval"
+MANAGER = "Verify that an order above the credit limit is routed to manager approval"
+ADDRESS = "Verify that a shipment with a missing address is rejected with an error"
+
+
+def _jaccard_sets(jaccard: float, size: int = 2000, seed: int = 7):
+    """Two random shingle sets of the given size with (about) the given Jaccard similarity"""
+    rng = random.Random(seed)
+    shared = round(2 * size * jaccard / (1 + jaccard))
+    universe = [rng.getrandbits(64) for _ in range(2 * size - shared)]
+    return set(universe[:size]), set(universe[size - shared:])
+
+
+def _similarity(text_a: str, text_b: str, num_perm: int = 64) -> float:
+    hasher = MinHasher(num_perm)
+    return MinHasher.similarity(hasher.signature(shingles(text_a)), hasher.signature(shingles(text_b)))
+
+
+# ============================================================================
+# SHINGLING AND MINHASH
+# ============================================================================
+
+def test_shingles_ignore_case_punctuation_and_spacing():
+    assert shingles(MANUAL) == shingles(f"  {MANUAL.upper()}!!  ")
+    assert shingles("Order-ID: 42") == shingles("order id 42")
+
+
+def test_shingles_of_short_and_empty_text():
+    assert len(shingles("ok")) == 1  # padded to one shingle
+    assert shingles("") == shingles("?!")
+    assert len(shingles("abcdef", k=5)) == 2
+
+
+@pytest.mark.parametrize("jaccard", [0.2, 0.5, 0.8])
+def test_similarity_estimates_jaccard(jaccard):
+    set_a, set_b = _jaccard_sets(jaccard)
+    exact = len(set_a & set_b) / len(set_a | set_b)
+    hasher = MinHasher(num_perm=256)
+    estimate = MinHasher.similarity(hasher.signature(set_a), hasher.signature(set_b))
+    assert abs(estimate - exact) < 0.06
+
+
+def test_signatures_are_deterministic_and_densified():
+    hasher = MinHasher(num_perm=64)
+    short = shingles("Approve")  # far fewer shingles than bins
+    assert hasher.signature(short) == hasher.signature(set(short))
+    assert MinHasher.similarity(hasher.signature(short), hasher.signature(shingles("approve!"))) == 1.0
+    assert MinHasher.similarity(hasher.signature(short), hasher.signature(shingles("Reject"))) < 0.5
+    assert hasher.signature(set()) == (0,) * 64
+
+
+# ============================================================================
+# THRESHOLD BOUNDARIES
+# ============================================================================
+
+def test_threshold_is_inclusive():
+    similarity = _similarity(MANUAL, MANAGER)
+    assert 0.5 < similarity < 1.0
+
+    kept, dropped = dedupe_near_duplicates([MANUAL, MANAGER], str, threshold=similarity)
+    assert (kept, dropped) == ([MANUAL], 1)
+
+    kept, dropped = dedupe_near_duplicates([MANUAL, MANAGER], str, threshold=math.nextafter(similarity, 1.0))
+    assert (kept, dropped) == ([MANUAL, MANAGER], 0)
+
+
+def test_threshold_one_only_drops_identical_normalized_text():
+    items = [MANUAL, MANUAL.upper() + ".", MANAGER]
+    kept, dropped = dedupe_near_duplicates(items, str, threshold=1.0)
+    assert (kept, dropped) == ([MANUAL, MANAGER], 1)
+
+
+def test_unrelated_text_survives_a_low_threshold():
+    assert _similarity(MANUAL, ADDRESS) < 0.3
+    kept, dropped = dedupe_near_duplicates([MANUAL, ADDRESS], str, threshold=0.3, bands=64)
+    assert (kept, dropped) == ([MANUAL, ADDRESS], 0)
+
+
+def test_pairs_without_a_shared_band_are_never_compared():
+    # One row per band compares every pair sharing a single bin; one band of
+    # all rows only compares identical signatures, whatever the threshold
+    assert dedupe_near_duplicates([MANUAL, MANAGER], str, threshold=0.0, bands=64)[1] == 1
+    assert dedupe_near_duplicates([MANUAL, MANAGER], str, threshold=0.0, bands=1)[1] == 0
+
+
+def test_first_occurrence_wins_and_order_is_kept():
+    tests = [
+        {"id": "TC-1", "text": MANUAL},
+        {"id": "TC-2", "text": ADDRESS},
+        {"id": "TC-3", "text": MANUAL + "."},
+        {"id": "TC-4", "text": ADDRESS.lower()},
+    ]
+    kept, dropped = dedupe_near_duplicates(tests, lambda test: test["text"])
+    assert [test["id"] for test in kept] == ["TC-1", "TC-2"]
+    assert dropped == 2
+
+
+def test_near_duplicates_in_a_large_batch():
+    rng = random.Random(3)
+    words = ["order", "invoice", "claim", "route", "approve", "reject", "retry", "notify", "archive", "escalate"]
+    base = [" ".join(rng.choice(words) + str(rng.randrange(100)) for _ in range(12)) for _ in range(200)]
+    items = base + [text.upper() + "!" for text in base[:50]]
+    kept, dropped = dedupe_near_duplicates(items, str)
+    assert dropped == 50
+    assert kept == base
@@ -0,0 +1,162 @@
+"""
+Kevin AI - Mermaid Renderer Tests
+Parsing (shapes, links, & groups, subgraphs) and layered layout of cycles
+
+Run with: python -m pytest test_mermaid.py
+"""
+
+import pytest
+
+import kevin_mermaid
+from kevin_mermaid import MermaidError, parse
+
+
+# ============================================================================
+# PARSER
+# ============================================================================
+
+@pytest.mark.parametrize("node, shape, label", [
+    ("A[Receive order]", "rect", "Receive order"),
+    ("A(Rounded)", "round", "Rounded"),
+    ("A([Start])", "stadium", "Start"),
+    ("A[[Subroutine]]", "subroutine", "Subroutine"),
+    ("A[(Orders DB)]", "cylinder", "Orders DB"),
+    ("A((Hub))", "circle", "Hub"),
+    ("A{Approved?}", "diamond", "Approved?"),
+    ("A{{Prepare}}", "hexagon", "Prepare"),
+    ("A[/Input/]", "parallelogram", "Input"),
+    ("A[\\Output\\]", "parallelogram_alt", "Output"),
+    ("A[/Manual\\]", "trapezoid", "Manual"),
+    ("A[\\Manual/]", "trapezoid_alt", "Manual"),
+    ("A>Flag]", "asymmetric", "Flag"),
+    ('A["Quoted (with) [brackets]"]', "rect", "Quoted (with) [brackets]"),
+    ("A[Line one<br/>line two]", "rect", "Line one\nline two"),
+])
+def test_node_shapes(node, shape, label):
+    chart = parse(f"flowchart TD\n    {node}")
+    assert chart.nodes["A"].shape == shape
+    assert chart.nodes["A"].label == label
+
+
+def test_bare_node_keeps_first_shape():
+    chart = parse("graph LR\n    A{Check} --> B\n    A --> C")
+    assert chart.direction == "LR"
+    assert chart.nodes["A"].shape == "diamond"
+    assert chart.nodes["B"].shape == "rect"
+    assert chart.nodes["B"].label == "B"
+
+
+@pytest.mark.parametrize("link, line, arrow, label", [
+    ("A --> B", "solid", True, ""),
+    ("A --- B", "solid", False, ""),
+    ("A -.-> B", "dotted", True, ""),
+    ("A ==> B", "thick", True, ""),
+    ("A -->|yes| B", "solid", True, "yes"),
+    ("A -- no --> B", "solid", True, "no"),
+    ("A == escalate ==> B", "thick", True, "escalate"),
+    ("A -. retry .-> B", "dotted", True, "retry"),
+])
+def test_link_styles(link, line, arrow, label):
+    edge, = parse(f"flowchart TD\n    {link}").edges
+    assert (edge.src, edge.dst, edge.line, edge.arrow, edge.label) == ("A", "B", line, arrow, label)
+
+
+def test_chains_and_ampersand_groups():
+    chart = parse("flowchart TD\n    A & B --> C & D --> E; F --> A")
+    pairs = [(e.src, e.dst) for e in chart.edges]
+    assert pairs == [("A", "C"), ("A", "D"), ("B", "C"), ("B", "D"), ("C", "E"), ("D", "E"), ("F", "A")]
+
+
+def test_subgraphs_nest_and_collect_their_nodes():
+    chart = parse("""flowchart TD
+        subgraph intake [Order Intake]
+            A[Receive] --> B[Validate]
+            subgraph checks
+                C{Fraud?}
+            end
+        end
+        B --> C --> D[Ship]
+    """)
+    assert chart.subgraphs["intake"].title == "Order Intake"
+    assert chart.subgraphs["intake"].nodes == ["A", "B"]
+    assert chart.subgraphs["checks"].parent == "intake"
+    assert chart.subgraphs["checks"].nodes == ["C"]
+    # D is first seen after both subgraphs closed
+    assert all("D" not in sub.nodes for sub in chart.subgraphs.values())
+
+
+def test_class_and_style_statements():
+    chart = parse("""flowchart TD
+        classDef auto fill:#0f0,stroke:#090
+        A:::auto --> B
+        class B auto
+        style A stroke-width:3px
+    """)
+    assert chart.class_defs["auto"] == {"fill": "#0f0", "stroke": "#090"}
+    assert chart.nodes["A"].classes == ["auto"]
+    assert chart.nodes["B"].classes == ["auto"]
+    assert chart.nodes["A"].style == {"stroke-width": "3px"}
+
+
+@pytest.mark.parametrize("source", ["", "   \n%% only a comment", "sequenceDiagram\n    A->>B: hi", "flowchart TD\n    click A callback"])
+def test_rejects_non_flowcharts(source):
+    with pytest.raises(MermaidError):
+        parse(source)
+
+
+# ============================================================================
+# LAYOUT
+# ============================================================================
+
+def _inside(node, box):
+    x0, y0, x1, y1 = box
+    return x0 <= node.cx - node.w / 2 and node.cx + node.w / 2 <= x1 and y0 <= node.cy - node.h / 2 and node.cy + node.h / 2 <= y1
+
+
+def test_cycle_is_laid_out_in_layers():
+    chart = parse("flowchart TD\n    A --> B --> C --> A\n    C --> D")
+    placed = kevin_mermaid.layout(chart)
+    by_id = {p.node.id: p for p in placed.nodes}
+
+    # The back edge C --> A is reversed for layering only: A, B, C stack top to bottom
+    assert by_id["A"].cy < by_id["B"].cy < by_id["C"].cy
+    # ...and still drawn from C to A
+    back = next(e for e in placed.edges if (e.edge.src, e.edge.dst) == ("C", "A"))
+    start, end = back.points[0], back.points[-1]
+    assert abs(start[1] - by_id["C"].cy) < abs(start[1] - by_id["A"].cy)
+    assert abs(end[1] - by_id["A"].cy) < abs(end[1] - by_id["C"].cy)
+
+
+def test_self_loops_and_two_cycles_terminate():
+    chart = parse("flowchart LR\n    A --> A\n    A --> B\n    B --> A")
+    placed = kevin_mermaid.layout(chart)
+    assert len(placed.edges) == 2  # the self-loop is not drawn
+    assert placed.width > 0 and placed.height > 0
+
+
+def test_cluster_boxes_enclose_nodes_and_nested_clusters():
+    chart = parse("""flowchart TD
+        subgraph outer
+            A --> B
+            subgraph inner
+                C
+            end
+        end
+        B --> C
+    """)
+    placed = kevin_mermaid.layout(chart)
+    by_id = {p.node.id: p for p in placed.nodes}
+    boxes = {sub.id: box for sub, box in placed.clusters}
+
+    assert [sub.id for sub, _ in placed.clusters] == ["outer", "inner"]  # outermost drawn first
+    assert all(_inside(by_id[n], boxes["outer"]) for n in "ABC")
+    assert _inside(by_id["C"], boxes["inner"])
+    ox0, oy0, ox1, oy1 = boxes["outer"]
+    ix0, iy0, ix1, iy1 = boxes["inner"]
+    assert ox0 < ix0 and oy0 < iy0 and ix1 < ox1 and iy1 < oy1
+
+
+@pytest.mark.parametrize("format, magic", [("png", b"\x89PNG"), ("jpg", b"\xff\xd8"), ("svg", b"<svg")])
+def test_render_formats(format, magic):
+    data = kevin_mermaid.render("flowchart TD\n    A([Start]) --> B{OK?} -->|yes| C[Done]", format)
+    assert data.lstrip().startswith(magic)
@@ -0,0 +1,132 @@
+"""
+Kevin AI - Session Store Tests
+Container round trips, legacy directories and truncated containers
+
+Run with: python -m pytest test_session_store.py
+"""
+
+import json
+import os
+
+import pytest
+
+import kevin_session_store as store
+from kevin_session_store import FULL_RESULT, FULL_RESULT_FILENAME, container_path
+
+
+RESULT = {
+    "session_id": "session-1",
+    "timestamp": "2026-10-19T09:30:00",
+    "current_state_map": "flowchart TD\n    A[Receive] --> B[Ship]",
+    "future_state_map": "flowchart TD\n    A[Receive] --> B{Auto?} --> C[Ship]",
+    "automation_opportunities": [{"step_id": "S1", "estimated_savings_annual": 47100.0, "note": "ünïcödé ✓"}],
+    "test_cases": [{"test_id": f"TC-{i:03d}", "priority": "high"} for i in range(50)],
+    "generated_code": {"code": "def run():\n    return 42\n", "language": "python"},
+    "kpi_analysis": {"cycle_time": {"before": 48, "after": 6}},
+    "errors": []
+}
+
+CODECS = ["zlib", pytest.param("zstd", marks=pytest.mark.skipif(store.zstandard is None, reason="zstandard not installed"))]
+
+
+@pytest.fixture
+def session_dir(tmp_path):
+    return str(tmp_path / "session-1")
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_round_trip(session_dir, codec):
+    path = store.write_session(session_dir, RESULT, extra_sections={"test_cases.index": {"count": 50}}, codec=codec)
+
+    assert store.load_full_result(session_dir) == RESULT
+    assert store.read_value(path, "test_cases.index") == {"count": 50}
+    assert store.read_value(path, "current_state_map") == RESULT["current_state_map"]
+    # The code section is nested: generated_code.code, next to the rest of generated_code
+    assert store.read_value(path, "generated_code") == RESULT["generated_code"]["code"]
+    assert store.read_value(path, "result")["generated_code"] == {"language": "python"}
+    assert json.loads(store.read_section(path, FULL_RESULT)) == RESULT
+
+
+def test_write_does_not_modify_the_result(session_dir):
+    result = json.loads(json.dumps(RESULT))
+    store.write_session(session_dir, result)
+    assert result == RESULT
+
+
+def test_rewrite_is_read_back_not_served_from_the_header_cache(session_dir):
+    store.write_session(session_dir, RESULT)
+    changed = dict(RESULT, test_cases=[{"test_id": "TC-NEW"}])
+    store.write_session(session_dir, changed)
+    assert store.load_full_result(session_dir)["test_cases"] == [{"test_id": "TC-NEW"}]
+
+
+def test_missing_section(session_dir):
+    path = store.write_session(session_dir, {"session_id": "s"})
+    with pytest.raises(FileNotFoundError):
+        store.read_section(path, "test_cases")
+    assert store.load_full_result(session_dir) == {"session_id": "s"}
+
+
+@pytest.mark.parametrize("keep", [
+    0,   # empty file
+    5,   # inside the magic
+    10,  # inside the header length
+    20,  # inside the header
+])
+def test_truncated_header(session_dir, keep):
+    path = store.write_session(session_dir, RESULT)
+    with open(path, "r+b") as f:
+        f.truncate(keep)
+    with pytest.raises(ValueError):
+        store.load_full_result(session_dir)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_truncated_section(session_dir, codec):
+    path = store.write_session(session_dir, RESULT, codec=codec)
+    header, start = store.read_header(path)
+    entry = header["sections"]["test_cases"]
+    with open(path, "r+b") as f:
+        f.truncate(start + entry["offset"] + entry["length"] // 2)
+
+    with pytest.raises(ValueError, match="truncated"):
+        store.read_section(path, "test_cases")
+    with pytest.raises(ValueError, match="truncated"):
+        store.load_full_result(session_dir)
+    # Sections before the cut are still readable
+    assert store.read_value(path, "automation_opportunities") == RESULT["automation_opportunities"]
+
+
+def test_not_a_container(session_dir):
+    os.makedirs(session_dir)
+    with open(container_path(session_dir), "wb") as f:
+        f.write(b"PK\x03\x04" + b"\0" * 64)
+    with pytest.raises(ValueError, match="not a session container"):
+        store.load_full_result(session_dir)
+
+
+def test_pack_legacy_session(session_dir):
+    os.makedirs(session_dir)
+    with open(os.path.join(session_dir, FULL_RESULT_FILENAME), "w") as f:
+        json.dump(RESULT, f)
+    with open(os.path.join(session_dir, "test_cases.json"), "w") as f:
+        json.dump(RESULT["test_cases"], f)
+
+    assert store.session_exists(session_dir)
+    assert store.pack_session(session_dir, remove_files=True)
+    assert not store.pack_session(session_dir)  # already packed
+    assert sorted(os.listdir(session_dir)) == [store.CONTAINER_NAME]
+    assert store.load_full_result(session_dir) == RESULT
+
+
+def test_package_expands_sections(session_dir):
+    store.write_session(session_dir, RESULT)
+    with open(os.path.join(session_dir, "notes.txt"), "w") as f:
+        f.write("reviewed")
+
+    entries = {entry.arcname: entry for entry in store.session_package(session_dir)}
+    assert sorted(entries) == sorted(
+        [FULL_RESULT_FILENAME, "notes.txt"] + [spec.filename for spec in store.SESSION_SECTIONS]
+    )
+    assert json.loads(entries["test_cases.json"].read()) == RESULT["test_cases"]
+    assert entries["generated_code.txt"].read().decode("utf-8") == RESULT["generated_code"]["code"]
@@ -0,0 +1,159 @@
+"""
+Kevin AI - Streaming ZIP Export Tests
+Deterministic archives, Range header parsing and byte-range resume
+
+Run with: python -m pytest test_zipstream.py
+"""
+
+import io
+import os
+import zipfile
+
+import pytest
+
+import kevin_zipstream
+from kevin_zipstream import PackageEntry, ZipSizeCache, iter_zip, package_etag, package_files, parse_range, slice_stream
+
+
+MTIME = 1_760_000_000  # fixed, so archives do not depend on when the test runs
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """A session-like directory; chunks are kept small so archives span many of them"""
+    monkeypatch.setattr(kevin_zipstream, "CHUNK_SIZE", 1024)
+    files = {
+        "full_result.json": b'{"session_id": "s1", "steps": [' + b'{"id": 1}, ' * 2000 + b'{"id": 2}]}',
+        "current_state_map.mermaid": b"flowchart TD\n    A --> B\n",
+        "diagrams/current_state.png": bytes(range(256)) * 40,
+        "empty.txt": b"",
+    }
+    for name, data in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        os.utime(path, (MTIME, MTIME))
+    return str(tmp_path), files
+
+
+def _archive(root, mode="auto"):
+    return b"".join(iter_zip(package_files(root), mode))
+
+
+# ============================================================================
+# DETERMINISTIC ARCHIVES
+# ============================================================================
+
+@pytest.mark.parametrize("mode", ["auto", "deflate", "stored"])
+def test_archive_is_deterministic_and_complete(package, mode):
+    root, files = package
+    data = _archive(root, mode)
+    assert data == _archive(root, mode)
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert sorted(archive.namelist()) == sorted(files)
+        for name, content in files.items():
+            assert archive.read(name) == content
+
+
+def test_auto_mode_stores_compressed_formats(package):
+    root, _ = package
+    with zipfile.ZipFile(io.BytesIO(_archive(root))) as archive:
+        assert archive.getinfo("diagrams/current_state.png").compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo("full_result.json").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_derived_entries(package):
+    root, _ = package
+    source = os.path.join(root, "full_result.json")
+    entries = [PackageEntry("summary.txt", source, os.stat(source), lambda: b"3 opportunities")]
+    with zipfile.ZipFile(io.BytesIO(b"".join(iter_zip(entries)))) as archive:
+        assert archive.read("summary.txt") == b"3 opportunities"
+
+
+def test_etag_follows_the_listing(package):
+    root, _ = package
+    etag = package_etag(package_files(root), "auto")
+    assert etag == package_etag(package_files(root), "auto")
+    assert etag != package_etag(package_files(root), "stored")
+
+    os.utime(os.path.join(root, "empty.txt"), (MTIME + 1, MTIME + 1))
+    assert etag != package_etag(package_files(root), "auto")
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        list(iter_zip([], "bzip2"))
+
+
+# ============================================================================
+# RANGE HEADERS
+# ============================================================================
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=999-", (999, 999)),
+    ("bytes=0-", (0, 999)),
+    ("bytes=500-5000", (500, 999)),  # end clamped to the last byte
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),  # suffix longer than the archive
+    ("bytes= 10 - 20 ", (10, 20)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-1200", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+
+@pytest.mark.parametrize("header", [
+    None, "", "bytes=", "bytes=-", "bytes=abc-", "bytes=1-x", "items=0-10", "bytes=0-10,20-30",
+    "bytes=--5", "bytes=+5-", "bytes=5--1", "bytes=20-10", "bytes=１-",
+])
+def test_malformed_ranges_are_ignored(header):
+    assert parse_range(header, 1000) is None
+
+
+# ============================================================================
+# RESUME
+# ============================================================================
+
+def test_resume_with_open_ended_ranges(package):
+    root, _ = package
+    files = package_files(root)
+    full = _archive(root)
+    size = ZipSizeCache().size_of(package_etag(files, "auto"), files, "auto")
+    assert size == len(full)
+
+    for offset in (0, 1, 1023, 1024, size // 2, size - 22, size - 1):
+        start, end = parse_range(f"bytes={offset}-", size)
+        resumed = b"".join(slice_stream(iter_zip(files, "auto"), start, end))
+        assert full[:offset] + resumed == full
+
+
+def test_slices_of_a_chunk_stream():
+    chunks = [b"abc", b"", b"defg", b"h", b"ijkl"]
+    data = b"".join(chunks)
+    for start in range(len(data)):
+        for end in range(start, len(data)):
+            assert b"".join(slice_stream(iter(chunks), start, end)) == data[start:end + 1]
+
+
+def test_size_cache_records_completed_streams_only(package):
+    root, _ = package
+    files = package_files(root)
+    cache = ZipSizeCache(max_entries=1)
+
+    stream = cache.recording("etag-1", iter_zip(files, "auto"))
+    next(stream)
+    assert cache.get("etag-1") is None  # interrupted download: nothing recorded
+    total = sum(len(chunk) for chunk in cache.recording("etag-1", iter_zip(files, "auto")))
+    assert cache.get("etag-1") == total
+
+    cache.put("etag-2", 10)
+    assert cache.get("etag-1") is None  # evicted by max_entries